@@ -0,0 +1,1042 @@
+# benchmark.py
+# Micro-benchmarks for the compiler phases.
+# Usage: python benchmark.py [benchmark_name ...]   (default: run all)
+
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from dfa_definitions import (
+    identifier_dfa, identifier_accept, number_dfa, number_accept,
+    operator_dfa, operator_accept, string_dfa, string_accept,
+    delimiters, parentheses, keywords
+)
+from dfa_runner import run_dfa
+from lexer import tokenize, iter_tokens, iter_statement_tokens
+from parser import Parser, ParseNode
+from incremental import IncrementalDocument
+from parallel import analyze_parallel, compile_parallel
+from pipeline import compile_statements
+from statement_cache import StatementCache
+from prepared import prepare
+from catalog import Catalog, save_catalog
+from executor import BATCH_ROWS, COMPARISONS, Executor, numpy
+from planner import Filter, IndexScan, SeqScan
+from predicates import PredicateCache
+from semantic_analyzer import SemanticAnalyzer
+from output import OutputBuffer, Report, Colors, FULL, NDJSON, TEXT
+
+SAMPLE_FILE = "samples/test_mixed.sql"
+
+
+def load_sample(repeat):
+    """Return the sample script repeated `repeat` times."""
+    with open(SAMPLE_FILE, 'r') as f:
+        text = f.read()
+    return text * repeat
+
+
+def best_of(func, *args, runs=3):
+    """Run func several times and return (best_seconds, last_result)."""
+    best = None
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def legacy_tokenize(text):
+    """
+    The original scanner loop: three separate DFAs per token via run_dfa.
+    Kept here only as the baseline for bench_lexer.
+    """
+    tokens = []
+    i = 0
+    line_num = 1
+    col = 1
+    while i < len(text):
+        ch = text[i]
+        start_col = col
+        if ch in ' \t\r':
+            i += 1; col += 1; continue
+        if ch == '\n':
+            line_num += 1; col = 1; i += 1; continue
+        if text[i:i+2] == "--":
+            while i < len(text) and text[i] != '\n':
+                i += 1; col += 1
+            continue
+        if ch == "'":
+            lexeme, token_type, next_i = run_dfa(string_dfa, string_accept, text, i)
+            if lexeme:
+                tokens.append((token_type, lexeme, line_num, start_col))
+                col += (next_i - i); i = next_i; continue
+        best_lexeme = None
+        best_type = None
+        best_len = 0
+        for dfa, accept in [(identifier_dfa, identifier_accept),
+                            (number_dfa, number_accept),
+                            (operator_dfa, operator_accept)]:
+            lexeme, token_type, next_i = run_dfa(dfa, accept, text, i)
+            if lexeme and len(lexeme) > best_len:
+                best_lexeme, best_type, best_len = lexeme, token_type, len(lexeme)
+        if best_lexeme:
+            if best_type == "IDENTIFIER" and best_lexeme in keywords:
+                best_type = "KEYWORD"
+            tokens.append((best_type, best_lexeme, line_num, start_col))
+            i += best_len; col += best_len; continue
+        if ch in delimiters:
+            tokens.append((delimiters[ch], ch, line_num, start_col))
+        elif ch in parentheses:
+            tokens.append((parentheses[ch], ch, line_num, start_col))
+        i += 1; col += 1
+    return tokens
+
+
+def bench_lexer(repeat=2000):
+    """Throughput of the combined-DFA scanner vs the three-DFA scanner."""
+    text = load_sample(repeat)
+    size_mb = len(text) / (1024 * 1024)
+
+    legacy_time, legacy_tokens = best_of(legacy_tokenize, text)
+    new_time, (tokens, _) = best_of(tokenize, text)
+
+    print(f"Input: {size_mb:.2f} MB, {len(tokens)} tokens")
+    print(f"  three DFAs per token : {legacy_time:.3f}s  ({size_mb / legacy_time:.2f} MB/s)")
+    print(f"  combined minimal DFA : {new_time:.3f}s  ({size_mb / new_time:.2f} MB/s)")
+    print(f"  speedup              : {legacy_time / new_time:.2f}x")
+    if len(legacy_tokens) != len(tokens):
+        print("  WARNING: token counts differ")
+
+
+def bench_stream_memory(repeats=(100, 800)):
+    """Peak traced memory of iter_tokens over files of growing size."""
+    for repeat in repeats:
+        fd, path = tempfile.mkstemp(suffix=".sql")
+        with os.fdopen(fd, 'w') as f:
+            f.write(load_sample(repeat))
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+
+        tracemalloc.start()
+        count = 0
+        with open(path, 'rb') as f:
+            for _ in iter_tokens(f):
+                count += 1
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        os.remove(path)
+
+        print(f"  {size_mb:7.2f} MB input, {count} tokens: peak {peak / 1024:.0f} KB")
+
+
+def traced_peak(func, *args):
+    """Return (peak traced bytes, result) for one call of func."""
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, result
+
+
+def bench_token_memory(repeat=200):
+    """Memory of the TokenStream columns vs a list of 4-tuples."""
+    text = load_sample(repeat)
+    stream_peak, (tokens, _) = traced_peak(tokenize, text)
+    tuple_peak, tuples = traced_peak(list, tokens)
+    count = len(tokens)
+
+    print(f"{count} tokens")
+    print(f"  list of tuples : {tuple_peak / count:6.1f} bytes/token")
+    print(f"  TokenStream    : {stream_peak / count:6.1f} bytes/token (arrays, incl. growth slack)")
+    print(f"  reduction      : {tuple_peak / stream_peak:.1f}x")
+
+
+def full_parse(text):
+    tokens, _ = tokenize(text)
+    return Parser(tokens).parse_query()
+
+
+def bench_incremental(repeat=500, edits=200):
+    """One-character edits: incremental document vs full re-lex + re-parse."""
+    text = load_sample(repeat)
+    doc = IncrementalDocument(text)
+    middle = text.index("WHERE emp_id = 2", len(text) // 2) + len("WHERE emp_id = ")
+
+    full_time, _ = best_of(full_parse, text, runs=1)
+
+    start = time.perf_counter()
+    for k in range(edits):
+        # alternately insert and delete a digit inside one statement
+        if k % 2 == 0:
+            doc.apply_edit(middle, 0, "7")
+        else:
+            doc.apply_edit(middle, 1, "")
+    per_edit = (time.perf_counter() - start) / edits
+
+    print(f"Script: {len(doc.segments)} statements, {len(text) / 1024:.0f} KB")
+    print(f"  full re-lex + re-parse : {full_time * 1000:.1f} ms")
+    print(f"  incremental edit       : {per_edit * 1000:.3f} ms")
+
+
+def bench_incremental_semantic(tables=50, statements=20000):
+    """Re-checking after an edit: dependency-tracked reanalyze vs full analysis."""
+    lines = [f"CREATE TABLE T{k} (id INT, name TEXT, score FLOAT);\n" for k in range(tables)]
+    for k in range(statements):
+        table = f"T{k % tables}"
+        if k % 2:
+            lines.append(f"SELECT name FROM {table} WHERE id = {k} AND score > 1.5;\n")
+        else:
+            lines.append(f"INSERT INTO {table} VALUES ({k}, 'n{k}', {k}.5);\n")
+    text = "".join(lines)
+    doc = IncrementalDocument(text)
+    doc.semantic_errors()
+
+    def full_check():
+        analyzer = SemanticAnalyzer(doc.parse_tree())
+        analyzer.analyze()
+        return analyzer.errors
+
+    full_time, full_errors = best_of(full_check)
+    print(f"{statements + tables} statements over {tables} tables")
+    print(f"  full analysis                     : {full_time * 1000:.1f} ms")
+
+    literal = text.index("VALUES (10000, ") + len("VALUES (")
+    column_type = text.index("score FLOAT", text.index("CREATE TABLE T7 "))
+    edits = [
+        ("literal in one INSERT", literal, 5, "'oops'"),
+        ("column type in one CREATE", column_type + len("score "), 5, "TEXT"),
+    ]
+    for label, offset, deleted, inserted in edits:
+        doc.apply_edit(offset, deleted, inserted)
+        statements = doc.parse_tree().children
+        start = time.perf_counter()
+        checked = doc.analyzer.reanalyze(statements)
+        elapsed = time.perf_counter() - start
+        errors = doc.analyzer.errors
+        print(f"  {label:<33} : {elapsed * 1000:.1f} ms, {checked} re-checked, {len(errors)} errors")
+
+
+def bench_parallel(repeat=3000, job_counts=(1, 2, 4, 8)):
+    """Parallel lex + parse scaling over worker counts."""
+    text = load_sample(repeat)
+    print(f"Input: {len(text) / (1024 * 1024):.2f} MB")
+    baseline = None
+    reference = None
+    for jobs in job_counts:
+        elapsed, result = best_of(compile_parallel, text, jobs, runs=1)
+        baseline = baseline or elapsed
+        tokens, lex_errors, tree, parse_errors = result
+        summary = (len(tokens), len(lex_errors), len(tree.children), len(parse_errors))
+        reference = reference or summary
+        same = "" if summary == reference else "  (MISMATCH)"
+        print(f"  jobs={jobs:<3} {elapsed:.2f}s  speedup {baseline / elapsed:.2f}x{same}")
+
+
+def whole_script(path):
+    """Phase by phase: every token and node is alive at once."""
+    with open(path, 'r') as f:
+        tokens, _ = tokenize(f.read())
+    tree = Parser(tokens).parse_query()
+    analyzer = SemanticAnalyzer(tree)
+    analyzer.analyze()
+    return len(analyzer.errors)
+
+
+def streamed_script(path):
+    """Statement by statement through the pipeline."""
+    count = 0
+    with open(path, 'rb') as f:
+        for result in compile_statements(f):
+            count += len(result.semantic_errors)
+    return count
+
+
+def bench_pipeline(repeats=(50, 400)):
+    """Peak memory and time: whole-script phases vs the streaming pipeline."""
+    for repeat in repeats:
+        fd, path = tempfile.mkstemp(suffix=".sql")
+        with os.fdopen(fd, 'w') as f:
+            f.write(load_sample(repeat))
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+
+        whole_peak, whole_errors = traced_peak(whole_script, path)
+        stream_peak, stream_errors = traced_peak(streamed_script, path)
+        whole_time, _ = best_of(whole_script, path, runs=1)
+        stream_time, _ = best_of(streamed_script, path, runs=1)
+        os.remove(path)
+
+        same = "" if whole_errors == stream_errors else "  (MISMATCH)"
+        print(f"  {size_mb:6.2f} MB input")
+        print(f"    whole script : peak {whole_peak / 1024:8.0f} KB, {whole_time:.2f}s")
+        print(f"    streaming    : peak {stream_peak / 1024:8.0f} KB, {stream_time:.2f}s{same}")
+
+
+class LegacyParseNode:
+    """The original dict-backed node (one list and one token tuple each)."""
+
+    def __init__(self, name, value=None, token=None):
+        self.name = name
+        self.value = value
+        self.children = []
+        self.data_type = None
+        self.symbol_ref = None
+        self.token = token
+        self.line = token[2] if token and len(token) > 2 else 0
+        self.col = token[3] if token and len(token) > 3 else 0
+
+    def add(self, node):
+        if node:
+            self.children.append(node)
+
+
+def copy_tree(root, node_class):
+    """Rebuild a parse tree with node_class, children before parents."""
+    copies = {}
+    stack = [(root, False)]
+    while stack:
+        node, done = stack.pop()
+        if done:
+            copy = node_class(node.name, node.value, node.token)
+            for child in node.children:
+                copy.add(copies.pop(id(child)))
+            copies[id(node)] = copy
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.children)
+    return copies[id(root)]
+
+
+def count_nodes(root):
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+
+def bench_tree_memory(repeat=100):
+    """Memory of the parse tree: __slots__ nodes vs the original ParseNode."""
+    text = "INSERT INTO Employees VALUES (1, 'Alice', 5000.5);\n" * (repeat * 100)
+    text += load_sample(repeat)
+    tree = full_parse(text)
+    nodes = count_nodes(tree)
+
+    legacy_peak, _ = traced_peak(copy_tree, tree, LegacyParseNode)
+    compact_peak, _ = traced_peak(copy_tree, tree, ParseNode)
+
+    print(f"Source: {len(text) / 1024:.0f} KB, {nodes} nodes")
+    print(f"  dict-backed ParseNode : {legacy_peak / 1024:8.0f} KB ({legacy_peak / nodes:.0f} bytes/node)")
+    print(f"  __slots__ ParseNode   : {compact_peak / 1024:8.0f} KB ({compact_peak / nodes:.0f} bytes/node)")
+    print(f"  reduction             : {legacy_peak / compact_peak:.1f}x")
+
+
+def parse_only(tokens):
+    parser = Parser(tokens)
+    parser.parse_query()
+    return len(parser.errors)
+
+
+def bench_syntax_errors(repeat=20000):
+    """Parse speed of clean statements vs statements that all fail."""
+    clean = "INSERT INTO t VALUES (1, 'x', 2.5);\nSELECT a FROM t WHERE a > 1;\n" * repeat
+    # same token counts, but every statement has a syntax error midway
+    dirty = "INSERT INTO t VALUES (1, 'x' 2.5);\nSELECT a FROM t WHERE a > > 1;\n" * repeat
+
+    for label, text in (("clean", clean), ("error-heavy", dirty)):
+        tokens, _ = tokenize(text)
+        elapsed, errors = best_of(parse_only, tokens)
+        rate = len(tokens) / elapsed / 1e6
+        print(f"  {label:<12}: {elapsed:.3f}s, {rate:.2f} M tokens/s, {errors} syntax errors")
+
+
+def deep_condition(depth):
+    """A WHERE clause nested `depth` levels deep in parentheses and NOTs."""
+    inner = "salary > 1000 AND emp_id = 1"
+    where = "(NOT " * depth + inner + ")" * depth
+    return ("CREATE TABLE Employees (emp_id INT, emp_name TEXT, salary FLOAT);\n"
+            f"SELECT emp_name FROM Employees WHERE {where} OR emp_id = 2;\n")
+
+
+def check_and_print(text):
+    tokens, _ = tokenize(text)
+    parser = Parser(tokens)
+    tree = parser.parse_query()
+    analyzer = SemanticAnalyzer(tree)
+    analyzer.analyze()
+    return len(repr(tree)), parser.errors + analyzer.errors
+
+
+def bench_deep_conditions(depths=(100, 10000, 100000)):
+    """Parse, analyze and print WHERE clauses nested far past the recursion limit."""
+    print(f"Recursion limit: {sys.getrecursionlimit()}")
+    for depth in depths:
+        elapsed, (printed, errors) = best_of(check_and_print, deep_condition(depth), runs=1)
+        status = "ok" if not errors else f"{len(errors)} errors"
+        print(f"  depth {depth:>7}: {elapsed:.3f}s, {printed / 1024:.0f} KB printed, {status}")
+
+
+def legacy_repr(node, level=0):
+    """The original recursive, concatenating ParseNode.__repr__."""
+    ret = "  " * level + str(node.name)
+    if node.value:
+        ret += f": {node.value}"
+    if node.data_type:
+        ret += f" [Type: {node.data_type}]"
+    ret += "\n"
+    for child in node.children:
+        ret += legacy_repr(child, level + 1)
+    return ret
+
+
+def legacy_listing(tokens, tree, out):
+    """Token and tree output the way main.py used to do it: one print per token."""
+    for ttype, val, line, col in tokens:
+        print(
+            f"{Colors.BLUE}{ttype:<12}{Colors.RESET} "
+            f"{val:<15} "
+            f"(Line {line}, col {col})",
+            file=out
+        )
+    print(legacy_repr(tree), file=out)
+
+
+def report_listing(tokens, tree, out, fmt):
+    report = Report(OutputBuffer(out), FULL, fmt)
+    report.tokens(tokens)
+    report.tree(tree)
+    report.close()
+
+
+def bench_output(repeat=300):
+    """Writing tokens and the parse tree: print per line vs the buffered Report."""
+    text = load_sample(repeat)
+    tokens, _ = tokenize(text)
+    tree = Parser(tokens).parse_query()
+    print(f"{len(tokens)} tokens")
+
+    with open(os.devnull, 'w') as devnull:
+        legacy_time, _ = best_of(legacy_listing, tokens, tree, devnull)
+        text_time, _ = best_of(report_listing, tokens, tree, devnull, TEXT)
+        ndjson_time, _ = best_of(report_listing, tokens, tree, devnull, NDJSON)
+
+    # the two text listings must match
+    before, after = io.StringIO(), io.StringIO()
+    legacy_listing(tokens, tree, before)
+    report_listing(tokens, tree, after, TEXT)
+    same = "" if before.getvalue() == after.getvalue() else "  (MISMATCH)"
+
+    print(f"  print per line + repr : {legacy_time:.3f}s")
+    print(f"  buffered text report  : {text_time:.3f}s{same}")
+    print(f"  buffered NDJSON       : {ndjson_time:.3f}s")
+
+
+def repeated_shapes(rows):
+    """A script of a few statement shapes with changing literals."""
+    lines = ["CREATE TABLE Employees (emp_id INT, emp_name TEXT, salary FLOAT);"]
+    for k in range(rows):
+        lines.append(f"INSERT INTO Employees VALUES ({k}, 'name{k}', {k}.5);")
+        if k % 4 == 0:
+            lines.append(f"SELECT emp_name FROM Employees WHERE emp_id = {k} AND salary > {k}.0;")
+    return "\n".join(lines) + "\n"
+
+
+def run_pipeline(text, cache):
+    count = 0
+    for result in compile_statements(text, cache=cache):
+        count += len(result.errors)
+    return count
+
+
+def check_statements(statements, cache):
+    """Parse + check pre-lexed statements, through the cache if given."""
+    analyzer = SemanticAnalyzer()
+    count = 0
+    for tokens in statements:
+        if cache is not None:
+            count += len(cache.compile(tokens, analyzer)[2])
+            continue
+        for statement in Parser(tokens).iter_statements():
+            count += len(analyzer.analyze_statement(statement))
+    return count
+
+
+def bench_statement_cache(rows=20000):
+    """Repeated statement shapes, with and without the cache."""
+    text = repeated_shapes(rows)
+    statements = list(iter_statement_tokens(text))
+    print(f"{len(statements)} statements")
+
+    plain_time, plain_errors = best_of(check_statements, statements, None)
+    cache = StatementCache()
+    cached_time, cached_errors = best_of(check_statements, statements, cache)
+    same = "" if plain_errors == cached_errors else "  (MISMATCH)"
+    print(f"  parse + check             : {plain_time:.3f}s")
+    print(f"  StatementCache            : {cached_time:.3f}s{same}  ({plain_time / cached_time:.2f}x)")
+    print(f"    hits {cache.hits}, misses {cache.misses}")
+
+    plain_time, _ = best_of(run_pipeline, text, None, runs=1)
+    cached_time, _ = best_of(run_pipeline, text, StatementCache(), runs=1)
+    print(f"  whole pipeline (with lexing): {plain_time:.3f}s -> {cached_time:.3f}s")
+
+
+def compile_each_row(rows, analyzer):
+    """Build SQL text per row and compile it from scratch."""
+    errors = 0
+    for row in rows:
+        sql = f"INSERT INTO Employees VALUES ({row[0]}, '{row[1]}', {row[2]});"
+        tokens, lex_errors = tokenize(sql)
+        for statement in Parser(tokens).iter_statements():
+            errors += len(analyzer.analyze_statement(statement))
+    return errors
+
+
+def bind_each_row(rows, analyzer):
+    """Prepare once, bind each row."""
+    statement = prepare("INSERT INTO Employees VALUES (?, ?, ?);", analyzer)
+    bind = statement.bind
+    errors = 0
+    for row in rows:
+        errors += len(bind(row))
+    return errors
+
+
+def bench_prepared(count=100000):
+    """Insert loop: compile SQL text per row vs one prepare + a bind per row."""
+    analyzer = SemanticAnalyzer()
+    for _ in compile_statements("CREATE TABLE Employees (emp_id INT, emp_name TEXT, salary FLOAT);", analyzer):
+        pass
+    rows = [(k, f"name{k}", k + 0.5) for k in range(count)]
+
+    compile_time, compile_errors = best_of(compile_each_row, rows, analyzer, runs=1)
+    bind_time, bind_errors = best_of(bind_each_row, rows, analyzer)
+    same = "" if compile_errors == bind_errors else "  (MISMATCH)"
+    print(f"{count} rows")
+    print(f"  compile each row : {compile_time:.3f}s ({compile_time / count * 1e6:.1f} us/row)")
+    print(f"  prepare + bind   : {bind_time:.3f}s ({bind_time / count * 1e6:.2f} us/row){same}")
+    print(f"  speedup          : {compile_time / bind_time:.0f}x")
+
+
+def parse_and_check(text):
+    """Tokenize, parse and check a script; returns (tree, error count)."""
+    analyzer = SemanticAnalyzer()
+    tokens, _ = tokenize(text)
+    parser = Parser(tokens)
+    tree = parser.parse_query()
+    analyzer.parse_tree = tree
+    analyzer.analyze()
+    return tree, len(parser.errors) + len(analyzer.errors)
+
+
+def bench_bulk_insert(count=100000):
+    """The same rows as one INSERT per row vs one multi-row INSERT."""
+    create = "CREATE TABLE Employees (emp_id INT, emp_name TEXT, salary FLOAT);\n"
+    rows = [f"({k}, 'name{k}', {k}.5)" for k in range(count)]
+    single = create + "".join(f"INSERT INTO Employees VALUES {row};\n" for row in rows)
+    bulk = create + "INSERT INTO Employees VALUES " + ",\n".join(rows) + ";\n"
+
+    single_time, (_, single_errors) = best_of(parse_and_check, single, runs=1)
+    bulk_time, (tree, bulk_errors) = best_of(parse_and_check, bulk, runs=1)
+    single_peak, _ = traced_peak(parse_and_check, single)
+    bulk_peak, _ = traced_peak(parse_and_check, bulk)
+    same = "" if single_errors == bulk_errors == 0 else "  (ERRORS)"
+    columns = tree.children[1].children[0].children[-1].columns
+    print(f"{count} rows, parse + check (with lexing)")
+    print(f"  one INSERT per row : {single_time:.3f}s, peak {single_peak / 2**20:.1f} MB")
+    print(f"  multi-row INSERT   : {bulk_time:.3f}s, peak {bulk_peak / 2**20:.1f} MB{same}")
+    print(f"  speedup            : {single_time / bulk_time:.1f}x")
+    print(f"  typed columns      : {', '.join(type(c).__name__ + ' ' + getattr(c, 'typecode', 'str') for c in columns)}")
+
+
+def legacy_lookup(symbol_table, table_name, column_name):
+    """column_exists + get_column_type as linear scans, as before the index."""
+    columns = symbol_table.tables[table_name]['columns']
+    for col_name, _ in columns:
+        if col_name == column_name:
+            for name, col_type in columns:
+                if name == column_name:
+                    return col_type
+    return None
+
+
+def lookup_all(lookup, symbol_table, names):
+    found = 0
+    for name in names:
+        if lookup(symbol_table, "Wide", name):
+            found += 1
+    return found
+
+
+def indexed_lookup(symbol_table, table_name, column_name):
+    return symbol_table.resolve_column(table_name, column_name)
+
+
+def bench_symbol_table(width=500, count=200000):
+    """Column lookups on a wide table: linear scans vs the column index."""
+    analyzer = SemanticAnalyzer()
+    columns = ", ".join(f"c{k} INT" for k in range(width))
+    for _ in compile_statements(f"CREATE TABLE Wide ({columns});", analyzer):
+        pass
+    symbol_table = analyzer.symbol_table
+    names = [f"c{k * 7919 % width}" for k in range(count)]
+
+    scan_time, scan_found = best_of(lookup_all, legacy_lookup, symbol_table, names, runs=1)
+    index_time, index_found = best_of(lookup_all, indexed_lookup, symbol_table, names)
+    same = "" if scan_found == index_found else "  (MISMATCH)"
+    print(f"{count} lookups in a {width}-column table")
+    print(f"  linear scans  : {scan_time:.3f}s")
+    print(f"  column index  : {index_time:.3f}s{same}  ({scan_time / index_time:.0f}x)")
+
+    where = " AND ".join(f"c{k * 37 % width} > {k}" for k in range(2000))
+    tokens, _ = tokenize(f"SELECT c0 FROM Wide WHERE {where};")
+    check_time, _ = best_of(check_where, Parser(tokens).parse_query(), analyzer)
+    print(f"  checking a 2000-comparison WHERE: {check_time * 1000:.1f} ms")
+
+
+def check_where(tree, analyzer):
+    for statement in tree.children:
+        analyzer.analyze_statement(statement)
+
+
+def analyze_tree(tree):
+    analyzer = SemanticAnalyzer(tree)
+    analyzer.analyze()
+    return analyzer.errors
+
+
+def bench_semantic(repeat=20000):
+    """Semantic analysis alone over the sample script, parsed once."""
+    tokens, _ = tokenize(load_sample(repeat))
+    tree = Parser(tokens).parse_query()
+    count = len(tree.children)
+    seconds, errors = best_of(analyze_tree, tree)
+    print(f"{count} statements, {len(errors)} semantic errors")
+    print(f"  analysis: {seconds:.3f}s ({count / seconds:,.0f} statements/s)")
+
+
+def analyze_with_jobs(tree, jobs, annotate):
+    analyzer = SemanticAnalyzer(tree)
+    analyze_parallel(analyzer, list(tree.children), jobs, annotate)
+    return analyzer.errors
+
+
+def bench_parallel_semantic(repeat=20000, job_counts=(1, 2, 4)):
+    """Semantic analysis: serial vs DDL pass + DML checked in worker processes."""
+    tokens, _ = tokenize(load_sample(repeat))
+    tree = Parser(tokens).parse_query()
+    count = len(tree.children)
+    serial_time, reference = best_of(analyze_tree, tree, runs=1)
+    print(f"{count} statements, {len(reference)} semantic errors, {os.cpu_count()} CPUs")
+    print(f"  serial   {serial_time:.2f}s")
+    for annotate in (False, True):
+        for jobs in job_counts:
+            elapsed, errors = best_of(analyze_with_jobs, tree, jobs, annotate, runs=1)
+            same = "" if errors == reference else "  (MISMATCH)"
+            label = "errors + annotations" if annotate else "errors only"
+            print(f"  jobs={jobs:<3} {label:<21} {elapsed:.2f}s  speedup {serial_time / elapsed:.2f}x{same}")
+
+
+def legacy_infer_type(value):
+    """Type of a literal from its lexeme (quotes, then float()/int()), as before typed tokens."""
+    if value.startswith("'") and value.endswith("'"):
+        return "TEXT"
+    try:
+        if '.' in value:
+            float(value)
+            return "FLOAT"
+        int(value)
+        return "INT"
+    except ValueError:
+        return "TEXT"
+
+
+def infer_all(infer, operands):
+    return [infer(operand) for operand in operands]
+
+
+def bench_literal_types(count=100000):
+    """Literal typing: re-deriving from lexemes vs the token kind and converted value."""
+    literals = ("42", "3.25", "'text'")
+    where = " AND ".join(f"c > {literals[k % 3]}" for k in range(count))
+    tokens, _ = tokenize(f"CREATE TABLE T (c INT); SELECT c FROM T WHERE {where};")
+    tree = Parser(tokens).parse_query()
+    analyzer = SemanticAnalyzer()
+    analyzer.analyze_statement(tree.children[0])
+    operands = []
+    stack = [tree.children[1]]
+    while stack:
+        node = stack.pop()
+        if node.kind in ("INTEGER", "FLOAT", "STRING"):
+            operands.append(node)
+        stack.extend(node.children)
+
+    legacy_time, legacy_types = best_of(infer_all, lambda node: legacy_infer_type(node.value), operands)
+    typed_time, typed_types = best_of(infer_all, analyzer._infer_type, operands)
+    same = "" if legacy_types == typed_types else "  (MISMATCH)"
+    print(f"{len(operands)} literal operands")
+    print(f"  from lexemes    : {legacy_time * 1000:.1f} ms")
+    print(f"  from token kind : {typed_time * 1000:.1f} ms{same}  ({legacy_time / typed_time:.1f}x)")
+    check_time, errors = best_of(analyzer.analyze_statement, tree.children[1])
+    print(f"  checking the {count}-comparison WHERE: {check_time * 1000:.1f} ms, {len(errors)} errors")
+
+
+def checked_statements(sql, analyzer):
+    """Parse and check sql; returns its Statement nodes (all must be clean)."""
+    tokens, _ = tokenize(sql)
+    statements = Parser(tokens).parse_query().children
+    for statement in statements:
+        errors = analyzer.analyze_statement(statement)
+        assert not errors, errors[0]
+    return statements
+
+
+def emp_inserts(rows, batch):
+    """Multi-row INSERTs of `rows` Emp rows, `batch` per statement."""
+    return "".join(
+        "INSERT INTO Emp VALUES " + ", ".join(
+            f"({k}, 'n{k % 997}', {30000 + k * 7919 % 90000}.50, {k % 20})" for k in range(start, start + batch)
+        ) + ";"
+        for start in range(0, rows, batch)
+    )
+
+
+def execute_all(executor, statements):
+    count = 0
+    for statement in statements:
+        count += executor.execute(statement).count
+    return count
+
+
+def bench_execute(rows=200000, batch=1000):
+    """Execution throughput over a columnar table, in rows per second."""
+    analyzer = SemanticAnalyzer()
+    executor = Executor(analyzer.symbol_table)
+    execute_all(executor, checked_statements(
+        "CREATE TABLE Emp (emp_id INT, name TEXT, salary FLOAT, dept INT);", analyzer))
+    inserts = emp_inserts(rows, batch)
+    load = checked_statements(inserts, analyzer)
+    load_time, _ = best_of(execute_all, executor, load, runs=1)
+    table = executor.tables["Emp"]
+    column_bytes, _ = traced_peak(lambda: [column[:] for column in table.columns])
+    dict_bytes, _ = traced_peak(lambda: [dict(zip(table.column_names, row)) for row in zip(*table.columns)])
+    print(f"{len(table)} rows, {len(table.columns)} columns")
+    print(f"  storage: {column_bytes / rows:.0f} bytes/row columnar, {dict_bytes / rows:.0f} bytes/row as row dicts")
+    print(f"  INSERT (multi-row, {batch}/stmt) : {rows / load_time:12,.0f} rows/s")
+
+    queries = [
+        ("SELECT one column, no WHERE", "SELECT salary FROM Emp;"),
+        ("SELECT, one comparison", "SELECT name FROM Emp WHERE salary > 55000.00;"),
+        ("SELECT, AND/OR/NOT", "SELECT emp_id, name FROM Emp WHERE salary > 55000.00 AND (dept = 3 OR NOT dept < 10);"),
+        ("UPDATE, one comparison", "UPDATE Emp SET dept = 7 WHERE salary < 40000.00;"),
+    ]
+    for label, sql in queries:
+        statements = checked_statements(sql, analyzer)
+        elapsed, matched = best_of(execute_all, executor, statements)
+        print(f"  {label:<31}: {len(table) / elapsed:12,.0f} rows/s scanned ({matched} matched)")
+
+    statements = checked_statements("DELETE FROM Emp WHERE dept = 7;", analyzer)
+    elapsed, deleted = best_of(execute_all, executor, statements, runs=1)
+    print(f"  {'DELETE, one comparison':<31}: {rows / elapsed:12,.0f} rows/s scanned ({deleted} deleted)")
+
+
+def bench_vector_where(rows=1000000, batch=5000):
+    """WHERE evaluated with NumPy masks per batch vs selection vectors."""
+    if numpy is None:
+        print("NumPy is not installed; WHERE uses selection vectors only")
+        return
+    analyzer = SemanticAnalyzer()
+    statements = checked_statements(
+        "CREATE TABLE Emp (emp_id INT, name TEXT, salary FLOAT, dept INT);" + emp_inserts(rows, batch), analyzer)
+    masks = Executor(analyzer.symbol_table)
+    vectors = Executor(analyzer.symbol_table, vectorized=False)
+    execute_all(masks, statements)
+    execute_all(vectors, statements)
+
+    queries = [
+        ("one comparison", "SELECT emp_id FROM Emp WHERE salary > 55000.00;"),
+        ("AND/OR/NOT", "SELECT emp_id FROM Emp WHERE salary > 55000.00 AND (dept = 3 OR NOT dept < 10);"),
+        ("column vs column", "SELECT emp_id FROM Emp WHERE dept < emp_id AND salary >= 30000;"),
+        ("TEXT (row by row)", "SELECT emp_id FROM Emp WHERE name = 'n42' OR dept = 1;"),
+    ]
+    print(f"{rows} rows, batches of {BATCH_ROWS} row slots")
+    for label, sql in queries:
+        statements = checked_statements(sql, analyzer)
+        vector_time, vector_count = best_of(execute_all, vectors, statements)
+        mask_time, mask_count = best_of(execute_all, masks, statements)
+        same = "" if mask_count == vector_count else "  (MISMATCH)"
+        print(f"  {label:<18}: selection vectors {rows / vector_time:12,.0f} rows/s, "
+              f"masks {rows / mask_time:12,.0f} rows/s  ({vector_time / mask_time:.1f}x){same}")
+
+    table = masks.tables["Emp"]
+    where = statements[0].children[0].children[-1]
+    peak, _ = traced_peak(masks._select, table, where.children[1])
+    print(f"  peak memory of one mask evaluation: {peak / 1024:.0f} KB, selected row ids included")
+
+
+def walk_condition(node, table, i):
+    """Naive interpreter: evaluate a condition for row i by walking its tree."""
+    name = node.name
+    if name == "Comparison":
+        left, op_node, right = node.children
+        return COMPARISONS[op_node.value](walk_operand(left, table, i), walk_operand(right, table, i))
+    if name == "Term":
+        return all(walk_condition(child, table, i) for child in node.children)
+    if name == "Condition":
+        return any(walk_condition(child, table, i) for child in node.children)
+    return not walk_condition(node.children[0], table, i)
+
+
+def walk_operand(node, table, i):
+    if node.kind == "IDENTIFIER":
+        ordinal = table.ordinals.get(node.value)
+        return node.value if ordinal is None else table.columns[ordinal][i]
+    return node.literal
+
+
+def walk_where(table, where):
+    return [i for i in table.row_ids() if walk_condition(where.children[1], table, i)]
+
+
+def bench_compiled_where(rows=200000, batch=5000):
+    """WHERE compiled to Python functions vs walking the tree for every row."""
+    analyzer = SemanticAnalyzer()
+    statements = checked_statements(
+        "CREATE TABLE Emp (emp_id INT, name TEXT, salary FLOAT, dept INT);" + emp_inserts(rows, batch), analyzer)
+    executor = Executor(analyzer.symbol_table, vectorized=False)
+    execute_all(executor, statements)
+    table = executor.tables["Emp"]
+
+    queries = [
+        ("one comparison", "DELETE FROM Emp WHERE salary > 55000.00;"),
+        ("AND/OR/NOT", "DELETE FROM Emp WHERE salary > 55000.00 AND (dept = 3 OR NOT dept < 10);"),
+        ("column vs column", "DELETE FROM Emp WHERE dept < emp_id AND salary >= 30000;"),
+        ("TEXT", "DELETE FROM Emp WHERE name = 'n42' OR dept = 1;"),
+    ]
+    print(f"{rows} rows")
+    for label, sql in queries:
+        where = checked_statements(sql, analyzer)[0].children[0].children[-1]
+        walk_time, walked = best_of(walk_where, table, where)
+        compiled_time, selected = best_of(executor._matching, table, where.children[1], table.row_ids())
+        same = "" if walked == selected else "  (MISMATCH)"
+        print(f"  {label:<17}: tree walk {rows / walk_time:12,.0f} rows/s, "
+              f"compiled {rows / compiled_time:12,.0f} rows/s  ({walk_time / compiled_time:.1f}x){same}")
+
+    # the same shape with other literals is a cache hit: no new compile()
+    count = 200
+    wheres = [checked_statements(f"DELETE FROM Emp WHERE salary > {k}.5 AND (dept = {k % 20} OR NOT name = 'n{k}');",
+                                 analyzer)[0].children[0].children[-1] for k in range(count)]
+    cold_time, _ = best_of(lambda: [PredicateCache().lookup(
+        "Emp", where.children[1], analyzer.symbol_table) for where in wheres], runs=1)
+    warm_time, _ = best_of(lambda: [executor.predicates.lookup(
+        "Emp", where.children[1], analyzer.symbol_table) for where in wheres])
+    print(f"  compile per condition: {cold_time / count * 1e6:.0f} us, "
+          f"cache hit: {warm_time / count * 1e6:.1f} us  ({executor.predicates.stats()})")
+
+
+def bench_hash_index(rows=200000, batch=5000, lookups=200):
+    """Point lookups through a hash index vs a full scan, per statement."""
+    inserts = emp_inserts(rows, batch)
+    executors = []
+    for ddl in ("", "CREATE INDEX emp_pk ON Emp (emp_id); CREATE INDEX emp_dept ON Emp (dept);"):
+        analyzer = SemanticAnalyzer()
+        executor = Executor(analyzer.symbol_table)
+        statements = checked_statements(
+            "CREATE TABLE Emp (emp_id INT, name TEXT, salary FLOAT, dept INT);" + ddl + inserts, analyzer)
+        load_time, _ = best_of(execute_all, executor, statements, runs=1)
+        executors.append((analyzer, executor, load_time))
+    print(f"{rows} rows, {lookups} statements per query; indexes on emp_id and dept")
+    print(f"  load: {rows / executors[0][2]:12,.0f} rows/s without indexes, "
+          f"{rows / executors[1][2]:12,.0f} rows/s maintaining two")
+
+    step = rows // lookups
+    queries = [
+        ("SELECT emp_id = k", lambda k: f"SELECT name, salary FROM Emp WHERE emp_id = {k};"),
+        ("SELECT IN-style OR", lambda k: f"SELECT name FROM Emp WHERE emp_id = {k} OR emp_id = {k + 1} OR emp_id = {k + 2};"),
+        ("SELECT = k AND ...", lambda k: f"SELECT name FROM Emp WHERE salary > 40000.0 AND emp_id = {k};"),
+        ("UPDATE emp_id = k", lambda k: f"UPDATE Emp SET dept = {k % 20} WHERE emp_id = {k};"),
+        ("DELETE emp_id = k", lambda k: f"DELETE FROM Emp WHERE emp_id = {k};"),
+    ]
+    for label, make in queries:
+        sql = "".join(make(k) for k in range(0, rows, step))
+        times = []
+        counts = []
+        for analyzer, executor, _ in executors:
+            statements = checked_statements(sql, analyzer)
+            elapsed, count = best_of(execute_all, executor, statements, runs=1)
+            times.append(elapsed)
+            counts.append(count)
+        same = "" if counts[0] == counts[1] else "  (MISMATCH)"
+        print(f"  {label:<19}: scan {times[0] / lookups * 1e6:9.0f} us, "
+              f"index {times[1] / lookups * 1e6:7.1f} us per statement  ({times[0] / times[1]:.0f}x){same}")
+
+
+def bench_ordered_index(rows=200000, batch=5000, queries=20):
+    """Range scans and ORDER BY through an ordered index vs a scan and sort."""
+    inserts = emp_inserts(rows, batch)
+    executors = []
+    for ddl in ("", "CREATE INDEX emp_salary ON Emp (salary) USING BTREE;"):
+        analyzer = SemanticAnalyzer()
+        executor = Executor(analyzer.symbol_table)
+        statements = checked_statements(
+            "CREATE TABLE Emp (emp_id INT, name TEXT, salary FLOAT, dept INT);" + ddl + inserts, analyzer)
+        load_time, _ = best_of(execute_all, executor, statements, runs=1)
+        executors.append((analyzer, executor, load_time))
+    print(f"{rows} rows, {queries} statements per query; ordered index on salary")
+    print(f"  load: {rows / executors[0][2]:12,.0f} rows/s without the index, "
+          f"{rows / executors[1][2]:12,.0f} rows/s maintaining it")
+
+    step = 90000 // queries
+    tests = [
+        ("range ~0.1%", lambda k: f"SELECT name FROM Emp WHERE salary >= {30000 + k}.0 AND salary < {30090 + k}.0;"),
+        ("range ~10%", lambda k: f"SELECT name FROM Emp WHERE salary > {30000 + k}.0 AND salary <= {39000 + k}.0;"),
+        ("range + ORDER BY", lambda k: f"SELECT name FROM Emp WHERE salary > {110000 - k}.0 ORDER BY salary;"),
+        ("... DESC", lambda k: f"SELECT name FROM Emp WHERE salary > {110000 - k}.0 ORDER BY salary DESC;"),
+        ("ORDER BY (all)", lambda k: f"SELECT emp_id FROM Emp ORDER BY salary;"),
+        ("filter + ORDER BY", lambda k: f"SELECT emp_id FROM Emp WHERE dept = {k % 20} ORDER BY salary;"),
+        ("UPDATE salary", lambda k: f"UPDATE Emp SET salary = {30000 + k}.25 WHERE emp_id = {k};"),
+    ]
+    for label, make in tests:
+        sql = "".join(make(k) for k in range(0, 90000, step))
+        times = []
+        counts = []
+        for analyzer, executor, _ in executors:
+            statements = checked_statements(sql, analyzer)
+            elapsed, count = best_of(execute_all, executor, statements, runs=1)
+            times.append(elapsed)
+            counts.append(count)
+        same = "" if counts[0] == counts[1] else "  (MISMATCH)"
+        print(f"  {label:<17}: scan {times[0] / queries * 1e3:8.2f} ms, "
+              f"index {times[1] / queries * 1e3:8.2f} ms per statement  ({times[0] / times[1]:.1f}x){same}")
+
+
+def bench_planner(rows=200000, batch=5000, queries=20):
+    """Planned statements vs the same WHERE run as written (first index, clauses in order)."""
+    analyzer = SemanticAnalyzer()
+    executor = Executor(analyzer.symbol_table, vectorized=False)
+    execute_all(executor, checked_statements(
+        "CREATE TABLE Emp (emp_id INT, name TEXT, salary FLOAT, dept INT);"
+        "CREATE INDEX emp_dept ON Emp (dept); CREATE INDEX emp_salary ON Emp (salary) USING BTREE;"
+        + emp_inserts(rows, batch), analyzer))
+    table = executor.tables["Emp"]
+    dept_index = table.index_on(table.ordinals["dept"])
+    planner = executor.planner
+    print(f"{rows} rows, {queries} statements per query; hash index on dept, ordered index on salary")
+
+    tests = [
+        ("clause order", False,
+         lambda k: f"SELECT emp_id FROM Emp WHERE dept < 19 AND salary > {31000 + k}.0 AND name = 'n{k % 997}';"),
+        ("index choice", True,
+         lambda k: f"SELECT emp_id FROM Emp WHERE dept = {k % 20} AND salary < {30400 + k}.0;"),
+    ]
+    for label, indexed, make in tests:
+        statements = checked_statements("".join(make(k) for k in range(queries)), analyzer)
+        written = []
+        for statement in statements:
+            clauses = planner.clauses(table, statement.children[0].children[-1].children[1])
+            if indexed:
+                value = clauses[0].atoms[0][2]
+                scan = IndexScan(table, [(dept_index, (value, True, value, True))], clauses[:1], 0, 0, set())
+                clauses = clauses[1:]
+            else:
+                scan = SeqScan(table, 0, set())
+            written.append(Filter(table, scan, clauses, 0))
+        written_time, written_rows = best_of(lambda: [len(executor._rows(plan)) for plan in written])
+        planned_time, planned_rows = best_of(lambda: [executor.execute(statement).count for statement in statements])
+        same = "" if written_rows == planned_rows else "  (MISMATCH)"
+        print(f"  {label:<13}: as written {written_time / queries * 1e3:7.2f} ms, "
+              f"planned {planned_time / queries * 1e3:7.2f} ms per statement  "
+              f"({written_time / planned_time:.1f}x){same}")
+        print("    " + "\n    ".join(planner.plan(table, statements[0].children[0]).explain()))
+
+    statements = checked_statements("".join(
+        f"SELECT name FROM Emp WHERE emp_id = {k} OR (dept = 3 AND NOT salary >= {40000 + k}.0);"
+        for k in range(200)), analyzer)
+    plan_time, _ = best_of(lambda: [planner.plan(table, statement.children[0]) for statement in statements])
+    print(f"  planning      : {plan_time / len(statements) * 1e6:.1f} us per statement")
+
+
+def check_with_catalog(path, dml):
+    catalog = Catalog(path)
+    analyzer = SemanticAnalyzer(catalog=catalog)
+    errors = run_checks(dml, analyzer)
+    catalog.close()
+    return errors, len(analyzer.symbol_table.tables)
+
+
+def check_after_ddl(ddl, dml):
+    analyzer = SemanticAnalyzer()
+    run_checks(ddl, analyzer)
+    return run_checks(dml, analyzer), len(analyzer.symbol_table.tables)
+
+
+def run_checks(text, analyzer):
+    errors = 0
+    for result in compile_statements(text, analyzer):
+        errors += len(result.errors)
+    return errors
+
+
+def bench_catalog(tables=20000, touched=10):
+    """Checking DML against a saved catalog vs replaying all the DDL first."""
+    ddl = "".join(f"CREATE TABLE T{k} (id INT, name TEXT, score FLOAT);\n" for k in range(tables))
+    dml = "".join(f"INSERT INTO T{k * 7919 % tables} VALUES (1, 'x', 2.5);\n" for k in range(touched))
+
+    analyzer = SemanticAnalyzer()
+    run_checks(ddl, analyzer)
+    path = os.path.join(tempfile.mkdtemp(), "schema.cat")
+    save_time, _ = best_of(save_catalog, path, analyzer.symbol_table, runs=1)
+
+    replay_time, (replay_errors, _) = best_of(check_after_ddl, ddl, dml, runs=1)
+    catalog_time, (catalog_errors, loaded) = best_of(check_with_catalog, path, dml)
+    same = "" if replay_errors == catalog_errors == 0 else "  (ERRORS)"
+    print(f"{tables} tables, DML touching {touched} of them")
+    print(f"  catalog file      : {os.path.getsize(path) / 1024:.0f} KB, saved in {save_time * 1000:.1f} ms")
+    print(f"  replay DDL + DML  : {replay_time * 1000:.1f} ms")
+    print(f"  catalog + DML     : {catalog_time * 1000:.2f} ms{same}  ({loaded} tables loaded)")
+    os.remove(path)
+
+
+BENCHMARKS = {
+    "lexer": bench_lexer,
+    "stream_memory": bench_stream_memory,
+    "token_memory": bench_token_memory,
+    "incremental": bench_incremental,
+    "incremental_semantic": bench_incremental_semantic,
+    "parallel": bench_parallel,
+    "pipeline": bench_pipeline,
+    "tree_memory": bench_tree_memory,
+    "syntax_errors": bench_syntax_errors,
+    "deep_conditions": bench_deep_conditions,
+    "output": bench_output,
+    "statement_cache": bench_statement_cache,
+    "prepared": bench_prepared,
+    "bulk_insert": bench_bulk_insert,
+    "symbol_table": bench_symbol_table,
+    "semantic": bench_semantic,
+    "literal_types": bench_literal_types,
+    "parallel_semantic": bench_parallel_semantic,
+    "catalog": bench_catalog,
+    "execute": bench_execute,
+    "vector_where": bench_vector_where,
+    "compiled_where": bench_compiled_where,
+    "hash_index": bench_hash_index,
+    "ordered_index": bench_ordered_index,
+    "planner": bench_planner,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            continue
+        print(f"\n== {name} ==")
+        BENCHMARKS[name]()
@@ -0,0 +1,162 @@
+# catalog.py
+# Persistent schema catalog: the symbol table's tables saved to a compact
+# binary file, so DML scripts can be checked without replaying their DDL.
+#
+# Layout (little-endian):
+#   header     magic, format version, table count, directory CRC, header CRC
+#   directory  one fixed-size entry per table, sorted by name:
+#              name offset/length, record offset/length, record CRC
+#   names      UTF-8 table names
+#   records    per table: line, col, column count, then per column a type
+#              code and a length-prefixed UTF-8 name
+#
+# Opening maps the file and checks the header and directory; a table's
+# record is only read (and its CRC checked) when the table is looked up, by
+# binary search over the directory. Loading a script's schema therefore
+# costs O(tables touched), not O(tables in the catalog).
+
+import mmap
+import os
+import struct
+import zlib
+
+MAGIC = b"MSQLCAT\x00"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sHHIII")      # magic, version, reserved, count, directory crc, header crc
+ENTRY = struct.Struct("<QHQII")         # name offset, name length, record offset, record length, record crc
+RECORD = struct.Struct("<IIH")          # line, col, column count
+COLUMN = struct.Struct("<BH")           # type code, name length
+
+TYPE_CODES = {"INT": 1, "FLOAT": 2, "TEXT": 3}
+CODE_TYPES = {code: name for name, code in TYPE_CODES.items()}
+
+
+class CatalogError(Exception):
+    """A catalog file that is missing parts, corrupt or of another version."""
+
+
+class Catalog:
+    """Read-only view of a catalog file, memory-mapped."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise CatalogError(f"'{path}' is empty")
+        data = self.data
+
+        if len(data) < HEADER.size:
+            raise CatalogError(f"'{path}' is too short to be a catalog")
+        magic, version, _, count, directory_crc, header_crc = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise CatalogError(f"'{path}' is not a catalog file")
+        if version != FORMAT_VERSION:
+            raise CatalogError(f"'{path}' has format version {version}, expected {FORMAT_VERSION}")
+        if zlib.crc32(data[:HEADER.size - 4]) != header_crc:
+            raise CatalogError(f"'{path}' has a corrupt header")
+
+        self.count = count
+        self.directory = HEADER.size
+        end = self.directory + count * ENTRY.size
+        if end > len(data) or zlib.crc32(memoryview(data)[self.directory:end]) != directory_crc:
+            raise CatalogError(f"'{path}' has a corrupt table directory")
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.data.close()
+
+    def _entry(self, k):
+        return ENTRY.unpack_from(self.data, self.directory + k * ENTRY.size)
+
+    def _name(self, entry):
+        return self.data[entry[0]:entry[0] + entry[1]]
+
+    def names(self):
+        """Table names in catalog (sorted) order."""
+        return [self._name(self._entry(k)).decode('utf-8') for k in range(self.count)]
+
+    def find(self, table_name):
+        """Directory entry for table_name, or None."""
+        key = table_name.encode('utf-8')
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = self._entry(mid)
+            name = self._name(entry)
+            if name < key:
+                lo = mid + 1
+            elif name > key:
+                hi = mid
+            else:
+                return entry
+        return None
+
+    def load_table(self, table_name):
+        """(columns, line, col) for a table, or None if it is not in the catalog."""
+        entry = self.find(table_name)
+        if entry is None:
+            return None
+        _, _, offset, length, crc = entry
+        record = memoryview(self.data)[offset:offset + length]
+        if len(record) != length or zlib.crc32(record) != crc:
+            raise CatalogError(f"'{self.path}' has a corrupt record for table '{table_name}'")
+
+        line, col, column_count = RECORD.unpack_from(record, 0)
+        pos = RECORD.size
+        columns = []
+        for _ in range(column_count):
+            code, name_length = COLUMN.unpack_from(record, pos)
+            pos += COLUMN.size
+            columns.append((bytes(record[pos:pos + name_length]).decode('utf-8'), CODE_TYPES[code]))
+            pos += name_length
+        return columns, line, col
+
+
+def encode_catalog(tables):
+    """Catalog file contents for a {table_name: {'columns', 'line', 'col'}} mapping."""
+    names = sorted(tables, key=lambda name: name.encode('utf-8'))
+    encoded_names = [name.encode('utf-8') for name in names]
+
+    records = []
+    for name in names:
+        info = tables[name]
+        parts = [RECORD.pack(info['line'], info['col'], len(info['columns']))]
+        for col_name, col_type in info['columns']:
+            col_bytes = col_name.encode('utf-8')
+            parts.append(COLUMN.pack(TYPE_CODES[col_type], len(col_bytes)))
+            parts.append(col_bytes)
+        records.append(b"".join(parts))
+
+    name_offset = HEADER.size + len(names) * ENTRY.size
+    record_offset = name_offset + sum(len(name) for name in encoded_names)
+    directory = []
+    for name, record in zip(encoded_names, records):
+        directory.append(ENTRY.pack(name_offset, len(name), record_offset, len(record), zlib.crc32(record)))
+        name_offset += len(name)
+        record_offset += len(record)
+    directory = b"".join(directory)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(names), zlib.crc32(directory), 0)
+    header = header[:-4] + struct.pack("<I", zlib.crc32(header[:-4]))
+    return b"".join([header, directory] + encoded_names + records)
+
+
+def save_catalog(path, symbol_table):
+    """
+    Write every table of symbol_table (including tables still only in its
+    attached catalog) to path. The file is replaced atomically.
+    """
+    symbol_table.load_catalog()
+    data = encode_catalog(symbol_table.tables)
+    symbol_table.close_catalog()
+
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return len(symbol_table.tables)
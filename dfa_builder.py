@@ -0,0 +1,191 @@
+# dfa_builder.py
+# Builds the single scanner automaton used by the lexer.
+#
+# The token DFAs in dfa_definitions.py are merged into one product automaton,
+# minimized with Hopcroft's algorithm and flattened into an array-indexed
+# transition table keyed by character code, so the lexer can recognise any
+# token in a single left-to-right pass.
+
+from array import array
+
+from dfa_definitions import (
+    identifier_dfa, identifier_accept, number_dfa, number_accept,
+    operator_dfa, operator_accept, string_dfa, string_accept
+)
+
+# Only 7-bit characters can appear in a token; anything above is a dead end.
+ALPHABET_SIZE = 128
+
+# Component DFAs in accept priority order (first accepting component wins)
+SCANNER_COMPONENTS = [
+    (identifier_dfa, identifier_accept),
+    (number_dfa, number_accept),
+    (operator_dfa, operator_accept),
+    (string_dfa, string_accept),
+]
+
+
+def build_product_dfa(components):
+    """
+    Run all component DFAs in lockstep and return the reachable product.
+    Returns (transitions, accept) where transitions[s] maps a character code
+    to the next state and accept[s] is the token type of state s (or None).
+    State 0 is the start state; missing transitions lead to the dead state.
+    """
+    start = tuple(0 for _ in components)
+    index = {start: 0}
+    order = [start]
+    transitions = []
+    accept = []
+
+    k = 0
+    while k < len(order):
+        current = order[k]
+        k += 1
+
+        label = None
+        for (dfa, accepting), state in zip(components, current):
+            if state is not None and state in accepting:
+                label = accepting[state]
+                break
+        accept.append(label)
+
+        row = {}
+        for code in range(ALPHABET_SIZE):
+            ch = chr(code)
+            target = tuple(
+                dfa.get(state, {}).get(ch) if state is not None else None
+                for (dfa, _), state in zip(components, current)
+            )
+            if all(s is None for s in target):
+                continue
+            if target not in index:
+                index[target] = len(order)
+                order.append(target)
+            row[code] = index[target]
+        transitions.append(row)
+
+    return transitions, accept
+
+
+def minimize_dfa(transitions, accept):
+    """
+    Hopcroft minimization of a DFA produced by build_product_dfa.
+    The start state stays state 0 and the dead state is dropped again,
+    so the result has the same shape as the input.
+    """
+    n = len(transitions)
+    dead = n  # explicit sink so the automaton is complete
+
+    def step(state, code):
+        if state == dead:
+            return dead
+        return transitions[state].get(code, dead)
+
+    # Inverse transitions: inverse[code][target] -> set of sources
+    inverse = [{} for _ in range(ALPHABET_SIZE)]
+    for state in range(n + 1):
+        for code in range(ALPHABET_SIZE):
+            inverse[code].setdefault(step(state, code), set()).add(state)
+
+    # Initial partition: one block per accept label, plus non-accepting states
+    groups = {}
+    for state in range(n):
+        groups.setdefault(accept[state], set()).add(state)
+    groups.setdefault(None, set()).add(dead)
+    partition = [block for block in groups.values() if block]
+    worklist = [block for block in partition]
+
+    while worklist:
+        splitter = worklist.pop()
+        for code in range(ALPHABET_SIZE):
+            sources = set()
+            for target in splitter:
+                sources |= inverse[code].get(target, set())
+            if not sources:
+                continue
+
+            refined = []
+            for block in partition:
+                inside = block & sources
+                outside = block - sources
+                if inside and outside:
+                    refined.append(inside)
+                    refined.append(outside)
+                    if block in worklist:
+                        worklist.remove(block)
+                        worklist.append(inside)
+                        worklist.append(outside)
+                    else:
+                        worklist.append(inside if len(inside) <= len(outside) else outside)
+                else:
+                    refined.append(block)
+            partition = refined
+
+    # Renumber blocks: start block first, dead block removed
+    block_of = {}
+    for number, block in enumerate(partition):
+        for state in block:
+            block_of[state] = number
+
+    dead_block = block_of[dead]
+    numbering = {block_of[0]: 0}
+    queue = [0]
+    k = 0
+    while k < len(queue):
+        state = queue[k]
+        k += 1
+        for code in sorted(transitions[state]):
+            target_block = block_of[transitions[state][code]]
+            if target_block != dead_block and target_block not in numbering:
+                numbering[target_block] = len(numbering)
+                queue.append(transitions[state][code])
+
+    representative = {}
+    for state in range(n):
+        block = block_of[state]
+        if block in numbering and numbering[block] not in representative:
+            representative[numbering[block]] = state
+
+    min_transitions = []
+    min_accept = []
+    for number in range(len(numbering)):
+        state = representative[number]
+        row = {}
+        for code, target in transitions[state].items():
+            target_block = block_of[target]
+            if target_block != dead_block:
+                row[code] = numbering[target_block]
+        min_transitions.append(row)
+        min_accept.append(accept[state])
+
+    return min_transitions, min_accept
+
+
+def flatten_dfa(transitions, accept):
+    """
+    Flatten a DFA into a single array('i') transition table.
+    Each state owns a row of ALPHABET_SIZE entries, and entries store the
+    row offset of the next state (state * ALPHABET_SIZE), or -1 for the dead
+    state, so the runner can step with a single index: table[state + code].
+    The accept list is indexed by the same row offsets.
+    """
+    table = array('i', [-1]) * (len(transitions) * ALPHABET_SIZE)
+    flat_accept = [None] * len(table)
+    for state, row in enumerate(transitions):
+        base = state * ALPHABET_SIZE
+        flat_accept[base] = accept[state]
+        for code, target in row.items():
+            table[base + code] = target * ALPHABET_SIZE
+    return table, flat_accept
+
+
+def build_scanner_dfa(components=SCANNER_COMPONENTS):
+    """Product + minimize + flatten in one step."""
+    transitions, accept = build_product_dfa(components)
+    transitions, accept = minimize_dfa(transitions, accept)
+    return flatten_dfa(transitions, accept)
+
+
+# Built once at import time; the tables are tiny (a few KB).
+scanner_table, scanner_accept = build_scanner_dfa()
@@ -26,9 +26,10 @@ def classify_char(ch):
 # keywords
 keywords = {
     "SELECT", "FROM", "WHERE", "INSERT", "INTO", "VALUES",
-    "UPDATE", "SET", "DELETE", "CREATE", "TABLE",
+    "UPDATE", "SET", "DELETE", "CREATE", "TABLE", "INDEX",
     "INT", "FLOAT", "TEXT", "AND", "OR", "NOT",
-    "AS", "JOIN", "ON", "GROUP", "BY", "ORDER", "DESC", "ASC"
+    "AS", "JOIN", "ON", "GROUP", "BY", "ORDER", "DESC", "ASC", "USING",
+    "EXPLAIN"
 }
 
 # Identifier DFA
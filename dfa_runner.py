@@ -22,4 +22,33 @@ def run_dfa(dfa, accepting, text, start_index):
 
     if state in accepting:
         return lexeme, accepting[state], i
-    return None, None, start_index + 1
\ No newline at end of file
+    return None, None, start_index + 1
+
+def run_table_dfa(table, accept, text, start_index):
+    """
+    Longest-match run of a flattened DFA (see dfa_builder.flatten_dfa).
+    Returns (label, end_index, stop_index): the accept label and end of the
+    longest accepted prefix (None, start_index if nothing is accepted) and
+    the index where the DFA stopped. stop_index == len(text) means the match
+    could continue if more input were available.
+    """
+    state = 0
+    i = start_index
+    n = len(text)
+    last_type = None
+    last_end = start_index
+
+    while i < n:
+        code = ord(text[i])
+        if code >= 128:
+            break
+        state = table[state + code]
+        if state < 0:
+            break
+        i += 1
+        token_type = accept[state]
+        if token_type:
+            last_type = token_type
+            last_end = i
+
+    return last_type, last_end, i
@@ -0,0 +1,904 @@
+# executor.py
+# Phase 04: in-memory execution of checked statements.
+#
+# Tables are stored column by column in typed storage: array('q') for INT,
+# array('d') for FLOAT and a list of str for TEXT. A row is an index into
+# every column of its table. DELETE only marks rows dead in a bytearray, so
+# row ids stay stable; a table's columns are compacted once half of its
+# rows are dead.
+#
+# CREATE INDEX gives a table a hash index on a column (value -> row ids),
+# or with USING BTREE an ordered index ((value, row id) pairs in sorted
+# chunks). Both are kept up to date by INSERT and UPDATE; deleted rows stay
+# in them until the table is compacted and are skipped by lookups.
+#
+# SELECT, UPDATE and DELETE are planned (planner.py) into a chain of
+# operators, which the executor runs bottom-up as lists of row ids: a scan
+# or index scan, then Filter and Sort; Project gathers the selected
+# columns at the final row ids. EXPLAIN returns the plan instead.
+#
+# WHERE clauses are compiled (predicates.py) into a Python function that
+# filters row ids with the whole condition inlined, reading only the
+# columns it names; compiled predicates are cached by the condition's
+# literal-free fingerprint. SELECT then reads only its projected columns,
+# at the selected rows.
+#
+# With NumPy installed, WHERE clauses are instead evaluated as boolean
+# masks over fixed-size batches of row slots: a Comparison of numeric
+# columns and literals is one vectorized comparison on a zero-copy view of
+# the column's array, AND/OR/NOT combine masks with & | ~, and the dead
+# rows are masked out before the batch's row ids are collected. Only the
+# current batch's masks are alive at a time. TEXT columns (and numeric
+# comparisons NumPy could not do exactly) are compared row by row within
+# the batch. Without NumPy the compiled predicates are used (or, for a
+# condition too deeply nested to compile, a selection-vector interpreter).
+#
+# The executor trusts the semantic analyzer: it should only be given
+# statements that were checked without errors. It does not need their
+# annotations, only the converted literal values on the nodes.
+
+import math
+import operator
+from array import array
+from bisect import bisect_left, insort
+from itertools import chain, compress, count, islice, repeat
+
+from planner import EmptyResult, Filter, IndexScan, PlanError, Planner, SeqScan, Sort
+from predicates import COMPARISONS, MIRRORED, PredicateCache, PredicateError
+
+try:
+    import numpy
+except ImportError:  # optional: WHERE falls back to selection vectors
+    numpy = None
+
+COLUMN_TYPECODES = {"INT": 'q', "FLOAT": 'd'}  # TEXT columns are lists of str
+
+INT_MIN = -(1 << 63)
+INT_MAX = (1 << 63) - 1
+
+# Largest number of (value, row id) pairs in one chunk of an OrderedIndex
+CHUNK_SIZE = 1024
+
+# Row id sentinels around every real row id, for bisecting (value, row id) pairs
+BEFORE_ROWS = -1
+AFTER_ROWS = float("inf")
+
+# Row slots per batch when WHERE masks are evaluated with NumPy
+BATCH_ROWS = 65536
+
+# Compact a table once this share of its rows is dead (and it is not tiny)
+COMPACT_RATIO = 0.5
+COMPACT_MIN_ROWS = 1024
+
+
+class ExecutionError(Exception):
+    """A checked statement that cannot be run, e.g. an unbound parameter."""
+
+    def __init__(self, message, node=None):
+        Exception.__init__(self, message)
+        self.line = node.line if node is not None else 0
+        self.col = node.col if node is not None else 0
+
+
+def new_column(data_type):
+    """Empty storage for a column of the given type."""
+    typecode = COLUMN_TYPECODES.get(data_type)
+    return array(typecode) if typecode else []
+
+
+def coerce(value, data_type, node=None):
+    """A literal value as stored in a column of data_type (FLOAT into INT is rounded)."""
+    if data_type == "INT":
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                raise ExecutionError(f"Value {value} is out of range for an INT column", node)
+            value = round(value)
+        if not INT_MIN <= value <= INT_MAX:
+            raise ExecutionError(f"Value {value} is out of range for an INT column", node)
+        return value
+    if data_type == "FLOAT":
+        try:
+            return float(value)
+        except OverflowError:
+            raise ExecutionError(f"Value {value} is out of range for a FLOAT column", node)
+    return value
+
+
+class HashIndex:
+    """
+    Hash index on one column: value -> ids of the rows holding it. Rows
+    that were deleted stay in their bucket until the table is compacted.
+    """
+
+    def __init__(self, name, ordinal):
+        self.name = name
+        self.ordinal = ordinal
+        self.buckets = {}
+
+    def add(self, values, start):
+        """Index values as those of rows start, start + 1, ..."""
+        buckets = self.buckets
+        for i, value in enumerate(values, start):
+            bucket = buckets.get(value)
+            if bucket is None:
+                buckets[value] = [i]
+            else:
+                bucket.append(i)
+
+    def move(self, column, rows, value):
+        """File rows under value; column still holds their old values."""
+        moved = {}  # old value -> rows leaving its bucket
+        for i in rows:
+            old = column[i]
+            if old != value:
+                moved.setdefault(old, []).append(i)
+        buckets = self.buckets
+        for old, ids in moved.items():
+            gone = set(ids)
+            bucket = [i for i in buckets[old] if i not in gone]
+            if bucket:
+                buckets[old] = bucket
+            else:
+                del buckets[old]
+        if moved:
+            bucket = buckets.setdefault(value, [])
+            for ids in moved.values():
+                bucket.extend(ids)
+
+    def lookup(self, values):
+        """Ids of the rows (dead ones included) holding one of values."""
+        buckets = self.buckets
+        found = []
+        for value in dict.fromkeys(values):
+            bucket = buckets.get(value)
+            if bucket:
+                found.extend(bucket)
+        return found
+
+    def rebuild(self, column):
+        """Index a whole (just compacted) column again."""
+        self.buckets = {}
+        self.add(column, 0)
+
+
+class OrderedIndex:
+    """
+    Ordered index on one column: (value, row id) pairs in ascending order,
+    held in sorted chunks of at most CHUNK_SIZE pairs. A pair is found by
+    bisecting the chunks' last pairs and then one chunk, so inserting or
+    removing one costs O(log n) plus a shift within a chunk; a chunk that
+    grows too large is split in two. Rows that were deleted stay in until
+    the table is compacted.
+    """
+
+    def __init__(self, name, ordinal):
+        self.name = name
+        self.ordinal = ordinal
+        self.chunks = []  # sorted lists of (value, row id)
+        self.maxes = []   # last pair of each chunk
+
+    def add(self, values, start):
+        """Index values as those of rows start, start + 1, ..."""
+        pairs = sorted(zip(values, count(start)))
+        size = sum(map(len, self.chunks))
+        if len(pairs) * 8 < size:
+            for pair in pairs:
+                self.insert(pair)
+            return
+        # a large batch: merge it in (sorting two sorted runs is one merge)
+        for chunk in self.chunks:
+            pairs.extend(chunk)
+        pairs.sort()
+        self._split(pairs)
+
+    def insert(self, pair):
+        chunks = self.chunks
+        maxes = self.maxes
+        if not chunks:
+            chunks.append([pair])
+            maxes.append(pair)
+            return
+        k = bisect_left(maxes, pair)
+        if k == len(maxes):
+            # past the end (e.g. rows appended in key order)
+            k -= 1
+            chunks[k].append(pair)
+            maxes[k] = pair
+        else:
+            insort(chunks[k], pair)
+        chunk = chunks[k]
+        if len(chunk) > CHUNK_SIZE:
+            half = len(chunk) // 2
+            chunks.insert(k + 1, chunk[half:])
+            del chunk[half:]
+            maxes[k] = chunk[-1]
+            maxes.insert(k + 1, chunks[k + 1][-1])
+
+    def remove(self, pair):
+        k = bisect_left(self.maxes, pair)
+        chunk = self.chunks[k]
+        i = bisect_left(chunk, pair)
+        del chunk[i]
+        if not chunk:
+            del self.chunks[k]
+            del self.maxes[k]
+        elif i == len(chunk):
+            self.maxes[k] = chunk[-1]
+
+    def move(self, column, rows, value):
+        """Re-file rows under value; column still holds their old values."""
+        for i in rows:
+            old = column[i]
+            if old != value:
+                self.remove((old, i))
+                self.insert((value, i))
+
+    def lookup(self, values):
+        """Ids of the rows (dead ones included) holding one of values."""
+        found = []
+        for value in dict.fromkeys(values):
+            found.extend(self.scan(value, True, value, True))
+        return found
+
+    def scan(self, low=None, low_inclusive=True, high=None, high_inclusive=True, reverse=False):
+        """
+        Ids of the rows (dead ones included) whose value lies between low and
+        high (None for no bound), ascending by value, or descending with
+        reverse. Rows with equal values come in row id order either way.
+        """
+        chunks = self.chunks
+        if low is None:
+            start_chunk, start = 0, 0
+        else:
+            start_chunk, start = self._position((low, BEFORE_ROWS if low_inclusive else AFTER_ROWS))
+        if high is None:
+            stop_chunk, stop = len(chunks), 0
+        else:
+            stop_chunk, stop = self._position((high, AFTER_ROWS if high_inclusive else BEFORE_ROWS))
+
+        last_chunk = min(stop_chunk, len(chunks) - 1)
+        if not reverse:
+            pairs = []
+            for k in range(start_chunk, last_chunk + 1):
+                chunk = chunks[k]
+                pairs.extend(chunk[start if k == start_chunk else 0:stop if k == stop_chunk else len(chunk)])
+            return list(map(operator.itemgetter(1), pairs))
+
+        # walk the chunks and their pairs backwards. Equal values then come
+        # out in descending row id order, so each run of them is turned
+        # around; a run continuing from the chunk walked before goes in
+        # front of its `tail` rows already at the end of rows
+        rows = []
+        value = tail = None
+        for k in range(last_chunk, start_chunk - 1, -1):
+            chunk = chunks[k]
+            part = chunk[start if k == start_chunk else 0:stop if k == stop_chunk else len(chunk)]
+            if not part:
+                continue
+            part.reverse()
+            values = list(map(operator.itemgetter(0), part))
+            ids = list(map(operator.itemgetter(1), part))
+            if len(set(values)) == len(values):
+                # every pair is a run of its own
+                first, rest, last = ids[:1], ids[1:], 1
+            else:
+                # runs start where the value changes; each is sliced backwards
+                bounds = [0]
+                bounds.extend(compress(count(1), map(operator.ne, values, islice(values, 1, None))))
+                bounds.append(len(ids))
+                first = ids[bounds[1] - 1::-1]
+                rest = list(chain.from_iterable(ids[hi - 1:lo - 1:-1] for lo, hi in zip(bounds[1:], bounds[2:])))
+                last = bounds[-1] - bounds[-2]
+            if values[0] == value:
+                rows[len(rows) - tail:len(rows) - tail] = first
+                tail += len(first)
+            else:
+                rows.extend(first)
+                tail = len(first)
+            if rest:
+                rows.extend(rest)
+                tail = last
+            value = values[-1]
+        return rows
+
+    def _position(self, key):
+        """(chunk, offset) of the first pair not less than key."""
+        k = bisect_left(self.maxes, key)
+        if k == len(self.maxes):
+            return k, 0
+        return k, bisect_left(self.chunks[k], key)
+
+    def rebuild(self, column):
+        """Index a whole (just compacted) column again."""
+        self._split(sorted(zip(column, count())))
+
+    def _split(self, pairs):
+        """Hold sorted pairs in half-full chunks."""
+        size = CHUNK_SIZE // 2
+        self.chunks = [pairs[k:k + size] for k in range(0, len(pairs), size)]
+        self.maxes = [chunk[-1] for chunk in self.chunks]
+
+
+class Table:
+    """One table's rows, stored column by column, and its indexes."""
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.column_names = [col_name for col_name, _ in columns]
+        self.column_types = [col_type for _, col_type in columns]
+        self.columns = [new_column(col_type) for col_type in self.column_types]
+        self.ordinals = {}
+        for ordinal, col_name in enumerate(self.column_names):
+            # a repeated column name resolves to its first definition
+            self.ordinals.setdefault(col_name, ordinal)
+        self.live = bytearray()  # 1 per row slot, 0 once deleted
+        self.dead = 0
+        self.indexes = []  # HashIndex / OrderedIndex per CREATE INDEX
+        self.changes = 0   # rows inserted, updated or deleted so far
+
+    def __len__(self):
+        return len(self.live) - self.dead
+
+    def row_ids(self):
+        """Ids of the live rows, in insertion order (a range while none are dead)."""
+        if not self.dead:
+            return range(len(self.live))
+        return list(compress(range(len(self.live)), self.live))
+
+    def insert_row(self, values):
+        """Append one row of already coerced values."""
+        for column, value in zip(self.columns, values):
+            column.append(value)
+        for index in self.indexes:
+            index.add((values[index.ordinal],), len(self.live))
+        self.live.append(1)
+        self.changes += 1
+
+    def insert_columns(self, columns, count):
+        """Append `count` rows given as one typed column per table column."""
+        for column, values in zip(self.columns, columns):
+            column.extend(values)
+        for index in self.indexes:
+            index.add(columns[index.ordinal], len(self.live))
+        self.live.extend(b"\x01" * count)
+        self.changes += count
+
+    def update(self, rows, ordinal, value):
+        """Set column `ordinal` to value in the given rows."""
+        column = self.columns[ordinal]
+        for index in self.indexes:
+            if index.ordinal == ordinal:
+                index.move(column, rows, value)
+        for i in rows:
+            column[i] = value
+        self.changes += len(rows)
+
+    def delete(self, rows):
+        """Mark rows dead; compacts the table when enough of it is dead."""
+        live = self.live
+        for i in rows:
+            live[i] = 0
+        self.dead += len(rows)
+        self.changes += len(rows)
+        if self.dead >= COMPACT_MIN_ROWS and self.dead > len(live) * COMPACT_RATIO:
+            self.compact()
+
+    def compact(self):
+        """Drop dead rows from every column; row ids of live rows change."""
+        live = self.live
+        for k, column in enumerate(self.columns):
+            if isinstance(column, array):
+                self.columns[k] = array(column.typecode, compress(column, live))
+            else:
+                self.columns[k] = list(compress(column, live))
+        self.live = bytearray(b"\x01" * len(self))
+        self.dead = 0
+        for index in self.indexes:
+            index.rebuild(self.columns[index.ordinal])
+
+    def add_index(self, name, ordinal, ordered=False):
+        """Create a hash (or ordered) index on column `ordinal` over the rows so far."""
+        index = OrderedIndex(name, ordinal) if ordered else HashIndex(name, ordinal)
+        index.rebuild(self.columns[ordinal])
+        self.indexes.append(index)
+        return index
+
+    def index_on(self, ordinal, ordered=False):
+        """
+        An index on column `ordinal` for equality lookups (a hash index if
+        there is one), or with ordered=True an OrderedIndex; None if none.
+        """
+        found = None
+        for index in self.indexes:
+            if index.ordinal != ordinal:
+                continue
+            if isinstance(index, OrderedIndex):
+                if ordered:
+                    return index
+                if found is None:
+                    found = index
+            elif not ordered:
+                return index
+        return found if not ordered else None
+
+
+class Result:
+    """
+    Outcome of one statement: the number of rows it inserted, selected,
+    updated or deleted, and for SELECT the selected values column by column.
+    EXPLAIN gives the statement's plan instead (count is 0).
+    """
+
+    def __init__(self, kind, table_name, count, names=None, columns=None, index_name=None, plan=None):
+        self.kind = kind            # "CREATE", "INDEX", "INSERT", "SELECT", "UPDATE", "DELETE" or "EXPLAIN"
+        self.table_name = table_name
+        self.count = count
+        self.names = names
+        self.columns = columns
+        self.index_name = index_name
+        self.plan = plan            # EXPLAIN: the plan's lines of text
+
+    def rows(self, limit=None):
+        """The selected rows as tuples (only the first `limit` if given)."""
+        if self.columns is None:
+            return []
+        return list(islice(zip(*self.columns), limit))
+
+    def __str__(self):
+        if self.kind == "CREATE":
+            return f"Table '{self.table_name}' created"
+        if self.kind == "INDEX":
+            noun = "row" if self.count == 1 else "rows"
+            return f"Index '{self.index_name}' created on {self.table_name} ({self.count} {noun})"
+        if self.kind == "EXPLAIN":
+            return "\n".join(self.plan)
+        verb = {"INSERT": "inserted", "SELECT": "selected", "UPDATE": "updated", "DELETE": "deleted"}[self.kind]
+        noun = "row" if self.count == 1 else "rows"
+        return f"{self.count} {noun} {verb} ({self.table_name})"
+
+
+class Executor:
+    """
+    Runs checked Statement nodes against in-memory tables. The schema of a
+    table comes from the symbol table, so tables known from a catalog get
+    (empty) storage on first use. Runtime errors are collected in
+    self.errors as messages; the failing statement has no effect.
+
+    WHERE clauses are evaluated with NumPy masks when it is installed;
+    pass vectorized=False to use the compiled predicates anyway.
+    """
+
+    def __init__(self, symbol_table, vectorized=True):
+        self.symbol_table = symbol_table
+        self.vectorized = vectorized and numpy is not None
+        self.predicates = PredicateCache()
+        self.planner = Planner(self.vectorized)
+        self.tables = {}  # table_name -> Table
+        self.errors = []
+        self._handlers = {
+            "CreateStmt": self._execute_create,
+            "CreateIndexStmt": self._execute_create_index,
+            "InsertStmt": self._execute_insert,
+            "SelectStmt": self._execute_select,
+            "UpdateStmt": self._execute_update,
+            "DeleteStmt": self._execute_delete,
+            "ExplainStmt": self._execute_explain,
+        }
+        self._operators = {
+            SeqScan: self._scan,
+            IndexScan: self._index_scan,
+            Filter: self._filter,
+            Sort: self._sort,
+            EmptyResult: self._empty,
+        }
+
+    def execute_tree(self, root):
+        """Execute every statement of a parse tree in order; returns their Results."""
+        results = []
+        for node in root.children:
+            if node.name == "Statement":
+                result = self.execute(node)
+                if result is not None:
+                    results.append(result)
+        return results
+
+    def execute(self, statement):
+        """Execute one Statement node. Returns its Result, or None after an error."""
+        if not statement.children:
+            return None
+        stmt = statement.children[0]
+        handler = self._handlers.get(stmt.name)
+        if handler is None:
+            return None
+        try:
+            return handler(stmt)
+        except ExecutionError as e:
+            self._report_error(str(e), e.line, e.col)
+            return None
+
+    def table(self, table_name):
+        """Storage for a table, created empty from its schema on first use."""
+        table = self.tables.get(table_name)
+        if table is None:
+            table = Table(table_name, self.symbol_table.get_columns(table_name))
+            self.tables[table_name] = table
+        return table
+
+    def _report_error(self, message, line, col):
+        if line > 0 and col > 0:
+            self.errors.append(f"Execution Error: {message} (Line {line}, Column {col})")
+        else:
+            self.errors.append(f"Execution Error: {message}")
+
+    # Statements
+
+    def _execute_create(self, node):
+        table_name = node.children[2].value
+        self.tables[table_name] = Table(table_name, self.symbol_table.get_columns(table_name))
+        return Result("CREATE", table_name, 0)
+
+    def _execute_create_index(self, node):
+        index_name = node.children[2].value
+        table_name = node.children[4].value
+        table = self.table(table_name)
+        ordered = len(node.children) > 9 and node.children[9].value == "BTREE"
+        table.add_index(index_name, table.ordinals[node.children[6].value], ordered)
+        return Result("INDEX", table_name, len(table), index_name=index_name)
+
+    def _execute_insert(self, node):
+        table_name = node.children[2].value
+        table = self.table(table_name)
+        rows = node.children[-1]
+        if rows.name == "ValueRows":
+            count = self._insert_value_rows(table, rows)
+        else:
+            values = []
+            for value_node, col_type in zip(node.children[5:-1], table.column_types):
+                values.append(coerce(self._literal(value_node), col_type, value_node))
+            table.insert_row(values)
+            count = 1
+        return Result("INSERT", table_name, count)
+
+    def _insert_value_rows(self, table, rows):
+        """Bulk-append the typed columns the analyzer built for a multi-row INSERT."""
+        columns = []
+        for values, col_type in zip(rows.columns, table.column_types):
+            if values is None:
+                raise ExecutionError("Cannot execute a statement with unbound parameters", rows)
+            # an INT column given FLOAT values, or values too large for an
+            # array, is converted (and range checked) value by value
+            if col_type != "TEXT" and not isinstance(values, array):
+                values = array(COLUMN_TYPECODES[col_type], [coerce(value, col_type, rows) for value in values])
+            elif col_type == "INT" and values.typecode != 'q':
+                values = array('q', [coerce(value, col_type, rows) for value in values])
+            columns.append(values)
+        table.insert_columns(columns, rows.row_count)
+        return rows.row_count
+
+    def _execute_select(self, node):
+        table = self.table(self._table_name(node))
+        plan = self._plan(table, node)
+        rows = self._rows(plan.child)
+        names = []
+        columns = []
+        for ordinal in plan.ordinals:
+            names.append(table.column_names[ordinal])
+            columns.append(self._gather(table.columns[ordinal], rows))
+        return Result("SELECT", table.name, len(rows), names, columns)
+
+    def _execute_update(self, node):
+        table = self.table(self._table_name(node))
+        ordinal = table.ordinals[node.children[3].value]
+        value_node = node.children[5]
+        value = coerce(self._literal(value_node), table.column_types[ordinal], value_node)
+        rows = self._rows(self._plan(table, node).child)
+        table.update(rows, ordinal, value)
+        return Result("UPDATE", table.name, len(rows))
+
+    def _execute_delete(self, node):
+        table = self.table(self._table_name(node))
+        rows = self._rows(self._plan(table, node).child)
+        table.delete(rows)
+        return Result("DELETE", table.name, len(rows))
+
+    def _execute_explain(self, node):
+        statement = node.children[1]
+        table = self.table(self._table_name(statement))
+        return Result("EXPLAIN", table.name, 0, plan=self._plan(table, statement).explain())
+
+    def _table_name(self, node):
+        """Table of a SelectStmt, UpdateStmt or DeleteStmt node."""
+        children = node.children
+        if node.name == "SelectStmt":
+            from_index = next(k for k, child in enumerate(children) if child.value == "FROM")
+            return children[from_index + 1].value
+        return children[1 if node.name == "UpdateStmt" else 2].value
+
+    def _plan(self, table, node):
+        try:
+            return self.planner.plan(table, node)
+        except PlanError as e:
+            raise ExecutionError(str(e), e.node)
+
+    # Plan operators, each giving row ids
+
+    def _rows(self, plan):
+        """Row ids the operators of a plan below Project, Update or Delete yield."""
+        return self._operators[type(plan)](plan)
+
+    def _scan(self, plan):
+        return plan.table.row_ids()
+
+    def _index_scan(self, plan):
+        table = plan.table
+        if plan.ordered:
+            index, bounds = plan.probes[0]
+            rows = index.scan(*bounds, reverse=plan.reverse)
+        else:
+            rows = []
+            for index, (low, low_inclusive, high, high_inclusive) in plan.probes:
+                if isinstance(index, OrderedIndex):
+                    rows.extend(index.scan(low, low_inclusive, high, high_inclusive))
+                else:
+                    rows.extend(index.lookup((low,)))
+            # back in row order; several probes can find a row twice
+            rows = sorted(set(rows)) if len(plan.probes) > 1 else sorted(rows)
+        if table.dead:
+            live = table.live
+            rows = [i for i in rows if live[i]]
+        return rows
+
+    def _filter(self, plan):
+        table = plan.table
+        if type(plan.child) is SeqScan:
+            if self.vectorized:
+                return self._select(table, plan.condition)
+            rows = table.row_ids()
+        else:
+            rows = self._rows(plan.child)
+        return self._matching(table, plan.condition, rows)
+
+    def _sort(self, plan):
+        rows = list(self._rows(plan.child))
+        columns = plan.table.columns
+        # stable sorts, least significant key first
+        for ordinal, descending in reversed(plan.keys):
+            rows.sort(key=columns[ordinal].__getitem__, reverse=descending)
+        return rows
+
+    def _empty(self, plan):
+        return []
+
+    def _matching(self, table, condition, rows):
+        """The ids in rows (kept in their order) for which condition holds."""
+        try:
+            predicate, operands = self.predicates.lookup(table.name, condition, self.symbol_table)
+        except PredicateError as e:
+            raise ExecutionError(str(e), e.node)
+        if predicate is None:
+            # nested too deeply to compile
+            return self._interpret(table, condition, rows)
+        literals = [self._literal(operands[k]) for k in predicate.literal_slots]
+        return predicate.bind(table.columns, literals)(rows)
+
+    def _interpret(self, table, node, rows):
+        """
+        _matching() without generated code: every node narrows a selection
+        vector of row ids, post-order over an explicit stack. AND passes
+        each child the rows the previous ones kept; OR only looks at the
+        rows no earlier alternative matched.
+        """
+        # frames are [node, rows in, rows still in play, rows matched, next child]
+        stack = [[node, rows, rows, set(), 0]]
+        while True:
+            frame = stack[-1]
+            node, rows, remaining, matched, index = frame
+            name = node.name
+            if name == "Comparison":
+                done = self._compare(table, node, rows)
+            elif name == "Term" or name == "Condition" or name == "Factor":
+                if remaining and index < len(node.children):
+                    frame[4] = index + 1
+                    stack.append([node.children[index], remaining, remaining, set(), 0])
+                    continue
+                if name == "Term":
+                    done = remaining
+                elif name == "Condition":
+                    done = [i for i in rows if i in matched]
+                else:
+                    done = [i for i in rows if i not in matched]
+            else:
+                raise ExecutionError(f"Cannot evaluate '{name}' in a WHERE clause", node)
+            stack.pop()
+            if not stack:
+                return done
+            parent = stack[-1]
+            if parent[0].name == "Term":
+                parent[2] = done
+            elif done:
+                matched = parent[3]
+                matched.update(done)
+                parent[2] = [i for i in parent[2] if i not in matched]
+
+    def _compare(self, table, node, rows):
+        """The ids in rows for which a Comparison node holds."""
+        left, op_node, right = node.children
+        op = op_node.value
+        if op not in COMPARISONS:
+            raise ExecutionError(f"'{op}' is not a comparison operator", op_node)
+        left_ordinal = self._ordinal(table, left)
+        right_ordinal = self._ordinal(table, right)
+        if left_ordinal is None and right_ordinal is not None:
+            left, right = right, left
+            left_ordinal, right_ordinal = right_ordinal, None
+            op = MIRRORED[op]
+        compare = COMPARISONS[op]
+
+        if left_ordinal is None:
+            # two literals: the same answer for every row
+            return rows if compare(self._literal(left), self._literal(right)) else []
+        values = self._values(table.columns[left_ordinal], rows)
+        if right_ordinal is None:
+            others = repeat(self._literal(right))
+        else:
+            others = self._values(table.columns[right_ordinal], rows)
+        return list(compress(rows, map(compare, values, others)))
+
+    def _values(self, column, rows):
+        """Iterator over a column's values at rows (the column itself for all rows)."""
+        if type(rows) is range:
+            return column
+        return map(column.__getitem__, rows)
+
+    def _gather(self, column, rows):
+        """A new column holding a column's values at rows."""
+        if type(rows) is range:
+            return column[:]
+        values = map(column.__getitem__, rows)
+        if isinstance(column, array):
+            return array(column.typecode, values)
+        return list(values)
+
+    # WHERE evaluation with NumPy masks, batch by batch
+
+    def _select(self, table, node):
+        """Row ids of the live rows for which the condition node holds."""
+        slots = len(table.live)
+        if not slots:
+            return []
+        live = numpy.frombuffer(table.live, dtype=numpy.bool_)
+        views = {}  # ordinal -> NumPy view of a numeric column, made on first use
+        rows = []
+        for start in range(0, slots, BATCH_ROWS):
+            stop = min(start + BATCH_ROWS, slots)
+            mask = self._mask(table, node, start, stop, views)
+            if table.dead:
+                mask &= live[start:stop]
+            rows.extend((numpy.flatnonzero(mask) + start).tolist())
+        if not table.dead and len(rows) == slots:
+            return range(slots)
+        return rows
+
+    def _mask(self, table, node, start, stop, views):
+        """Boolean mask over row slots start..stop for the condition node."""
+        # Post-order over an explicit stack of [node, mask so far, next
+        # child], so deeply nested conditions cannot overflow the Python
+        # stack; `done` is the mask of the node that just finished
+        stack = [[node, None, 0]]
+        done = None
+        while stack:
+            frame = stack[-1]
+            node = frame[0]
+            name = node.name
+            if name == "Comparison":
+                done = self._compare_mask(table, node, start, stop, views)
+                stack.pop()
+                continue
+            if name not in ("Term", "Condition", "Factor"):
+                raise ExecutionError(f"Cannot evaluate '{name}' in a WHERE clause", node)
+            mask = frame[1]
+            if done is not None:
+                if mask is None:
+                    mask = done
+                elif name == "Term":
+                    mask &= done
+                else:
+                    mask |= done
+                frame[1] = mask
+                done = None
+            if mask is not None:
+                if name == "Factor":
+                    done = ~mask
+                    stack.pop()
+                    continue
+                # AND stops at an all-false mask, OR at an all-true one
+                if (not mask.any()) if name == "Term" else mask.all():
+                    done = mask
+                    stack.pop()
+                    continue
+            index = frame[2]
+            if index < len(node.children):
+                frame[2] = index + 1
+                stack.append([node.children[index], None, 0])
+            else:
+                done = mask
+                stack.pop()
+        return done
+
+    def _compare_mask(self, table, node, start, stop, views):
+        left, op_node, right = node.children
+        op = op_node.value
+        if op not in COMPARISONS:
+            raise ExecutionError(f"'{op}' is not a comparison operator", op_node)
+        left_ordinal = self._ordinal(table, left)
+        right_ordinal = self._ordinal(table, right)
+        if left_ordinal is None and right_ordinal is not None:
+            left, right = right, left
+            left_ordinal, right_ordinal = right_ordinal, None
+            op = MIRRORED[op]
+        compare = COMPARISONS[op]
+
+        if left_ordinal is None:
+            return numpy.full(stop - start, compare(self._literal(left), self._literal(right)))
+        left_type = table.column_types[left_ordinal]
+        if right_ordinal is None:
+            value = self._literal(right)
+            exact = self._exact_literal(left_type, value)
+            if exact is not None:
+                return compare(self._view(table, left_ordinal, views)[start:stop], exact)
+            others = repeat(value)
+        else:
+            if left_type != "TEXT" and left_type == table.column_types[right_ordinal]:
+                return compare(self._view(table, left_ordinal, views)[start:stop],
+                               self._view(table, right_ordinal, views)[start:stop])
+            others = table.columns[right_ordinal][start:stop]
+
+        # row by row: TEXT columns, mixed INT/FLOAT columns, awkward literals
+        values = table.columns[left_ordinal][start:stop]
+        return numpy.fromiter(map(compare, values, others), dtype=numpy.bool_, count=stop - start)
+
+    def _ordinal(self, table, operand):
+        """Ordinal of the column an operand refers to, or None for a literal."""
+        if operand.kind == "IDENTIFIER":
+            return table.ordinals.get(operand.value)
+        return None
+
+    def _view(self, table, ordinal, views):
+        view = views.get(ordinal)
+        if view is None:
+            column = table.columns[ordinal]
+            view = views[ordinal] = numpy.frombuffer(column, dtype=column.typecode)
+        return view
+
+    def _exact_literal(self, data_type, value):
+        """
+        The literal as a scalar NumPy compares with a column of data_type
+        exactly as Python would, or None if it has to be compared row by row
+        (TEXT, INT values outside int64, floats that are not whole numbers
+        against an INT column, ints a float cannot hold exactly).
+        """
+        if data_type == "INT":
+            if isinstance(value, float):
+                if not value.is_integer():
+                    return None
+                value = int(value)
+            return value if INT_MIN <= value <= INT_MAX else None
+        if data_type == "FLOAT":
+            if isinstance(value, int):
+                try:
+                    if int(float(value)) != value:
+                        return None
+                except OverflowError:
+                    return None
+                return float(value)
+            return value
+        return None
+
+    def _literal(self, node):
+        """Value of a literal operand or value node."""
+        if node.kind == "PARAM":
+            raise ExecutionError("Cannot execute a statement with unbound parameters", node)
+        if node.kind == "IDENTIFIER":
+            # an identifier that is not a column compares as its own name
+            return node.value
+        return node.literal
@@ -0,0 +1,240 @@
+# incremental.py
+# Incremental re-lexing and re-parsing for scripts that are being edited.
+#
+# The script is kept as a list of segments, one per ';'-terminated statement
+# (plus a final tail for whatever follows the last ';'). Each segment owns its
+# text, tokens, Statement nodes and errors. Statements are independent in the
+# grammar, so an edit only re-lexes and re-parses the segments it touches,
+# continuing into following segments until the scanner resynchronizes.
+# Semantic checks are incremental too: SemanticAnalyzer.reanalyze() re-checks
+# only statements that were re-parsed or whose tables changed.
+
+from bisect import bisect_right
+
+from lexer import Scanner, CODE
+from parser import Parser, ParseNode
+from semantic_analyzer import SemanticAnalyzer
+from tokens import TokenStream, SEMICOLON
+
+
+class Segment:
+    """One statement's slice of the script and everything derived from it."""
+
+    def __init__(self, text, tokens, lex_errors, line, col, final):
+        self.text = text
+        self.newlines = text.count('\n')
+        self.tokens = tokens          # TokenStream, offsets relative to text
+        self.lex_errors = lex_errors
+        self.line = line              # origin the tokens/nodes were built at
+        self.col = col
+        self.final = final            # the tail segment at end of input
+        self.statements = []
+        self.parse_errors = []
+
+    def parse(self):
+        parser = Parser(self.tokens)
+        self.statements = parser.parse_query().children
+        self.parse_errors = parser.errors
+
+
+def lex_segments(text, line, col, at_eof):
+    """
+    Split text into ';'-terminated segments, lexing as it goes.
+    Returns (segments, rest, line, col): `rest` is the index of the
+    unterminated remainder and (line, col) its position. With at_eof=True
+    the remainder becomes a final segment and rest == len(text).
+    """
+    segments = []
+    start = 0
+    n = len(text)
+    while start < n:
+        scanner = Scanner(line, col)
+        stream = TokenStream(text)
+        stop = scanner.scan(text, start, stream, stop_kind=SEMICOLON)
+        terminated = len(stream) and stream.kinds[-1] == SEMICOLON and scanner.mode == CODE
+        if not terminated:
+            break
+        segments.append(Segment(text[start:stop], stream.extract(0, len(stream), start, stop),
+                                scanner.errors, line, col, False))
+        start, line, col = stop, scanner.line, scanner.col
+
+    if at_eof:
+        scanner = Scanner(line, col)
+        stream = TokenStream(text)
+        scanner.scan(text, start, stream)
+        scanner.finish()
+        segments.append(Segment(text[start:], stream.extract(0, len(stream), start, n),
+                                scanner.errors, line, col, True))
+        start, line, col = n, scanner.line, scanner.col
+
+    return segments, start, line, col
+
+
+class IncrementalDocument:
+    """
+    A script kept lexed and parsed across edits.
+    apply_edit() re-lexes only the damaged segments and re-parses only the
+    statements inside them; later segments are just shifted (lazily, when
+    they are next read) if the edit changed the number of lines.
+    """
+
+    def __init__(self, text):
+        self.segments = []
+        self._offsets = []  # true origin of each segment, valid below self._valid
+        self._lines = []
+        self._cols = []
+        self._valid = 0
+        self.analyzer = SemanticAnalyzer()
+        segments = lex_segments(text, 1, 1, at_eof=True)[0]
+        for seg in segments:
+            seg.parse()
+        self._replace(0, 0, segments)
+
+    @property
+    def text(self):
+        return "".join(seg.text for seg in self.segments)
+
+    def apply_edit(self, offset, deleted, inserted):
+        """
+        Replace `deleted` characters at `offset` with `inserted`.
+        Returns (index, removed, added): the first segment index touched and
+        the lists of Segment objects removed and added there.
+        """
+        k = self._segment_at(offset)
+        m = self._segment_at(offset + deleted - 1) if deleted else k
+        self._ensure_origins(m + 1 if m + 1 < len(self.segments) else m)
+
+        base = self._offsets[k]
+        old = "".join(seg.text for seg in self.segments[k:m + 1])
+        local = offset - base
+        text = old[:local] + inserted + old[local + deleted:]
+
+        line, col = self._lines[k], self._cols[k]
+        added = []
+        while True:
+            last = m + 1 >= len(self.segments)
+            pieces, rest, line, col = lex_segments(text, line, col, at_eof=last)
+            added.extend(pieces)
+            if last:
+                break
+            # Resynchronized: everything was consumed on a ';' boundary and
+            # the next segment still starts at the same column.
+            if rest == len(text) and col == self._cols[m + 1]:
+                break
+            m += 1
+            self._ensure_origins(m + 1 if m + 1 < len(self.segments) else m)
+            text = text[rest:] + self.segments[m].text
+
+        for seg in added:
+            seg.parse()
+
+        removed = self.segments[k:m + 1]
+        self._replace(k, m + 1, added)
+        return k, removed, added
+
+    # Reading the current state
+
+    def tokens(self):
+        """The whole script as one TokenStream."""
+        stream = TokenStream(self.text)
+        offset = 0
+        for k in range(len(self.segments)):
+            seg = self._segment(k)
+            stream.extend(seg.tokens, offset)
+            offset += len(seg.text)
+        return stream
+
+    def lex_errors(self):
+        return [err for k in range(len(self.segments)) for err in self._segment(k).lex_errors]
+
+    def parse_errors(self):
+        return [err for k in range(len(self.segments)) for err in self._segment(k).parse_errors]
+
+    def parse_tree(self):
+        """A Query root over the current Statement nodes."""
+        root = ParseNode("Query")
+        root.children = [stmt for k in range(len(self.segments)) for stmt in self._segment(k).statements]
+        return root
+
+    def semantic_errors(self):
+        """
+        Semantic errors of the current script. Statements checked by an
+        earlier call are reused unless they were re-parsed, or a table they
+        looked up was defined differently (or moved, if their errors cite
+        its line).
+        """
+        self.analyzer.reanalyze(self.parse_tree().children)
+        return self.analyzer.errors
+
+    # Internals
+
+    def _replace(self, lo, hi, segments):
+        self.segments[lo:hi] = segments
+        fill = [0] * len(segments)
+        self._offsets[lo:hi] = fill
+        self._lines[lo:hi] = fill
+        self._cols[lo:hi] = fill
+        self._valid = min(self._valid, lo)
+
+    def _ensure_origins(self, k):
+        """Compute the true (offset, line, col) origins of segments up to k."""
+        offsets, lines, cols = self._offsets, self._lines, self._cols
+        while self._valid <= k:
+            j = self._valid
+            if j == 0:
+                offsets[0], lines[0], cols[0] = 0, 1, 1
+            else:
+                prev = self.segments[j - 1]
+                offsets[j] = offsets[j - 1] + len(prev.text)
+                lines[j] = lines[j - 1] + prev.newlines
+                if prev.newlines:
+                    cols[j] = len(prev.text) - prev.text.rfind('\n')
+                else:
+                    cols[j] = cols[j - 1] + len(prev.text)
+            self._valid += 1
+
+    def _segment_at(self, offset):
+        """Index of the segment containing offset (the last one at end of text)."""
+        last = len(self.segments) - 1
+        k = self._valid - 1
+        if k >= 0 and offset < self._offsets[k] + len(self.segments[k].text):
+            return bisect_right(self._offsets, offset, 0, self._valid) - 1
+        k = max(k, 0)
+        while k < last:
+            self._ensure_origins(k)
+            if offset < self._offsets[k] + len(self.segments[k].text):
+                return k
+            k += 1
+        return last
+
+    def _segment(self, k):
+        """Segment k with its tokens and nodes moved to its current origin."""
+        self._ensure_origins(k)
+        seg = self.segments[k]
+        delta = self._lines[k] - seg.line
+        if delta:
+            if seg.lex_errors or seg.parse_errors:
+                # messages embed line numbers; rebuilding them is the simple way
+                fresh = lex_segments(seg.text, self._lines[k], self._cols[k], seg.final)[0][0]
+                fresh.parse()
+                self.segments[k] = seg = fresh
+            else:
+                lines = seg.tokens.lines
+                for i in range(len(lines)):
+                    lines[i] += delta
+                for stmt in seg.statements:
+                    _shift_lines(stmt, delta)
+                seg.line += delta
+        return seg
+
+
+def _shift_lines(root, delta):
+    """Move every node under root down by delta lines."""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.line:
+            node.line += delta
+        if node.name == "ValueRows":
+            node.shift_lines(delta)
+        stack.extend(node.children)
@@ -1,111 +1,322 @@
 # lexer.py
-from dfa_definitions import (
-    classify_char, identifier_dfa, identifier_accept,
-    number_dfa, number_accept, operator_dfa, operator_accept,
-    string_dfa, string_accept, delimiters, parentheses, keywords
+import codecs
+
+from dfa_builder import scanner_table, scanner_accept
+from dfa_runner import run_table_dfa
+from tokens import (
+    TokenStream, KIND_BY_NAME, KEYWORD, IDENTIFIER, SEMICOLON,
+    PARAM, KEYWORD_IDS, SINGLE_CHAR_KINDS
 )
-from dfa_runner import run_dfa
 
-def tokenize(text):
-    tokens = []
-    errors = []
-    line_num = 1
-    col = 1
-    i = 0
-    
-    while i < len(text):
-        ch = text[i]
-        start_col = col
-
-        # Handle Whitespace
-        if ch in ' \t\r':
-            i += 1
-            col += 1
-            continue
-        if ch == '\n':
-            line_num += 1
-            col = 1
-            i += 1
-            continue
+# Scanner modes that can be left open at the end of a chunk
+CODE = 0            # between tokens
+LINE_SKIP = 1       # inside a -- comment or skipping a bad string to end of line
+BLOCK_COMMENT = 2   # inside ## ... ##
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# Scanner DFA accept labels as token kinds (0 = not accepting)
+scanner_kinds = [KIND_BY_NAME[label] if label else 0 for label in scanner_accept]
+
+
+class Scanner:
+    """
+    Resumable scanner state (line/col, open comment) so a source can be
+    tokenized one chunk at a time. scan() stops before any token that could
+    still grow with more input and returns where it stopped.
+    """
+
+    def __init__(self, line=1, col=1):
+        self.line = line
+        self.col = col
+        self.mode = CODE
+        self.comment_line = 0  # line where the open block comment started
+        self.errors = []
+
+    def scan(self, text, i, tokens, at_eof=True, stop_kind=0):
+        """
+        Tokenize text[i:], appending to the TokenStream tokens (whose source
+        must be text). With at_eof=False, stops at the first token that
+        reaches the end of text and returns its index; the caller should
+        prepend that tail to the next chunk. With stop_kind set (e.g.
+        SEMICOLON), also returns right after emitting a token of that kind.
+        """
+        n = len(text)
+        line_num = self.line
+        col = self.col
+        mode = self.mode
+        errors = self.errors
+
+        append_kind = tokens.kinds.append
+        append_subkind = tokens.subkinds.append
+        append_start = tokens.starts.append
+        append_end = tokens.ends.append
+        append_line = tokens.lines.append
+        append_col = tokens.cols.append
+
+        while i < n:
+            # Handle Comments (-- and ##) and bad strings left open
+            if mode == LINE_SKIP:
+                end = text.find('\n', i)
+                if end == -1:
+                    col += n - i
+                    i = n
+                    break
+                col += end - i
+                i = end
+                mode = CODE
+                continue
 
-        # Handle Comments (-- and ##)
-        if text[i:i+2] == "--":
-            i += 2
-            col += 2
-            while i < len(text) and text[i] != '\n':
+            if mode == BLOCK_COMMENT:
+                end = text.find('##', i)
+                if end == -1:
+                    # keep a trailing '#', it may start the closing '##'
+                    end = n - 1 if (not at_eof and text[n - 1] == '#') else n
+                    stop = end
+                else:
+                    stop = end + 2
+                newlines = text.count('\n', i, end)
+                if newlines:
+                    line_num += newlines
+                    col = end - text.rfind('\n', i, end)
+                else:
+                    col += end - i
+                if stop != end:
+                    col += 2
+                    mode = CODE
+                i = stop
+                if mode == BLOCK_COMMENT:
+                    break
+                continue
+
+            ch = text[i]
+            start_col = col
+
+            # Handle Whitespace
+            if ch in ' \t\r':
                 i += 1
                 col += 1
-            continue
-        
-        if text[i:i+2] == "##":
-            i += 2
-            col += 2
-            start_line = line_num
-            while i < len(text):
-                if text[i:i+2] == "##":
-                    i += 2; col += 2; break
-                if text[i] == '\n':
-                    line_num += 1; col = 1; i += 1
-                else:
-                    i += 1; col += 1
-            else:
-                errors.append(f"Error: Unclosed comment starting line {start_line}")
-            continue
-
-        # Handle String Literals
-        if ch == "'":
-            lexeme, token_type, next_i = run_dfa(string_dfa, string_accept, text, i)
-            if lexeme:
-                tokens.append((token_type, lexeme, line_num, start_col))
+                continue
+            if ch == '\n':
+                line_num += 1
+                col = 1
+                i += 1
+                continue
+
+            if ch == '-' or ch == '#':
+                if i + 1 >= n and not at_eof:
+                    break  # need one more character to tell a comment apart
+                if text[i + 1:i + 2] == ch:
+                    i += 2
+                    col += 2
+                    if ch == '-':
+                        mode = LINE_SKIP
+                    else:
+                        mode = BLOCK_COMMENT
+                        self.comment_line = line_num
+                    continue
+
+            # Handle Identifiers, Numbers, Operators and Strings in one pass
+            # over the combined scanner DFA (longest match wins)
+            kind, next_i, stop = run_table_dfa(scanner_table, scanner_kinds, text, i)
+            if stop >= n and not at_eof:
+                break  # token may continue in the next chunk
+
+            # Handle Parameters: ? and :name
+            if ch == '?':
+                kind = PARAM
+                next_i = i + 1
+            elif ch == ':':
+                name_kind, next_i, stop = run_table_dfa(scanner_table, scanner_kinds, text, i + 1)
+                if stop >= n and not at_eof:
+                    break
+                if name_kind == IDENTIFIER:
+                    kind = PARAM
+
+            if not kind:
+                if ch == "'":
+                    # Basic error recovery for string: skip to end of line
+                    errors.append(f"Error: Invalid string at line {line_num}")
+                    mode = LINE_SKIP
+                    continue
+
+                # Handle Delimiters & Parentheses
+                kind = SINGLE_CHAR_KINDS.get(ch, 0)
+                if kind:
+                    next_i = i + 1
+
+            if kind:
+                subkind = 0
+                # CHECK KEYWORD (now we deal wityh keywords as case-sensitive)
+                if kind == IDENTIFIER:
+                    subkind = KEYWORD_IDS.get(text[i:next_i], 0)
+                    if subkind:
+                        kind = KEYWORD
+
+                append_kind(kind)
+                append_subkind(subkind)
+                append_start(i)
+                append_end(next_i)
+                append_line(line_num)
+                append_col(start_col)
+
                 col += (next_i - i)
                 i = next_i
+                if kind == stop_kind:
+                    break
                 continue
-            else:
-                # Basic error recovery for string
-                end = text.find('\n', i)
-                if end == -1: end = len(text)
-                errors.append(f"Error: Invalid string at line {line_num}")
-                i = end
-                continue
 
-        # Handle DFAs (Identifier, Number, Operator)
-        best_lexeme = None
-        best_type = None
-        best_len = 0
-
-        # Try all DFAs and pick the one that matches
-        for dfa, accept in [(identifier_dfa, identifier_accept), 
-                            (number_dfa, number_accept), 
-                            (operator_dfa, operator_accept)]:
-            lexeme, token_type, next_i = run_dfa(dfa, accept, text, i)
-            if lexeme and len(lexeme) > best_len:
-                best_lexeme = lexeme
-                best_type = token_type
-                best_len = len(lexeme)
-        
-        if best_lexeme:
-            # CHECK KEYWORD (now we deal wityh keywords as case-sensitive)
-            if best_type == "IDENTIFIER" and best_lexeme in keywords:
-                tokens.append(("KEYWORD", best_lexeme, line_num, start_col))
-            else:
-                tokens.append((best_type, best_lexeme, line_num, start_col))
-            
-            i += best_len
-            col += best_len
-            continue
-
-        # Handle Delimiters & Parentheses
-        if ch in delimiters:
-            tokens.append((delimiters[ch], ch, line_num, start_col))
-            i += 1; col += 1; continue
-            
-        if ch in parentheses:
-            tokens.append((parentheses[ch], ch, line_num, start_col))
-            i += 1; col += 1; continue
-        
-        # Fallback Error
-        errors.append(f"Lexical Error: Unexpected character '{ch}' at {line_num}:{col}")
-        i += 1
-        col += 1
-
-    return tokens, errors
\ No newline at end of file
+            # Fallback Error
+            errors.append(f"Lexical Error: Unexpected character '{ch}' at {line_num}:{col}")
+            i += 1
+            col += 1
+
+        self.line = line_num
+        self.col = col
+        self.mode = mode
+        return i
+
+    def finish(self):
+        """Report anything still open at end of input."""
+        if self.mode == BLOCK_COMMENT:
+            self.errors.append(f"Error: Unclosed comment starting line {self.comment_line}")
+        self.mode = CODE
+
+
+def tokenize(text):
+    """
+    Tokenize a whole string. Returns (TokenStream, errors); the stream
+    indexes and iterates as (type, lexeme, line, col) tuples.
+    """
+    scanner = Scanner()
+    tokens = TokenStream(text)
+    scanner.scan(text, 0, tokens)
+    scanner.finish()
+    return tokens, scanner.errors
+
+
+def read_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield text chunks from a str, a text/binary file object or an mmap.
+    Bytes are decoded incrementally as UTF-8, so multi-byte characters
+    split across reads are handled.
+    """
+    if isinstance(source, str):
+        for k in range(0, len(source), chunk_size):
+            yield source[k:k + chunk_size]
+        return
+
+    decoder = None
+    while True:
+        data = source.read(chunk_size)
+        if not data:
+            break
+        if not isinstance(data, str):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            data = decoder.decode(data)
+        if data:
+            yield data
+
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+def iter_tokens(source, errors=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lazily tokenize a str, file object or mmap in bounded chunks.
+    Yields the same tokens as tokenize(); lexical errors are appended to
+    `errors` (if given) as they are found. Memory stays bounded by the
+    chunk size plus the longest single token.
+    """
+    for tokens, _ in _scan_chunks(source, errors, chunk_size):
+        yield from tokens
+
+
+def collect_tokens(source, tokens, errors=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lazily tokenize like iter_tokens(), also appending every token to the
+    TokenStream `tokens`, whose source becomes the scanned text. Callers
+    can list the tokens as they arrive and then parse from the compact
+    stream instead of from a list of tuples.
+    """
+    parts = []
+    offset = 0
+    for chunk_tokens, text in _scan_chunks(source, errors, chunk_size):
+        yield from chunk_tokens
+        tokens.extend(chunk_tokens, offset)
+        parts.append(text)
+        offset += len(text)
+    tokens.source = "".join(parts)
+
+
+def _scan_chunks(source, errors, chunk_size):
+    """
+    Scan source chunk by chunk, yielding (TokenStream, text) pairs: the
+    tokens completed so far and the text they were scanned from, which
+    together cover the source. Token offsets are relative to that text.
+    """
+    scanner = Scanner()
+    if errors is not None:
+        scanner.errors = errors
+
+    tail = ""
+    for chunk in read_chunks(source, chunk_size):
+        text = tail + chunk if tail else chunk
+        tokens = TokenStream(text)
+        stop = scanner.scan(text, 0, tokens, at_eof=False)
+        tail = text[stop:]
+        yield tokens, text[:stop]
+
+    tokens = TokenStream(tail)
+    scanner.scan(tail, 0, tokens, at_eof=True)
+    scanner.finish()
+    yield tokens, tail
+
+
+def iter_statement_tokens(source, errors=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lazily tokenize a str, file object or mmap one statement at a time.
+    Yields a TokenStream per ';'-terminated statement (and one for whatever
+    follows the last ';'), each over its own slice of the text. Only the
+    statement being scanned is kept, so memory is bounded by the chunk size
+    plus the longest statement.
+    """
+    scanner = Scanner()
+    if errors is not None:
+        scanner.errors = errors
+
+    carry = ""                 # text from the start of the open statement
+    pending = TokenStream()    # its tokens so far, relative to carry
+    resume = 0                 # where scanning continues inside carry
+    for chunk in read_chunks(source, chunk_size):
+        carry, pending, resume = yield from _scan_statements(
+            scanner, carry + chunk, pending, resume, at_eof=False)
+
+    _, pending, _ = yield from _scan_statements(scanner, carry, pending, resume, at_eof=True)
+    scanner.finish()
+    if len(pending):
+        yield pending
+
+
+def _scan_statements(scanner, text, pending, i, at_eof):
+    """
+    Scan text from i, yielding each completed statement. Returns the
+    unfinished remainder as (carry, pending tokens, resume index).
+    """
+    tokens = TokenStream(text)
+    tokens.extend(pending)
+    start = 0
+    while True:
+        stop = scanner.scan(text, i, tokens, at_eof, stop_kind=SEMICOLON)
+        if not (len(tokens) and tokens.kinds[-1] == SEMICOLON):
+            break
+        yield tokens.extract(0, len(tokens), start, stop)
+        start = i = stop
+        tokens = TokenStream(text)
+
+    if not len(tokens):
+        start = stop  # only whitespace/comments so far, nothing to keep
+    return text[start:], tokens.extract(0, len(tokens), start, len(text)), stop - start
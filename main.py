@@ -1,130 +1,277 @@
-import sys
+import argparse
 import os
-from lexer import tokenize
+import sys
+import time
+from catalog import Catalog, CatalogError, save_catalog
+from executor import Executor
+from lexer import collect_tokens
 from parser import Parser
+from parallel import analyze_parallel, compile_parallel
+from pipeline import compile_statements
 from semantic_analyzer import SemanticAnalyzer
+from statement_cache import StatementCache
+from tokens import TokenStream
+from output import (
+    Colors, OutputBuffer, Report,
+    FULL, QUIET, SUMMARY, TEXT, NDJSON
+)
 
-# Colors for terminal output
-class Colors:
-    RED = '\033[91m'      # Errors
-    YELLOW = '\033[93m'   # Warnings or details
-    GREEN = '\033[92m'    # Success or headers
-    BLUE = '\033[94m'     # Tokens or info
-    CYAN = '\033[96m'     # Phase titles
-    RESET = '\033[0m'
 
-    # Enable colors on windows
-    if os.name == 'nt':
-        os.system('color')
+def parse_args(argv):
+    arg_parser = argparse.ArgumentParser(description="Mini SQL compiler")
+    arg_parser.add_argument("file", nargs="?", help="SQL script to compile")
+    arg_parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="worker processes for lexing, parsing and semantic checks (default: 1)"
+    )
+    arg_parser.add_argument(
+        "--stream", action="store_true",
+        help="lex, parse and check one statement at a time, reporting errors as they are found"
+    )
+    arg_parser.add_argument(
+        "--cache", type=int, default=0, metavar="SIZE",
+        help="with --stream, reuse checked statements of the same shape (LRU of SIZE entries)"
+    )
+    arg_parser.add_argument(
+        "-q", "--quiet", action="store_true",
+        help="print diagnostics only"
+    )
+    arg_parser.add_argument(
+        "--summary", action="store_true",
+        help="print counts and phase timings only"
+    )
+    arg_parser.add_argument(
+        "--format", choices=(TEXT, NDJSON), default=TEXT,
+        help="text listing (default) or one JSON object per line"
+    )
+    arg_parser.add_argument(
+        "--execute", action="store_true",
+        help="run the statements against in-memory tables once they pass the checks"
+    )
+    arg_parser.add_argument(
+        "--catalog", metavar="PATH",
+        help="load the schema from this catalog file, and save tables created by the script to it"
+    )
+    return arg_parser.parse_args(argv)
+
+
+def report_mode(args):
+    if args.summary:
+        return SUMMARY
+    if args.quiet:
+        return QUIET
+    return FULL
+
 
+def open_catalog(path):
+    """The Catalog at path, or None if there is no file there yet."""
+    if not path or not os.path.exists(path):
+        return None
+    return Catalog(path)
 
-def print_colored_error(error_msg):
+
+def store_catalog(path, analyzer, report):
+    """Save the schema back to the catalog if the script created tables."""
+    if path and analyzer.symbol_table.created:
+        count = save_catalog(path, analyzer.symbol_table)
+        report.note(f"Catalog saved to '{path}' ({count} tables).", Colors.GREEN, blank_line=True)
+
+
+def run_stream(source, report, cache_size=0, catalog_path=None, execute=False):
     """
-    Colorize errors that contain suggestions.
-    Format: error - suggestion
+    Streaming driver: diagnostics are written as each statement is checked.
+    With execute, each statement that compiled cleanly is run right away.
     """
-    if " - " in error_msg:
-        head, suggestion = error_msg.split(" - ", 1)
-        print(f"{Colors.RED}{head}{Colors.RESET} - {Colors.YELLOW}{suggestion}{Colors.RESET}")
-    else:
-        print(f"{Colors.RED}{error_msg}{Colors.RESET}")
+    report.section("Streaming compilation (statement by statement)")
 
+    analyzer = SemanticAnalyzer(catalog=open_catalog(catalog_path))
+    executor = Executor(analyzer.symbol_table) if execute else None
+    cache = StatementCache(cache_size) if cache_size > 0 else None
+    statements = 0
+    lex_count = syntax_count = semantic_count = 0
 
-def print_separator(title=None):
-    line = "_" * 55
-    if title:
-        print(f"\n{Colors.CYAN}{line}")
-        print(f"{title}")
-        print(f"{line}{Colors.RESET}")
-    else:
-        print(f"{Colors.CYAN}{line}{Colors.RESET}")
+    started = time.perf_counter()
+    with source:
+        for result in compile_statements(source, analyzer, cache=cache):
+            if result.statement:
+                statements += 1
+            report.diagnostics("lexical", result.lex_errors)
+            report.diagnostics("syntax", result.syntax_errors)
+            report.diagnostics("semantic", result.semantic_errors)
+            lex_count += len(result.lex_errors)
+            syntax_count += len(result.syntax_errors)
+            semantic_count += len(result.semantic_errors)
+            if executor and result.statement and not (result.syntax_errors or result.semantic_errors):
+                first = len(executor.errors)
+                outcome = executor.execute(result.statement)
+                if outcome is not None:
+                    report.results([outcome])
+                report.diagnostics("execution", executor.errors[first:])
+    report.timing("Compilation", time.perf_counter() - started)
+
+    success = not (lex_count or syntax_count or semantic_count or (executor and executor.errors))
+    if success:
+        report.note("No errors found.", Colors.GREEN)
+
+    report.heading("Symbol table")
+    report.symbol_table(analyzer)
+    store_catalog(catalog_path, analyzer, report)
+
+    counts = [
+        ("Statements", statements),
+        ("Lexical errors", lex_count),
+        ("Syntax errors", syntax_count),
+        ("Semantic errors", semantic_count),
+    ]
+    if executor is not None:
+        counts.append(("Execution errors", len(executor.errors)))
+    if cache is not None:
+        counts += [("Cache hits", cache.hits), ("Cache misses", cache.misses)]
+    report.summary(counts, success)
 
 
 def main():
-    if len(sys.argv) < 2:
-        print(f"{Colors.YELLOW}Usage: python main.py <inputfile.sql>{Colors.RESET}")
+    args = parse_args(sys.argv[1:])
+    if not args.file:
+        print(f"{Colors.YELLOW}Usage: python main.py [--jobs N | --stream] [--quiet | --summary] "
+              f"[--format text|ndjson] [--catalog PATH] [--execute] <inputfile.sql>{Colors.RESET}")
         return
 
     try:
-        with open(sys.argv[1], 'r') as f:
-            text = f.read()
+        source = open(args.file, 'r')
     except FileNotFoundError:
-        print(f"{Colors.RED}Error: file '{sys.argv[1]}' not found.{Colors.RESET}")
+        print(f"{Colors.RED}Error: file '{args.file}' not found.{Colors.RESET}")
         return
 
-    print_separator("Mini sql compiler - 3 phase compilation")
+    # All output goes through one buffer
+    report = Report(OutputBuffer(sys.stdout), report_mode(args), args.format)
+    try:
+        if args.stream:
+            run_stream(source, report, args.cache, args.catalog, args.execute)
+        else:
+            compile_file(source, args.jobs, report, args.catalog, args.execute)
+    except CatalogError as e:
+        report.diagnostics("catalog", [f"Catalog Error: {e}"])
+    finally:
+        report.close()
 
-    # Phase 1: lexical analysis
-    print_separator("Phase 1: lexical analysis")
 
-    tokens, lex_errors = tokenize(text)
+def compile_file(source, jobs, report, catalog_path=None, execute=False):
+    """Phase-by-phase driver: each phase runs only if the previous one succeeded."""
+    report.section("Mini sql compiler - 3 phase compilation")
+
+    # Phase 1: lexical analysis
+    report.section("Phase 1: lexical analysis")
 
-    print(f"\n{Colors.GREEN}-> Tokens{Colors.RESET}")
-    for ttype, val, line, col in tokens:
-        print(
-            f"{Colors.BLUE}{ttype:<12}{Colors.RESET} "
-            f"{val:<15} "
-            f"(Line {line}, col {col})"
-        )
+    started = time.perf_counter()
+    parse_tree = None
+    report.heading("Tokens")
+    if jobs > 1:
+        # Lex and parse chunks of statements in worker processes
+        with source:
+            text = source.read()
+        tokens, lex_errors, parse_tree, syntax_errors = compile_parallel(text, jobs)
+        report.tokens(tokens)
+        report.timing("Lex + parse", time.perf_counter() - started)
+    else:
+        # Tokens are scanned lazily from the file, written as they arrive and
+        # kept in a compact TokenStream for the parser
+        tokens = TokenStream()
+        lex_errors = []
+        with source:
+            report.tokens(collect_tokens(source, tokens, lex_errors))
+        report.timing("Lexical analysis", time.perf_counter() - started)
 
-    print(f"\n{Colors.GREEN}-> Lexical errors{Colors.RESET}")
+    report.heading("Lexical errors")
     if lex_errors:
-        for err in lex_errors:
-            print_colored_error(err)
-        print(f"\n{Colors.RED} ! Compilation stopped due to lexical errors.{Colors.RESET}")
+        report.diagnostics("lexical", lex_errors)
+        report.note(" ! Compilation stopped due to lexical errors.", Colors.RED, blank_line=True)
+        report.summary([("Lexical errors", len(lex_errors))], False, stopped=True)
         return
     else:
-        print(f"{Colors.GREEN}No lexical errors found.{Colors.RESET}")
+        report.note("No lexical errors found.", Colors.GREEN)
 
     # Phase 2: syntax analysis
-    print_separator("Phase 2: syntax analysis")
+    report.section("Phase 2: syntax analysis")
 
-    parser = Parser(tokens)
-    parse_tree = parser.parse_query()
+    if parse_tree is None:
+        started = time.perf_counter()
+        parser = Parser(tokens)
+        parse_tree = parser.parse_query()
+        syntax_errors = parser.errors
+        report.timing("Syntax analysis", time.perf_counter() - started)
 
-    print(f"\n{Colors.GREEN}-> Parse tree{Colors.RESET}")
-    print(parse_tree)
+    report.heading("Parse tree")
+    report.tree(parse_tree, "parse")
 
-    print(f"\n{Colors.GREEN}-> Syntax errors{Colors.RESET}")
-    if parser.errors:
-        for err in parser.errors:
-            print_colored_error(err)
-        print(f"\n{Colors.RED} ! Compilation stopped due to syntax errors.{Colors.RESET}")
+    report.heading("Syntax errors")
+    if syntax_errors:
+        report.diagnostics("syntax", syntax_errors)
+        report.note(" ! Compilation stopped due to syntax errors.", Colors.RED, blank_line=True)
+        report.summary([
+            ("Lexical errors", len(lex_errors)),
+            ("Syntax errors", len(syntax_errors)),
+        ], False, stopped=True)
         return
     else:
-        print(f"{Colors.GREEN}No syntax errors found.{Colors.RESET}")
+        report.note("No syntax errors found.", Colors.GREEN)
 
     # Phase 3: semantic analysis
-    print_separator("Phase 3: semantic analysis")
+    report.section("Phase 3: semantic analysis")
 
-    analyzer = SemanticAnalyzer(parse_tree)
-    success = analyzer.analyze()
+    started = time.perf_counter()
+    analyzer = SemanticAnalyzer(parse_tree, open_catalog(catalog_path))
+    if jobs > 1:
+        # CREATE TABLE statements in order here, the rest in worker processes;
+        # annotations are only copied back if the tree will be listed
+        statements = [node for node in parse_tree.children if node.name == "Statement"]
+        success = analyze_parallel(analyzer, statements, jobs, annotate=report.listing)
+    else:
+        success = analyzer.analyze()
+    report.timing("Semantic analysis", time.perf_counter() - started)
 
-    print(f"\n{Colors.GREEN}-> Symbol table{Colors.RESET}")
-    print(analyzer.get_symbol_table_dump())
+    report.heading("Symbol table")
+    report.symbol_table(analyzer)
+    store_catalog(catalog_path, analyzer, report)
 
-    print(f"\n{Colors.GREEN}-> Semantic errors{Colors.RESET}")
+    report.heading("Semantic errors")
     if not success:
-        for err in analyzer.get_errors():
-            print_colored_error(err)
-        print(f"\n{Colors.RED} ! Semantic analysis failed. Query is invalid.{Colors.RESET}")
+        report.diagnostics("semantic", analyzer.get_errors())
+        report.note(" ! Semantic analysis failed. Query is invalid.", Colors.RED, blank_line=True)
     else:
-        print(f"{Colors.GREEN}No semantic errors found.{Colors.RESET}")
-        print_separator("Semantic analysis successful")
-        print(f"{Colors.GREEN}-> Annotated parse tree{Colors.RESET}")
-        print(analyzer.get_annotated_tree())
+        report.note("No semantic errors found.", Colors.GREEN)
+        report.section("Semantic analysis successful")
+        report.heading("Annotated parse tree", blank_line=False)
+        report.tree(analyzer.get_annotated_tree(), "annotated")
+
+    counts = [
+        ("Lexical errors", len(lex_errors)),
+        ("Syntax errors", len(syntax_errors)),
+        ("Semantic errors", len(analyzer.get_errors())),
+    ]
+
+    # Phase 4: execution
+    if execute and success:
+        report.section("Phase 4: execution")
+
+        started = time.perf_counter()
+        executor = Executor(analyzer.symbol_table)
+        results = executor.execute_tree(parse_tree)
+        report.timing("Execution", time.perf_counter() - started)
+
+        report.heading("Results", blank_line=False)
+        report.results(results)
+
+        report.heading("Execution errors")
+        if executor.errors:
+            report.diagnostics("execution", executor.errors)
+            success = False
+        else:
+            report.note("No execution errors found.", Colors.GREEN)
+        counts.append(("Execution errors", len(executor.errors)))
 
     # Summary
-    print_separator("Compilation summary")
-    print(f"{Colors.BLUE}Lexical errors : {len(lex_errors)}{Colors.RESET}")
-    print(f"{Colors.BLUE}Syntax errors  : {len(parser.errors)}{Colors.RESET}")
-    print(f"{Colors.BLUE}Semantic errors: {len(analyzer.get_errors())}{Colors.RESET}")
-    print(
-        f"{Colors.GREEN if success else Colors.RED}"
-        f"Status: {'Success' if success else 'Failed'}"
-        f"{Colors.RESET}"
-    )
-    print_separator()
+    report.summary(counts, success)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,315 @@
+# output.py
+# Report writing for main.py: the classic colored listing, quiet and summary
+# modes, and NDJSON. Everything goes through one OutputBuffer, and trees are
+# written node by node instead of being built into one string first.
+
+import json
+import os
+from json.encoder import encode_basestring
+
+# Lines are joined and written in batches of this many
+BATCH_LINES = 4096
+# Rows of a SELECT result shown in the text listing (NDJSON has them all)
+RESULT_ROWS = 20
+
+# Listing modes
+FULL = "full"          # tokens, trees, symbol table, diagnostics, summary
+QUIET = "quiet"        # diagnostics only
+SUMMARY = "summary"    # counts and timings only
+
+# Output formats
+TEXT = "text"
+NDJSON = "ndjson"
+
+
+# Colors for terminal output
+class Colors:
+    RED = '\033[91m'      # Errors
+    YELLOW = '\033[93m'   # Warnings or details
+    GREEN = '\033[92m'    # Success or headers
+    BLUE = '\033[94m'     # Tokens or info
+    CYAN = '\033[96m'     # Phase titles
+    RESET = '\033[0m'
+
+    # Enable colors on windows
+    if os.name == 'nt':
+        os.system('color')
+
+
+class OutputBuffer:
+    """
+    Collects written strings and hands them to the stream in large blocks,
+    so thousands of small writes cost one stream write each.
+    """
+
+    def __init__(self, stream, limit=1 << 16):
+        self.stream = stream
+        self.limit = limit
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.limit:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.stream.write("".join(self.parts))
+            self.parts = []
+            self.size = 0
+        self.stream.flush()
+
+
+def colored_error(error_msg):
+    """
+    Colorize errors that contain suggestions.
+    Format: error - suggestion
+    """
+    if " - " in error_msg:
+        head, suggestion = error_msg.split(" - ", 1)
+        return f"{Colors.RED}{head}{Colors.RESET} - {Colors.YELLOW}{suggestion}{Colors.RESET}\n"
+    return f"{Colors.RED}{error_msg}{Colors.RESET}\n"
+
+
+def separator(title=None):
+    line = "_" * 55
+    if title:
+        return f"\n{Colors.CYAN}{line}\n{title}\n{line}{Colors.RESET}\n"
+    return f"{Colors.CYAN}{line}{Colors.RESET}\n"
+
+
+def write_tree(root, out, level=0):
+    """
+    Write a parse tree in the ParseNode.__repr__ layout, one line per node,
+    in linear time and without building the whole text in memory.
+    """
+    lines = []
+    # one child iterator per open level; the indent is the stack depth
+    stack = [iter((root,))]
+    indents = ["  " * level]
+    while stack:
+        for node in stack[-1]:
+            indent = indents[len(stack) - 1]
+            value = node.value
+            data_type = node.data_type
+            if data_type:
+                lines.append(f"{indent}{node.name}: {value} [Type: {data_type}]" if value
+                             else f"{indent}{node.name} [Type: {data_type}]")
+            else:
+                lines.append(f"{indent}{node.name}: {value}" if value else f"{indent}{node.name}")
+            if node.children:
+                stack.append(iter(node.children))
+                if len(indents) == len(stack) - 1:
+                    indents.append(indent + "  ")
+                break
+        else:
+            stack.pop()
+            if len(lines) >= BATCH_LINES:
+                out.write("\n".join(lines) + "\n")
+                lines = []
+    if lines:
+        out.write("\n".join(lines) + "\n")
+
+
+def json_value(value):
+    """JSON for a str / number / None field, without a json.dumps call per value."""
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return encode_basestring(value)
+    return str(value)
+
+
+def tree_records(root, tree, out):
+    """Write one JSON line per node, preorder, with ids and parent ids."""
+    lines = []
+    prefix = f'{{"type": "node", "tree": {encode_basestring(tree)}, "id": '
+    next_id = 0
+    stack = [(root, -1, 0)]
+    while stack:
+        node, parent, depth = stack.pop()
+        node_id = next_id
+        next_id += 1
+        lines.append(
+            f'{prefix}{node_id}, "parent": {parent}, "depth": {depth}, '
+            f'"name": {encode_basestring(node.name)}, "value": {json_value(node.value)}, '
+            f'"data_type": {json_value(node.data_type)}, "line": {node.line}, "col": {node.col}}}'
+        )
+        children = node.children
+        if children:
+            depth += 1
+            stack.extend((child, node_id, depth) for child in reversed(children))
+        if len(lines) >= BATCH_LINES:
+            out.write("\n".join(lines) + "\n")
+            lines = []
+    if lines:
+        out.write("\n".join(lines) + "\n")
+
+
+class Report:
+    """
+    Writes the compiler's report in one listing mode and format. Methods
+    for parts a mode does not show do nothing, so main.py runs the same
+    phases whatever the mode.
+    """
+
+    def __init__(self, out, mode=FULL, fmt=TEXT):
+        self.out = out
+        self.mode = mode
+        self.fmt = fmt
+        self.listing = mode == FULL
+        self.show_diagnostics = mode != SUMMARY
+        self.timings = []  # (phase, seconds)
+
+    def _text_listing(self):
+        return self.listing and self.fmt == TEXT
+
+    def section(self, title=None):
+        if self._text_listing():
+            self.out.write(separator(title))
+
+    def heading(self, title, blank_line=True):
+        if self._text_listing():
+            prefix = "\n" if blank_line else ""
+            self.out.write(f"{prefix}{Colors.GREEN}-> {title}{Colors.RESET}\n")
+
+    def note(self, text, color, blank_line=False):
+        """A status line of the full listing, e.g. 'No lexical errors found.'"""
+        if self._text_listing():
+            prefix = "\n" if blank_line else ""
+            self.out.write(f"{prefix}{color}{text}{Colors.RESET}\n")
+
+    def tokens(self, token_source):
+        """Consume (type, value, line, col) tokens, writing them if listing."""
+        if not self.listing:
+            for _ in token_source:
+                pass
+            return
+
+        if self.fmt == NDJSON:
+            template = '{{"type": "token", "kind": "{}", "value": {}, "line": {}, "col": {}}}'
+            format_token = lambda ttype, val, line, col: template.format(
+                ttype, encode_basestring(val), line, col)
+        else:
+            template = f"{Colors.BLUE}{{:<12}}{Colors.RESET} {{:<15}} (Line {{}}, col {{}})"
+            format_token = template.format
+
+        write = self.out.write
+        lines = []
+        for token in token_source:
+            lines.append(format_token(*token))
+            if len(lines) >= BATCH_LINES:
+                write("\n".join(lines) + "\n")
+                lines = []
+        if lines:
+            write("\n".join(lines) + "\n")
+
+    def tree(self, root, tree="parse"):
+        if not self.listing:
+            return
+        if self.fmt == NDJSON:
+            tree_records(root, tree, self.out)
+        else:
+            write_tree(root, self.out)
+            self.out.write("\n")
+
+    def diagnostics(self, phase, errors):
+        if not self.show_diagnostics:
+            return
+        write = self.out.write
+        if self.fmt == NDJSON:
+            for err in errors:
+                write(json.dumps({"type": "diagnostic", "phase": phase, "message": err}) + "\n")
+        else:
+            for err in errors:
+                write(colored_error(err))
+
+    def symbol_table(self, analyzer):
+        if not self.listing:
+            return
+        if self.fmt == NDJSON:
+            analyzer.symbol_table.load_catalog()
+            for name, info in analyzer.symbol_table.tables.items():
+                self.out.write(json.dumps({
+                    "type": "table", "name": name, "line": info['line'], "col": info['col'],
+                    "columns": [[col_name, col_type] for col_name, col_type in info['columns']]
+                }) + "\n")
+        else:
+            self.out.write(analyzer.get_symbol_table_dump() + "\n")
+
+    def results(self, results):
+        """Executed statements: a status line each, plus the rows of a SELECT or the plan of an EXPLAIN."""
+        if not self.listing:
+            return
+        write = self.out.write
+        if self.fmt == NDJSON:
+            for result in results:
+                record = {"type": "result", "statement": result.kind, "table": result.table_name,
+                          "count": result.count}
+                if result.index_name is not None:
+                    record["index"] = result.index_name
+                if result.plan is not None:
+                    record["plan"] = result.plan
+                if result.names is not None:
+                    record["columns"] = result.names
+                    record["rows"] = result.rows()
+                write(json.dumps(record) + "\n")
+            return
+
+        for result in results:
+            write(f"{Colors.BLUE}{result}{Colors.RESET}\n")
+            if result.names is None or not result.count:
+                continue
+            rows = [[str(value) for value in row] for row in result.rows(RESULT_ROWS)]
+            widths = [max([len(name)] + [len(row[k]) for row in rows]) for k, name in enumerate(result.names)]
+            write("  " + " | ".join(name.ljust(width) for name, width in zip(result.names, widths)).rstrip() + "\n")
+            write("  " + "-+-".join("-" * width for width in widths) + "\n")
+            for row in rows:
+                write("  " + " | ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() + "\n")
+            if result.count > RESULT_ROWS:
+                write(f"  ... {result.count - RESULT_ROWS} more rows\n")
+
+    def timing(self, phase, seconds):
+        self.timings.append((phase, seconds))
+
+    def summary(self, counts, success, stopped=False):
+        """
+        counts: list of (label, number) pairs, e.g. ("Lexical errors", 0).
+        The full listing shows them as before; summary mode adds timings.
+        stopped: compilation ended early; the full text listing has always
+        ended at the 'Compilation stopped' line there.
+        """
+        if stopped and self._text_listing():
+            return
+        write = self.out.write
+        status = 'Success' if success else 'Failed'
+        if self.fmt == NDJSON:
+            if self.mode != QUIET:
+                record = {"type": "summary", "status": status}
+                record.update((label.lower().replace(" ", "_"), number) for label, number in counts)
+                record["timings"] = {phase: round(seconds, 6) for phase, seconds in self.timings}
+                write(json.dumps(record) + "\n")
+            return
+
+        if self.mode == QUIET:
+            return
+        write(separator("Compilation summary"))
+        labels = [label for label, _ in counts]
+        if self.mode == SUMMARY:
+            labels += [phase for phase, _ in self.timings] + ["Total time"]
+        width = max(len(label) for label in labels)
+        for label, number in counts:
+            write(f"{Colors.BLUE}{label:<{width}}: {number}{Colors.RESET}\n")
+        if self.mode == SUMMARY:
+            total = 0.0
+            for phase, seconds in self.timings:
+                write(f"{Colors.BLUE}{phase:<{width}}: {seconds * 1000:.1f} ms{Colors.RESET}\n")
+                total += seconds
+            write(f"{Colors.BLUE}{'Total time':<{width}}: {total * 1000:.1f} ms{Colors.RESET}\n")
+        write(f"{Colors.GREEN if success else Colors.RED}Status: {status}{Colors.RESET}\n")
+        write(separator())
+
+    def close(self):
+        self.out.flush()
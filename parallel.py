@@ -0,0 +1,331 @@
+# parallel.py
+# Parallel lexing, parsing and semantic checking of large scripts.
+#
+# Top-level statements are independent in the grammar, so a script can be cut
+# at ';' boundaries that lie outside strings and comments. Each chunk is
+# tokenized and parsed in a worker process, and the token streams, Statement
+# nodes and error lists are merged back in source order. The result is the
+# same as running tokenize() + Parser.parse_query() on the whole text.
+#
+# Semantic analysis runs in two phases: CREATE TABLE and CREATE INDEX
+# statements are applied in order in this process, after which the other
+# statements only read the schema and are checked in workers. Each
+# statement sees only the tables declared before it
+# (SymbolTable.position), as in the serial analyzer.
+
+import gc
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from lexer import Scanner
+from parser import Parser, ParseNode
+from semantic_analyzer import DDL_STATEMENTS
+from tokens import TokenStream
+
+# Below this many characters per job it is cheaper to stay in-process
+MIN_CHUNK_SIZE = 1 << 16
+# Chunks per worker, so one slow chunk does not leave the others idle
+CHUNKS_PER_JOB = 4
+# Below this many DML statements per job, semantic checks stay in-process
+MIN_CHECK_STATEMENTS = 2000
+
+
+def split_points(text, target_size):
+    """
+    Return offsets just after ';' characters that the lexer would see as
+    SEMICOLON tokens, roughly every `target_size` characters. Mirrors the
+    scanner's rules for strings, '--' comments and '## ... ##' comments.
+    """
+    points = []
+    n = len(text)
+    i = 0
+    next_cut = target_size
+
+    # Next occurrence of each pattern that can change the scanner state;
+    # -1 means there are no more, so each is searched for only once per hit
+    patterns = (';', "'", '--', '##')
+    found = [text.find(p) for p in patterns]
+
+    while i < n:
+        for k in range(len(patterns)):
+            if -1 < found[k] < i:
+                found[k] = text.find(patterns[k], i)
+        candidates = [p for p in found if p != -1]
+        if not candidates:
+            break
+        i = min(candidates)
+        ch = text[i]
+
+        if ch == ';':
+            i += 1
+            if i >= next_cut:
+                points.append(i)
+                next_cut = i + target_size
+        elif ch == "'":
+            close = text.find("'", i + 1)
+            newline = text.find('\n', i + 1)
+            body = text[i + 1:close] if close != -1 else ""
+            if close != -1 and (newline == -1 or close < newline) and body.isascii() and body.isprintable():
+                i = close + 1
+            else:
+                # invalid string: the lexer skips to the end of the line
+                i = n if newline == -1 else newline
+        elif ch == '-':
+            newline = text.find('\n', i + 2)
+            i = n if newline == -1 else newline
+        else:
+            close = text.find('##', i + 2)
+            i = n if close == -1 else close + 2
+
+    return points
+
+
+def _compile_chunk(args):
+    """Worker: tokenize and parse one chunk that starts at offset/line/col."""
+    text, offset, line, col, final = args
+    scanner = Scanner(line, col)
+    tokens = TokenStream(text)
+    scanner.scan(text, 0, tokens)
+    if final:
+        scanner.finish()
+
+    parser = Parser(tokens)
+    statements = parser.parse_query().children
+
+    # Hand back offsets into the whole script, so the parent only has to
+    # concatenate arrays. The parent already has the text itself.
+    if offset:
+        tokens.starts = array('q', [s + offset for s in tokens.starts])
+        tokens.ends = array('q', [e + offset for e in tokens.ends])
+    tokens.source = ""
+    return tokens, scanner.errors, statements, parser.errors
+
+
+def _compile_chunk_packed(args):
+    """Worker entry point: like _compile_chunk, with packed statements."""
+    tokens, lex_errors, statements, parse_errors = _compile_chunk(args)
+    return tokens, lex_errors, pack_nodes(statements), parse_errors
+
+
+def pack_nodes(nodes):
+    """
+    Flatten parse trees into a few parallel lists (preorder) for shipping
+    between processes; pickling node objects one by one costs more than
+    building them. ValueRows nodes are already array based and are sent
+    whole, keyed by their preorder index.
+    """
+    names, values, types, literals, lines, cols = [], [], [], [], array('I'), array('I')
+    counts = array('I')
+    batches = {}
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        if node.name == "ValueRows":
+            batches[len(names)] = node
+        names.append(node.name)
+        values.append(node.value)
+        types.append(node.kind)
+        literals.append(node.literal)
+        lines.append(node.line)
+        cols.append(node.col)
+        counts.append(len(node.children))
+        stack.extend(reversed(node.children))
+    return len(nodes), names, values, types, literals, lines, cols, counts, batches
+
+
+def unpack_nodes(packed):
+    """Rebuild the list of root nodes flattened by pack_nodes."""
+    root_count, names, values, types, literals, lines, cols, counts, batches = packed
+    roots = []
+    # stack of [node, children still to attach]
+    stack = []
+    for k in range(len(names)):
+        ttype = types[k]
+        token = (ttype, values[k], lines[k], cols[k]) if ttype else None
+        if k in batches:
+            node = batches[k]
+        else:
+            node = ParseNode(names[k], values[k], token)
+            node.literal = literals[k]
+        if stack:
+            parent = stack[-1]
+            parent[0].add(node)
+            parent[1] -= 1
+            if not parent[1]:
+                stack.pop()
+        else:
+            roots.append(node)
+        if counts[k]:
+            stack.append([node, counts[k]])
+    return roots
+
+
+def make_chunks(text, jobs):
+    """Cut text into (chunk_text, offset, line, col, final) work items."""
+    target = max(MIN_CHUNK_SIZE, len(text) // (jobs * CHUNKS_PER_JOB) + 1)
+    bounds = [0] + split_points(text, target)
+    if bounds[-1] != len(text):
+        bounds.append(len(text))
+
+    chunks = []
+    line = 1
+    for k in range(len(bounds) - 1):
+        start, stop = bounds[k], bounds[k + 1]
+        if k:
+            line += text.count('\n', bounds[k - 1], start)
+        col = start - text.rfind('\n', 0, start)
+        chunks.append((text[start:stop], start, line, col, stop == len(text)))
+    if not chunks:
+        chunks.append((text, 0, 1, 1, True))
+    return chunks
+
+
+def compile_parallel(text, jobs):
+    """
+    Tokenize and parse text using up to `jobs` worker processes.
+    Returns (tokens, lex_errors, parse_tree, parse_errors), identical to
+    the serial tokenize() + Parser(tokens).parse_query() path.
+    """
+    chunks = make_chunks(text, jobs)
+
+    if jobs <= 1 or len(chunks) == 1:
+        return _merge(text, map(_compile_chunk, chunks), packed=False)
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return _merge(text, executor.map(_compile_chunk_packed, chunks), packed=True)
+
+
+def _merge(text, results, packed):
+    tokens = TokenStream(text)
+    lex_errors = []
+    parse_errors = []
+    root = ParseNode("Query")
+    root.children = []
+
+    for chunk_tokens, chunk_lex, statements, chunk_parse in results:
+        tokens.extend(chunk_tokens)
+        lex_errors.extend(chunk_lex)
+        parse_errors.extend(chunk_parse)
+        root.children.extend(unpack_nodes(statements) if packed else statements)
+
+    return tokens, lex_errors, root, parse_errors
+
+
+def analyze_parallel(analyzer, statements, jobs, annotate=True):
+    """
+    Semantic analysis of a list of Statement nodes: CREATE TABLE / INDEX
+    statements sequentially into analyzer's symbol table, then the
+    remaining (read-only) statements across up to `jobs` worker
+    processes. analyzer.errors and the typed columns of multi-row
+    INSERTs end up as with analyzer.analyze(), and so do the node
+    annotations unless annotate is False (copying them back costs about
+    as much as the checks, so skip it when the annotated tree is not
+    needed). Returns True if no errors were found.
+
+    Workers are forked, so they inherit the statements and the schema
+    instead of having them pickled; only statement index ranges go out and
+    errors (and annotations) come back. Where fork is not available, or the
+    script is small, everything is checked here.
+    """
+    if (jobs <= 1 or len(statements) < MIN_CHECK_STATEMENTS * jobs
+            or "fork" not in multiprocessing.get_all_start_methods()):
+        for statement in statements:
+            analyzer.analyze_statement(statement)
+        return not analyzer.errors
+
+    global _work
+    symbol_table = analyzer.symbol_table
+    found = {}  # statement index -> its errors
+    dml = []
+    for k, statement in enumerate(statements):
+        if statement.children and statement.children[0].name in DDL_STATEMENTS:
+            symbol_table.position = k
+            errors = analyzer.analyze_statement(statement)
+            if errors:
+                found[k] = errors
+        else:
+            dml.append(k)
+    symbol_table.position = None
+
+    size = len(dml) // (jobs * CHUNKS_PER_JOB) + 1
+    chunks = [(start, start + size) for start in range(0, len(dml), size)]
+    _work = (analyzer, statements, dml, annotate)
+    # Keep the workers' garbage collector off the inherited tree: scanning it
+    # would touch (and so copy) every page of it
+    gc.freeze()
+    try:
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+            for errors, batches, annotations in executor.map(_check_chunk, chunks):
+                for k, statement_errors in errors:
+                    found[k] = statement_errors
+                for k, columns, column_types in batches:
+                    rows = statements[k].children[0].children[-1]
+                    rows.columns = columns
+                    rows.column_types = column_types
+                for k, statement_annotations in annotations:
+                    _annotate(statements[k], statement_annotations)
+    finally:
+        gc.unfreeze()
+        _work = None
+
+    analyzer.errors = [error for k in sorted(found) for error in found[k]]
+    return not analyzer.errors
+
+
+# (analyzer, statements, DML statement indexes, annotate) while
+# analyze_parallel runs; forked workers inherit it
+_work = None
+
+
+def _check_chunk(bounds):
+    """Worker: check dml[start:stop] against the inherited schema."""
+    analyzer, statements, dml, annotate = _work
+    symbol_table = analyzer.symbol_table
+    errors = []
+    batches = []  # (statement index, columns, column_types) of ValueRows
+    annotations = []
+    for k in dml[bounds[0]:bounds[1]]:
+        symbol_table.position = k
+        statement = statements[k]
+        statement_errors = analyzer.analyze_statement(statement)
+        if statement_errors:
+            errors.append((k, statement_errors))
+        stmt = statement.children[0] if statement.children else None
+        if stmt is not None and stmt.children and stmt.children[-1].name == "ValueRows":
+            rows = stmt.children[-1]
+            batches.append((k, rows.columns, rows.column_types))
+        if annotate:
+            statement_annotations = _annotations(statements[k])
+            if statement_annotations:
+                annotations.append((k, statement_annotations))
+    return errors, batches, annotations
+
+
+def _annotations(statement):
+    """Preorder (node number, data_type, symbol_ref) of the annotated nodes."""
+    found = []
+    stack = [statement]
+    number = 0
+    while stack:
+        node = stack.pop()
+        if node.data_type or node.symbol_ref:
+            found.append((number, node.data_type, node.symbol_ref))
+        number += 1
+        stack.extend(reversed(node.children))
+    return found
+
+
+def _annotate(statement, annotations):
+    """Copy annotations made in a worker onto the same statement here."""
+    wanted = {number: rest for number, *rest in annotations}
+    stack = [statement]
+    number = 0
+    while stack:
+        node = stack.pop()
+        found = wanted.get(number)
+        if found is not None:
+            node.data_type, node.symbol_ref = found
+        number += 1
+        stack.extend(reversed(node.children))
@@ -1,260 +1,714 @@
+from array import array
+
+from tokens import (
+    TokenStream, Kw, KIND_NAMES, KIND_BY_NAME, KEYWORD_NAMES,
+    KEYWORD, IDENTIFIER, INTEGER, FLOAT, STRING, OPERATOR, COMMA, SEMICOLON,
+    LPAREN, RPAREN, PARAM
+)
+
+DATA_TYPES = (Kw.INT, Kw.FLOAT, Kw.TEXT)
+# Literals or a ? / :name parameter
+OPERAND_KINDS = (IDENTIFIER, INTEGER, FLOAT, STRING, PARAM)
+VALUE_KINDS = (INTEGER, FLOAT, STRING, PARAM)
+
+
 class ParseNode:
+    # No per-instance __dict__: a script with many statements has millions
+    # of nodes, most of them terminals
+    __slots__ = ('name', 'value', 'children', 'data_type', 'symbol_ref', 'kind', 'line', 'col', 'literal')
+
     def __init__(self, name, value=None, token=None):
         self.name = name
         self.value = value
-        self.children = []
+        # Leaves share the empty tuple; add() swaps in a list on first child
+        self.children = ()
         # Semantic annotations
         self.data_type = None  # For type annotation
         self.symbol_ref = None  # Reference to symbol table entry
-        # Token tracking for error reporting
-        self.token = token  # Store original token (type, value, line, col)
+        # Token tracking for error reporting: the token's type name, line and
+        # col are kept; its lexeme is `value`
+        self.kind = token[0] if token else None
         self.line = token[2] if token and len(token) > 2 else 0
         self.col = token[3] if token and len(token) > 3 else 0
+        # Converted value of a literal token (int, float or unquoted str),
+        # from TokenStream.literal(); None for other nodes
+        self.literal = None
+
+    @property
+    def token(self):
+        """Original token (type, value, line, col), or None for inner nodes."""
+        if self.kind is None:
+            return None
+        return (self.kind, self.value, self.line, self.col)
 
     def add(self, node):
         if node:
-            self.children.append(node)
+            if self.children:
+                self.children.append(node)
+            else:
+                self.children = [node]
 
     def __repr__(self, level=0):
-        ret = "  " * level + str(self.name)
-        if self.value:
-            ret += f": {self.value}"
-        if self.data_type:
-            ret += f" [Type: {self.data_type}]"
-        ret += "\n"
-        for child in self.children:
-            ret += child.__repr__(level + 1)
-        return ret
+        # Iterative, so deeply nested trees print without hitting the
+        # recursion limit
+        lines = []
+        stack = [(self, level)]
+        while stack:
+            node, depth = stack.pop()
+            ret = "  " * depth + str(node.name)
+            if node.value:
+                ret += f": {node.value}"
+            if node.data_type:
+                ret += f" [Type: {node.data_type}]"
+            lines.append(ret + "\n")
+            stack.extend((child, depth + 1) for child in reversed(node.children))
+        return "".join(lines)
+
+
+class ValueRows(ParseNode):
+    """
+    The rows of a multi-row INSERT, stored column-friendly instead of one
+    Value node per literal. Cells are kept row-major in flat arrays, so
+    with rows of equal width w, column c is the slice [c::w]. cell_values
+    holds the converted literal values (the lexeme for a
+    parameter). Semantic analysis fills `columns` with one typed array per
+    table column: array('q') for INT, array('d') for FLOAT (or INT given
+    FLOAT values), a list of str for TEXT, and None for a column holding
+    parameters. A numeric column with a value out of its array's range
+    stays a list.
+    """
+
+    __slots__ = ('cell_kinds', 'cell_values', 'cell_lines', 'cell_cols',
+                 'row_starts', 'row_lines', 'row_cols', 'columns', 'column_types')
+
+    def __init__(self, token):
+        ParseNode.__init__(self, "ValueRows", None, token)
+        self.cell_kinds = array('B')    # token kind per literal
+        self.cell_values = []           # value per literal (lexeme for ? / :name)
+        self.cell_lines = array('I')
+        self.cell_cols = array('I')
+        self.row_starts = array('I')    # index of each row's first cell
+        self.row_lines = array('I')     # position of each row's '('
+        self.row_cols = array('I')
+        self.columns = None
+        self.column_types = None
+
+    @property
+    def row_count(self):
+        return len(self.row_starts)
+
+    def row_width(self, row):
+        stop = self.row_starts[row + 1] if row + 1 < len(self.row_starts) else len(self.cell_kinds)
+        return stop - self.row_starts[row]
+
+    def uniform_width(self):
+        """The common row width, or -1 if the rows differ in length."""
+        count = len(self.row_starts)
+        if not count or len(self.cell_kinds) % count:
+            return -1
+        width = len(self.cell_kinds) // count
+        if width and self.row_starts == array('I', range(0, len(self.cell_kinds), width)):
+            return width
+        return -1
+
+    def parameters(self):
+        """Value nodes for the ? / :name cells, typed by their column."""
+        width = self.uniform_width()
+        nodes = []
+        for k, kind in enumerate(self.cell_kinds):
+            if kind == PARAM:
+                node = ParseNode("Value", self.cell_values[k],
+                                 (KIND_NAMES[PARAM], self.cell_values[k], self.cell_lines[k], self.cell_cols[k]))
+                if self.column_types and width > 0:
+                    node.data_type = self.column_types[k % width]
+                nodes.append(node)
+        return nodes
+
+    def shift_lines(self, delta):
+        for lines in (self.cell_lines, self.row_lines):
+            for i in range(len(lines)):
+                lines[i] += delta
+
+
+# Syntax diagnostic codes
+UNEXPECTED_TOKEN = "unexpected-token"
+UNEXPECTED_END = "unexpected-end"
+BAD_STATEMENT_START = "bad-statement-start"
+
+STATEMENT_KEYWORDS = (Kw.CREATE, Kw.INSERT, Kw.SELECT, Kw.UPDATE, Kw.DELETE, Kw.EXPLAIN)
+# Statements EXPLAIN can show the plan of
+EXPLAINED_KEYWORDS = (Kw.SELECT, Kw.UPDATE, Kw.DELETE)
+
+# Condition operator precedence
+PREC_OR = 1
+PREC_AND = 2
+PREC_NOT = 3
+
+
+def join_conditions(name, left, right, keyword_node):
+    """
+    Combine two conditions under an n-ary Term (AND) or Condition (OR) node,
+    merging operands that are already nodes of the same kind.
+    """
+    if left.name == name:
+        node = left
+    else:
+        node = ParseNode(name, keyword_node.value, keyword_node.token)
+        node.add(left)
+    if right.name == name:
+        node.children.extend(right.children)
+    else:
+        node.add(right)
+    return node
+
+
+def negate_condition(operand, keyword_node):
+    """NOT operand as a Factor node; NOT NOT x is just x."""
+    if operand.name == "Factor":
+        return operand.children[0]
+    node = ParseNode("Factor", keyword_node.value, keyword_node.token)
+    node.add(operand)
+    return node
+
+
+class SyntaxDiagnostic:
+    """
+    One syntax error, recorded instead of raised.
+    code     - one of the codes above
+    span     - (start, end) offsets of the found token in the token source
+    expected - tuple of what would have been accepted, e.g. ('INT', 'FLOAT', 'TEXT')
+    found    - the (type, value, line, col) token found, or None at end of input
+    label    - how the expected item is named in the message
+    str() gives the classic one-line message.
+    """
+
+    __slots__ = ('code', 'span', 'expected', 'found', 'label', 'quoted')
+
+    def __init__(self, code, span, expected, found, label, quoted=True):
+        self.code = code
+        self.span = span
+        self.expected = expected
+        self.found = found
+        self.label = label
+        self.quoted = quoted  # "Expected 'X', found ..." vs "Expected X at ..."
+
+    @property
+    def line(self):
+        return self.found[2] if self.found else 0
+
+    @property
+    def col(self):
+        return self.found[3] if self.found else 0
+
+    def __str__(self):
+        found = self.found
+        if self.code == UNEXPECTED_END:
+            return f"Unexpected End of Input. Expected {self.label}"
+        if self.code == BAD_STATEMENT_START:
+            return f"Syntax Error at {found[2]}:{found[3]} - Unexpected start of statement: '{found[1]}'"
+        if self.quoted:
+            return f"Syntax Error at {found[2]}:{found[3]} - Expected '{self.label}', found '{found[1]}'"
+        return f"Expected {self.label} at {found[2]}:{found[3]}"
+
+    def __repr__(self):
+        return f"SyntaxDiagnostic({self.code!r}, {self.span!r}, {self.expected!r}, {self.found!r})"
 
 
 class Parser:
-    def __init__(self, tokens):
+    """
+    Recursive descent parser. Syntax errors do not raise: the first error in
+    a statement is recorded as a SyntaxDiagnostic and sets self.failed, after
+    which match() stops consuming and the grammar methods unwind normally.
+    The statement is then dropped and parsing resynchronizes at the next
+    ';' (consumed) or, if given, at one of `sync_keywords` (not consumed),
+    e.g. STATEMENT_KEYWORDS.
+    """
+
+    def __init__(self, tokens, sync_keywords=()):
+        # Accept a TokenStream or a plain list of (type, value, line, col) tuples
+        if not isinstance(tokens, TokenStream):
+            tokens = TokenStream.from_tuples(tokens)
         self.tokens = tokens
+        self.kinds = tokens.kinds
+        self.subkinds = tokens.subkinds
+        self.count = len(tokens)
         self.pos = 0
-        self.current_token = tokens[0] if tokens else None
-        self.errors = []
+        # Current token kind/keyword id; kind 0 means end of input
+        self.kind = self.kinds[0] if self.count else 0
+        self.keyword = self.subkinds[0] if self.count else 0
+        self.sync_keywords = frozenset(sync_keywords)
+        self.failed = False
+        self.diagnostics = []
+
+    @property
+    def errors(self):
+        """Syntax errors as message strings."""
+        return [str(diagnostic) for diagnostic in self.diagnostics]
+
+    @property
+    def current_token(self):
+        """Tuple view (type, value, line, col) of the current token, or None."""
+        if self.pos < self.count:
+            return self.tokens[self.pos]
+        return None
 
     def advance(self):
         self.pos += 1
-        if self.pos < len(self.tokens):
-            self.current_token = self.tokens[self.pos]
+        if self.pos < self.count:
+            self.kind = self.kinds[self.pos]
+            self.keyword = self.subkinds[self.pos]
         else:
-            self.current_token = None
-
-    def match(self, expected_type, expected_val=None):
-        """Consumes token if it matches type and optional value."""
-        if not self.current_token:
-            raise Exception(f"Unexpected End of Input. Expected {expected_type}")
-        
-        curr_type = self.current_token[0]
-        curr_val = self.current_token[1]
-
-        if curr_type == expected_type:
-            if expected_val is None or curr_val == expected_val:
-                node = ParseNode(curr_type, curr_val, self.current_token)
+            self.kind = 0
+            self.keyword = 0
+
+    def seek(self, pos):
+        """Move to token pos."""
+        self.pos = pos - 1
+        self.advance()
+
+    def at_operator(self, lexeme):
+        """True if the current token is the given operator."""
+        return self.kind == OPERATOR and self.tokens.lexeme(self.pos) == lexeme
+
+    def match(self, expected_kind, expected_keyword=0, expected_val=None):
+        """
+        Consumes token if it matches kind and optional keyword id / value.
+        Otherwise records an error and returns None.
+        """
+        if self.failed:
+            return None
+
+        if self.kind == expected_kind and (not expected_keyword or self.keyword == expected_keyword):
+            token = self.tokens[self.pos]
+            if expected_val is None or token[1] == expected_val:
+                node = ParseNode(token[0], token[1], token)
                 self.advance()
                 return node
-        
-        expected_desc = expected_val if expected_val else expected_type
-        raise Exception(f"Syntax Error at {self.current_token[2]}:{self.current_token[3]} - Expected '{expected_desc}', found '{curr_val}'")
 
-    def panic_mode(self):
-        """Skips tokens until a SEMICOLON is found."""
-        while self.current_token and self.current_token[1] != ';':
+        if expected_keyword:
+            expected_desc = KEYWORD_NAMES[expected_keyword]
+        else:
+            expected_desc = expected_val if expected_val else KIND_NAMES[expected_kind]
+        if not self.kind:
+            # the end-of-input message names the token kind
+            self.error(UNEXPECTED_END, (expected_desc,), KIND_NAMES[expected_kind])
+        else:
+            self.error(UNEXPECTED_TOKEN, (expected_desc,), expected_desc)
+        return None
+
+    def match_keyword(self, keyword):
+        return self.match(KEYWORD, keyword)
+
+    def error(self, code, expected, label, quoted=True):
+        """Record a diagnostic at the current token and enter the failed state."""
+        if self.failed:
+            return
+        if self.kind:
+            found = self.tokens[self.pos]
+            span = (self.tokens.starts[self.pos], self.tokens.ends[self.pos])
+        else:
+            code = UNEXPECTED_END
+            found = None
+            end = len(self.tokens.source)
+            span = (end, end)
+        self.diagnostics.append(SyntaxDiagnostic(code, span, expected, found, label, quoted))
+        self.failed = True
+
+    def expected(self, what, expected):
+        """Record 'Expected <what> at line:col' for the current token."""
+        self.error(UNEXPECTED_TOKEN, expected, what, quoted=False)
+        return None
+
+    def recover(self, start):
+        """
+        Skip to the next synchronizing token after a failed statement that
+        began at token `start`, and clear the failed state.
+        """
+        sync_keywords = self.sync_keywords
+        while self.kind and self.kind != SEMICOLON:
+            if self.keyword in sync_keywords and self.pos > start:
+                break
             self.advance()
-        if self.current_token and self.current_token[1] == ';':
+        if self.kind == SEMICOLON:
             self.advance() # Consume the semicolon to reset
+        self.failed = False
+
+    def panic_mode(self):
+        """Skips tokens until a SEMICOLON is found."""
+        self.recover(self.pos)
 
     # CFG implelmetation 
 
     # Query -> Statement | Statement Query
     def parse_query(self):
         root = ParseNode("Query")
-        while self.current_token:
-            try:
-                root.add(self.parse_statement())
-            except Exception as e:
-                self.errors.append(str(e))
-                self.panic_mode()
+        for statement in self.iter_statements():
+            root.add(statement)
         return root
 
-    # Statement -> CreateStmt SEMICOLON | InsertStmt SEMICOLON ...
+    def iter_statements(self):
+        """
+        Yield Statement nodes one at a time as they are parsed. Syntax errors
+        go to self.diagnostics and the parser resynchronizes, as in
+        parse_query().
+        """
+        while self.kind:
+            start = self.pos
+            statement = self.parse_statement()
+            if self.failed:
+                self.recover(start)
+                continue
+            if statement:
+                yield statement
+
+    # Statement -> CreateStmt SEMICOLON | CreateIndexStmt SEMICOLON | InsertStmt SEMICOLON ...
+    #            | ExplainStmt SEMICOLON
     def parse_statement(self):
-        if not self.current_token: return None
-        val = self.current_token[1]
-        
+        if not self.kind: return None
+        keyword = self.keyword
+
         node = ParseNode("Statement")
-        
-        if val == "CREATE":
-            node.add(self.parse_create_stmt())
-        elif val == "INSERT":
+
+        if keyword == Kw.CREATE:
+            if self.pos + 1 < self.count and self.subkinds[self.pos + 1] == Kw.INDEX:
+                node.add(self.parse_create_index_stmt())
+            else:
+                node.add(self.parse_create_stmt())
+        elif keyword == Kw.INSERT:
             node.add(self.parse_insert_stmt())
-        elif val == "SELECT":
+        elif keyword == Kw.SELECT:
             node.add(self.parse_select_stmt())
-        elif val == "UPDATE":
+        elif keyword == Kw.UPDATE:
             node.add(self.parse_update_stmt())
-        elif val == "DELETE":
+        elif keyword == Kw.DELETE:
             node.add(self.parse_delete_stmt())
+        elif keyword == Kw.EXPLAIN:
+            node.add(self.parse_explain_stmt())
         else:
-            raise Exception(f"Syntax Error at {self.current_token[2]}:{self.current_token[3]} - Unexpected start of statement: '{val}'")
-        
+            expected = tuple(KEYWORD_NAMES[kw] for kw in STATEMENT_KEYWORDS)
+            self.error(BAD_STATEMENT_START, expected, "statement")
+            return None
+
         # The SEMICOLON belongs to the Statement rule
-        node.add(self.match("SEMICOLON", ";"))
+        node.add(self.match(SEMICOLON, expected_val=";"))
         return node
 
     # CreateStmt -> CREATE TABLE IDENTIFIER ( ColumnList )
     def parse_create_stmt(self):
         node = ParseNode("CreateStmt")
-        node.add(self.match("KEYWORD", "CREATE"))
-        node.add(self.match("KEYWORD", "TABLE"))
-        node.add(self.match("IDENTIFIER"))
-        node.add(self.match("LPAREN"))
-        
+        node.add(self.match_keyword(Kw.CREATE))
+        node.add(self.match_keyword(Kw.TABLE))
+        node.add(self.match(IDENTIFIER))
+        node.add(self.match(LPAREN))
+
         # Parse ColumnList manually
         node.add(self.parse_column_def())
-        while self.current_token and self.current_token[1] == ',':
+        while self.kind == COMMA and not self.failed:
             self.advance() # skip comma
             node.add(self.parse_column_def())
-            
-        node.add(self.match("RPAREN"))
+
+        node.add(self.match(RPAREN))
+        return node
+
+    # CreateIndexStmt -> CREATE INDEX IDENTIFIER ON IDENTIFIER ( IDENTIFIER ) [ USING IDENTIFIER ]
+    # (the index method after USING, BTREE or HASH, is checked semantically)
+    def parse_create_index_stmt(self):
+        node = ParseNode("CreateIndexStmt")
+        node.add(self.match_keyword(Kw.CREATE))
+        node.add(self.match_keyword(Kw.INDEX))
+        node.add(self.match(IDENTIFIER))
+        node.add(self.match_keyword(Kw.ON))
+        node.add(self.match(IDENTIFIER))
+        node.add(self.match(LPAREN))
+        node.add(self.match(IDENTIFIER))
+        node.add(self.match(RPAREN))
+        if self.keyword == Kw.USING:
+            node.add(self.match_keyword(Kw.USING))
+            node.add(self.match(IDENTIFIER))
         return node
 
     def parse_column_def(self):
         col = ParseNode("ColumnDef")
-        col.add(self.match("IDENTIFIER"))
-        
-        if self.current_token[1] in ["INT", "FLOAT", "TEXT"]:
-            col.add(self.match("KEYWORD"))
+        col.add(self.match(IDENTIFIER))
+
+        if self.keyword in DATA_TYPES:
+            col.add(self.match(KEYWORD))
         else:
-            raise Exception(f"Expected Data Type (INT, FLOAT, TEXT) at {self.current_token[2]}:{self.current_token[3]}")
+            self.expected("Data Type (INT, FLOAT, TEXT)", ("INT", "FLOAT", "TEXT"))
         return col
 
-    # InsertStmt -> INSERT INTO IDENTIFIER VALUES ( ValueList )
+    # InsertStmt -> INSERT INTO IDENTIFIER VALUES ( ValueList ) { , ( ValueList ) }
     def parse_insert_stmt(self):
         node = ParseNode("InsertStmt")
-        node.add(self.match("KEYWORD", "INSERT"))
-        node.add(self.match("KEYWORD", "INTO"))
-        node.add(self.match("IDENTIFIER"))
-        node.add(self.match("KEYWORD", "VALUES"))
-        node.add(self.match("LPAREN"))
-        
+        node.add(self.match_keyword(Kw.INSERT))
+        node.add(self.match_keyword(Kw.INTO))
+        node.add(self.match(IDENTIFIER))
+        node.add(self.match_keyword(Kw.VALUES))
+        lparen = self.match(LPAREN)
+
         # parse ValueList manually
-        node.add(self.parse_value())
-        while self.current_token and self.current_token[1] == ',':
+        values = [self.parse_value()]
+        while self.kind == COMMA and not self.failed:
             self.advance() # skip comma
-            node.add(self.parse_value())
-            
-        node.add(self.match("RPAREN"))
+            values.append(self.parse_value())
+        rparen = self.match(RPAREN)
+
+        if self.kind == COMMA and not self.failed:
+            # More rows follow: keep them all column-wise in one node
+            node.add(self.parse_value_rows(lparen, values))
+            return node
+
+        node.add(lparen)
+        for value in values:
+            node.add(value)
+        node.add(rparen)
         return node
 
-    #SelectStmt -> SELECT SelectList FROM IDENTIFIER WhereClause
+    def parse_value_rows(self, lparen, first_row):
+        """
+        Rows after the first one of a multi-row INSERT, read straight from
+        the token arrays into a ValueRows node. `first_row` holds the
+        already parsed Value nodes of row one.
+        """
+        rows = ValueRows(lparen.token)
+        cell_kinds = rows.cell_kinds
+        cell_values = rows.cell_values
+        cell_lines = rows.cell_lines
+        cell_cols = rows.cell_cols
+        rows.row_starts.append(0)
+        rows.row_lines.append(lparen.line)
+        rows.row_cols.append(lparen.col)
+        for value in first_row:
+            cell_kinds.append(KIND_BY_NAME[value.kind])
+            cell_values.append(value.value if value.kind == "PARAM" else value.literal)
+            cell_lines.append(value.line)
+            cell_cols.append(value.col)
+
+        tokens = self.tokens
+        kinds = self.kinds
+        literal = tokens.literal
+        lines = tokens.lines
+        cols = tokens.cols
+        count = self.count
+        pos = self.pos
+        while pos < count and kinds[pos] == COMMA:
+            pos += 1
+            if pos >= count or kinds[pos] != LPAREN:
+                break
+            rows.row_starts.append(len(cell_kinds))
+            rows.row_lines.append(lines[pos])
+            rows.row_cols.append(cols[pos])
+            pos += 1
+            while pos < count and kinds[pos] in VALUE_KINDS:
+                cell_kinds.append(kinds[pos])
+                cell_values.append(tokens.lexeme(pos) if kinds[pos] == PARAM else literal(pos))
+                cell_lines.append(lines[pos])
+                cell_cols.append(cols[pos])
+                pos += 1
+                if pos < count and kinds[pos] == COMMA:
+                    pos += 1
+                    continue
+                break
+            if pos < count and kinds[pos] == RPAREN and kinds[pos - 1] != LPAREN and kinds[pos - 1] != COMMA:
+                pos += 1
+                continue
+            # A bad row: let the usual matchers report the error
+            self.seek(pos)
+            if kinds[pos - 1] == LPAREN or kinds[pos - 1] == COMMA:
+                self.parse_value()
+            else:
+                self.match(RPAREN)
+            return rows
+
+        self.seek(pos)
+        if kinds[pos - 1] == COMMA:
+            self.match(LPAREN)
+        rows.value = f"{rows.row_count} rows"
+        return rows
+    #SelectStmt -> SELECT SelectList FROM IDENTIFIER WhereClause OrderByClause
     def parse_select_stmt(self):
         node = ParseNode("SelectStmt")
-        node.add(self.match("KEYWORD", "SELECT"))
-        
+        node.add(self.match_keyword(Kw.SELECT))
+
         # SelectList rule implementation
-        if self.current_token[1] == '*':
-             node.add(self.match("OPERATOR", "*"))
+        if self.at_operator('*'):
+            node.add(self.match(OPERATOR))
         else:
-            node.add(self.match("IDENTIFIER"))
-            while self.current_token and self.current_token[1] == ',':
+            node.add(self.match(IDENTIFIER))
+            while self.kind == COMMA and not self.failed:
                 self.advance()
-                node.add(self.match("IDENTIFIER"))
-                
-        node.add(self.match("KEYWORD", "FROM"))
-        node.add(self.match("IDENTIFIER"))
-        
-        if self.current_token and self.current_token[1] == "WHERE":
+                node.add(self.match(IDENTIFIER))
+
+        node.add(self.match_keyword(Kw.FROM))
+        node.add(self.match(IDENTIFIER))
+
+        if self.keyword == Kw.WHERE:
             node.add(self.parse_where_clause())
-            
+        if self.keyword == Kw.ORDER:
+            node.add(self.parse_order_by_clause())
+
+        return node
+
+    # OrderByClause -> ORDER BY SortKey { , SortKey }
+    # SortKey -> IDENTIFIER [ ASC | DESC ]
+    def parse_order_by_clause(self):
+        node = ParseNode("OrderByClause")
+        node.add(self.match_keyword(Kw.ORDER))
+        node.add(self.match_keyword(Kw.BY))
+        node.add(self.parse_sort_key())
+        while self.kind == COMMA and not self.failed:
+            self.advance()
+            node.add(self.parse_sort_key())
         return node
 
+    def parse_sort_key(self):
+        key = ParseNode("SortKey")
+        key.add(self.match(IDENTIFIER))
+        if self.keyword == Kw.ASC or self.keyword == Kw.DESC:
+            key.add(self.match(KEYWORD))
+        return key
+
     # UpdateStmt -> UPDATE IDENTIFIER SET IDENTIFIER = Value WhereClause
     def parse_update_stmt(self):
         node = ParseNode("UpdateStmt")
-        node.add(self.match("KEYWORD", "UPDATE"))
-        node.add(self.match("IDENTIFIER"))
-        node.add(self.match("KEYWORD", "SET"))
-        node.add(self.match("IDENTIFIER"))
-        node.add(self.match("OPERATOR", "="))
+        node.add(self.match_keyword(Kw.UPDATE))
+        node.add(self.match(IDENTIFIER))
+        node.add(self.match_keyword(Kw.SET))
+        node.add(self.match(IDENTIFIER))
+        node.add(self.match(OPERATOR, expected_val="="))
         node.add(self.parse_value())
-        if self.current_token and self.current_token[1] == "WHERE":
+        if self.keyword == Kw.WHERE:
             node.add(self.parse_where_clause())
         return node
 
     # DeleteStmt -> DELETE FROM IDENTIFIER WhereClause
     def parse_delete_stmt(self):
         node = ParseNode("DeleteStmt")
-        node.add(self.match("KEYWORD", "DELETE"))
-        node.add(self.match("KEYWORD", "FROM"))
-        node.add(self.match("IDENTIFIER"))
-        if self.current_token and self.current_token[1] == "WHERE":
+        node.add(self.match_keyword(Kw.DELETE))
+        node.add(self.match_keyword(Kw.FROM))
+        node.add(self.match(IDENTIFIER))
+        if self.keyword == Kw.WHERE:
             node.add(self.parse_where_clause())
         return node
 
+    # ExplainStmt -> EXPLAIN ( SelectStmt | UpdateStmt | DeleteStmt )
+    def parse_explain_stmt(self):
+        node = ParseNode("ExplainStmt")
+        node.add(self.match_keyword(Kw.EXPLAIN))
+        keyword = self.keyword
+        if keyword == Kw.SELECT:
+            node.add(self.parse_select_stmt())
+        elif keyword == Kw.UPDATE:
+            node.add(self.parse_update_stmt())
+        elif keyword == Kw.DELETE:
+            node.add(self.parse_delete_stmt())
+        else:
+            expected = tuple(KEYWORD_NAMES[kw] for kw in EXPLAINED_KEYWORDS)
+            self.error(BAD_STATEMENT_START, expected, "statement")
+        return node
+
     # WhereClause -> WHERE Condition
     def parse_where_clause(self):
         node = ParseNode("WhereClause")
-        node.add(self.match("KEYWORD", "WHERE"))
+        node.add(self.match_keyword(Kw.WHERE))
         node.add(self.parse_condition())
         return node
 
-    #  Condition Logic (Boolean Logic for WhereClause) 
+    #  Condition Logic (Boolean Logic for WhereClause)
+    #
+    #  Condition -> Condition OR Condition | Condition AND Condition
+    #             | NOT Condition | ( Condition ) | Comparison
+    #  (precedence NOT > AND > OR, AND/OR left-associative)
+    #
+    #  Parsed by operator precedence with explicit stacks, so nesting depth
+    #  is limited only by memory. The result is flattened: a chain of ANDs
+    #  is one n-ary Term node, a chain of ORs one n-ary Condition node,
+    #  parentheses leave no node behind, and a run of NOTs becomes a single
+    #  Factor node (or none, when the NOTs cancel out).
 
     def parse_condition(self):
-        node = ParseNode("Condition")
-        node.add(self.parse_term())
-        while self.current_token and self.current_token[1] == "OR":
-            node.add(self.match("KEYWORD", "OR"))
-            node.add(self.parse_term())
-        return node
+        operands = []   # parsed sub-conditions
+        operators = []  # pending (precedence, keyword node) pairs; None marks '('
+        open_parens = 0
 
-    def parse_term(self):
-        node = ParseNode("Term")
-        node.add(self.parse_factor())
-        while self.current_token and self.current_token[1] == "AND":
-            node.add(self.match("KEYWORD", "AND"))
-            node.add(self.parse_factor())
-        return node
+        while not self.failed:
+            # Prefix position: NOT / '(' / Comparison
+            keyword = self.keyword
+            if keyword == Kw.NOT:
+                operators.append((PREC_NOT, self.match_keyword(Kw.NOT)))
+                continue
+            if self.kind == LPAREN:
+                self.advance()
+                operators.append(None)
+                open_parens += 1
+                continue
+            operands.append(self.parse_comparison())
+            if self.failed:
+                return None
 
-    def parse_factor(self):
-        if self.current_token[1] == "NOT":
-            node = ParseNode("Factor")
-            node.add(self.match("KEYWORD", "NOT"))
-            node.add(self.parse_factor())
-            return node
-        elif self.current_token[1] == "(":
-            node = ParseNode("Factor")
-            self.match("LPAREN")
-            node.add(self.parse_condition())
-            self.match("RPAREN")
-            return node
-        else:
-            return self.parse_comparison()
+            # Infix position: AND / OR / ')' or the end of the condition
+            while True:
+                keyword = self.keyword
+                if keyword == Kw.AND or keyword == Kw.OR:
+                    prec = PREC_AND if keyword == Kw.AND else PREC_OR
+                    self._reduce_condition(operands, operators, prec)
+                    operators.append((prec, self.match(KEYWORD, keyword)))
+                    break
+                if self.kind == RPAREN and open_parens:
+                    self.advance()
+                    self._reduce_condition(operands, operators, 0)
+                    operators.pop()  # the '('
+                    open_parens -= 1
+                    continue
+                if open_parens:
+                    self.match(RPAREN)
+                    return None
+                self._reduce_condition(operands, operators, 0)
+                return operands[0]
+        return None
+
+    def _reduce_condition(self, operands, operators, prec):
+        """Apply pending operators that bind at least as tightly as prec."""
+        while operators and operators[-1] is not None and operators[-1][0] >= prec:
+            op_prec, keyword_node = operators.pop()
+            right = operands.pop()
+            if op_prec == PREC_NOT:
+                operands.append(negate_condition(right, keyword_node))
+            else:
+                name = "Term" if op_prec == PREC_AND else "Condition"
+                operands.append(join_conditions(name, operands.pop(), right, keyword_node))
 
     def parse_comparison(self):
         node = ParseNode("Comparison")
         # Left Operand
         node.add(self.parse_operand())
-        
+
         # Operator
-        node.add(self.match("OPERATOR"))
-        
+        node.add(self.match(OPERATOR))
+
         # Right Operand
         node.add(self.parse_operand())
         return node
 
     def parse_operand(self):
-        if self.current_token[0] in ["IDENTIFIER", "INTEGER", "FLOAT", "STRING"]:
-             node = ParseNode("Operand", self.current_token[1], self.current_token)
-             self.advance()
-             return node
-        
-        raise Exception(f"Expected Expression at {self.current_token[2]}:{self.current_token[3]}")
+        if self.failed:
+            return None
+        if self.kind in OPERAND_KINDS:
+            token = self.current_token
+            node = ParseNode("Operand", token[1], token)
+            node.literal = self.tokens.literal(self.pos)
+            self.advance()
+            return node
+
+        return self.expected("Expression", ("IDENTIFIER", "INTEGER", "FLOAT", "STRING", "PARAM"))
 
     def parse_value(self):
-        if self.current_token[0] in ["INTEGER", "FLOAT", "STRING"]:
-            node = ParseNode("Value", self.current_token[1], self.current_token)
+        if self.failed:
+            return None
+        if self.kind in VALUE_KINDS:
+            token = self.current_token
+            node = ParseNode("Value", token[1], token)
+            node.literal = self.tokens.literal(self.pos)
             self.advance()
             return node
-        raise Exception(f"Expected Value at {self.current_token[2]}:{self.current_token[3]}")
\ No newline at end of file
+        return self.expected("Value", ("INTEGER", "FLOAT", "STRING", "PARAM"))
@@ -0,0 +1,64 @@
+# pipeline.py
+# Streaming lex -> parse -> check, one statement at a time.
+#
+# Each ';'-terminated statement is tokenized, parsed and semantically checked
+# before the next one is read, so diagnostics are available as soon as their
+# statement has been seen, and a statement can be dropped once it has been
+# checked. Memory is bounded by the largest single statement rather than by
+# the whole script; only the symbol table (and the error messages) grow.
+
+from lexer import iter_statement_tokens, DEFAULT_CHUNK_SIZE
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+
+
+class StatementResult:
+    """Everything the pipeline produced for one statement."""
+
+    def __init__(self, tokens, statement, lex_errors, syntax_errors, semantic_errors):
+        self.tokens = tokens                  # TokenStream of this statement
+        self.statement = statement            # Statement node, or None if it failed to parse
+        self.lex_errors = lex_errors
+        self.syntax_errors = syntax_errors
+        self.semantic_errors = semantic_errors
+
+    @property
+    def errors(self):
+        return self.lex_errors + self.syntax_errors + self.semantic_errors
+
+
+def compile_statements(source, analyzer=None, chunk_size=DEFAULT_CHUNK_SIZE, cache=None):
+    """
+    Compile a str, file object or mmap statement by statement.
+    Yields a StatementResult per statement, in source order. `analyzer`
+    (a SemanticAnalyzer, created if not given) carries the symbol table
+    from one statement to the next. With a StatementCache, statements
+    whose shape was already seen skip parsing and checking.
+
+    Unlike the phase-by-phase driver, a syntax error does not stop
+    semantic analysis: every statement that parsed is checked.
+    """
+    if analyzer is None:
+        analyzer = SemanticAnalyzer()
+
+    lex_errors = []
+    for tokens in iter_statement_tokens(source, lex_errors, chunk_size):
+        found = lex_errors[:]
+        del lex_errors[:]
+
+        if cache is not None:
+            statement, syntax_errors, semantic_errors = cache.compile(tokens, analyzer)
+            yield StatementResult(tokens, statement, found, syntax_errors, semantic_errors)
+            continue
+
+        parser = Parser(tokens)
+        statement = None
+        semantic_errors = []
+        for statement in parser.iter_statements():
+            semantic_errors.extend(analyzer.analyze_statement(statement))
+
+        yield StatementResult(tokens, statement, found, parser.errors, semantic_errors)
+
+    # e.g. an unclosed comment after the last statement
+    if lex_errors:
+        yield StatementResult(None, None, lex_errors, [], [])
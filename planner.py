@@ -0,0 +1,866 @@
+# planner.py
+# Physical plans for SELECT, UPDATE and DELETE.
+#
+# Planner.plan() turns a checked statement into a chain of operators, each
+# with an estimated row count (EXPLAIN prints it):
+#
+#     Project      the selected columns, gathered at the final row ids
+#     Update       SET one column at the row ids below
+#     Delete       mark the row ids below dead
+#     Sort         ORDER BY keys; stable, so ties keep row order
+#     Filter       the WHERE clauses the access path did not answer
+#     SeqScan      every live row
+#     IndexScan    lookups and ranges in hash or ordered indexes, unioned;
+#                  in row order, or in index order for ORDER BY
+#     EmptyResult  a WHERE that can never hold
+#
+# The WHERE condition is first put into conjunctive normal form: NOTs are
+# pushed down into the comparisons (NOT a < 5 is a >= 5), ORs are
+# distributed over ANDs while that gives at most MAX_CLAUSES clauses (a
+# larger OR stays one clause, kept whole), comparisons of two literals are
+# folded, and repeated comparisons, clauses that always hold (a < 5 OR
+# a >= 5) and clauses implied by a single comparison are dropped.
+#
+# Each clause, an OR of comparisons, gets a selectivity from the table's
+# column statistics (distinct values, minimum and maximum) with the usual
+# System R formulas, clauses being taken as independent. Statistics are
+# gathered per column when first needed, from an evenly spaced sample of
+# about SAMPLE_ROWS rows, and again after ANALYZE_MIN_CHANGES rows plus
+# ANALYZE_RATIO of the table have changed. The number of distinct values
+# is scaled up from the sample with the Haas-Stokes (Duj1) estimator that
+# PostgreSQL's ANALYZE uses.
+#
+# Access paths are a sequential scan and, per indexed column, the index
+# lookup or range answering the clauses on that column; an OR of indexable
+# comparisons is a union of probes. With ORDER BY on one column, reading
+# its ordered index in order competes with sorting. The cheapest path by
+# the cost model below wins. Index answers are exact, so the clauses it
+# answered are left out of the Filter, whose remaining clauses run in
+# order of rank, cost / (1 - selectivity): cheap, selective tests first,
+# as the compiled predicate's `and` short-circuits.
+#
+# Projections are pushed down: the scans list the only columns any
+# operator above reads, and the selected columns are gathered once, after
+# filtering and sorting.
+
+import math
+from collections import Counter
+from itertools import compress
+
+from parser import ParseNode
+from predicates import COMPARISONS, MIRRORED, NEGATED
+
+# Most clauses an OR is distributed into; a larger OR is kept whole
+MAX_CLAUSES = 16
+
+# Statistics are gathered again once this many rows plus ANALYZE_RATIO of
+# the table have been inserted, updated or deleted
+ANALYZE_MIN_CHANGES = 50
+ANALYZE_RATIO = 0.1
+
+# Rows a column's statistics are gathered from
+SAMPLE_ROWS = 3000
+
+# Selectivity of a comparison the statistics cannot estimate
+DEFAULT_SELECTIVITY = 1 / 3
+
+# Cost model, in units of one row slot scanned with NumPy masks; the
+# ratios are rough timings from benchmark.py
+SCAN_ROW_COST = 1        # per row slot, WHERE evaluated as NumPy masks
+COMPILED_ROW_COST = 6    # per row id, WHERE as a compiled predicate
+INDEX_PROBE_COST = 40    # per index lookup or range
+INDEX_ROW_COST = 20      # per row id from an index, put back in row order
+ORDERED_ROW_COST = 6     # per row id read in index order
+SORT_ROW_COST = 0.6      # per row and log2(rows) of a sort
+TEXT_COMPARE_COST = 4    # a TEXT comparison, against a numeric one
+
+# Comparisons an index can answer (ranges need an ordered index)
+RANGE_OPERATORS = frozenset(("=", "<", "<=", ">", ">="))
+
+# (low, low_inclusive, high, high_inclusive) of an index range without bounds
+UNBOUNDED = (None, True, None, True)
+
+
+def column_ordinal(table, operand):
+    """Ordinal of the column an operand refers to, or None for a literal."""
+    if operand.kind == "IDENTIFIER":
+        return table.ordinals.get(operand.value)
+    return None
+
+
+def literal_value(operand):
+    """Value of a literal operand; None for an unbound parameter."""
+    if operand.kind == "PARAM":
+        return None
+    if operand.kind == "IDENTIFIER":
+        # an identifier that is not a column compares as its own name
+        return operand.value
+    return operand.literal
+
+
+def condition_text(node):
+    """A condition node written back as SQL."""
+    # post-order over an explicit stack of [node, texts of its finished
+    # children], so deeply nested conditions cannot overflow the Python stack
+    stack = [[node, []]]
+    while True:
+        node, parts = stack[-1]
+        name = node.name
+        if name == "Comparison":
+            left, op_node, right = node.children
+            text = f"{left.value} {op_node.value} {right.value}"
+        elif len(parts) < len(node.children):
+            stack.append([node.children[len(parts)], []])
+            continue
+        elif name == "Factor":
+            text = "NOT " + parts[0]
+        else:
+            text = (" AND " if name == "Term" else " OR ").join(parts)
+        stack.pop()
+        if not stack:
+            return text
+        stack[-1][1].append(text if name == "Comparison" else f"({text})")
+
+
+def negated_comparison(node):
+    """A Comparison for NOT node (NOT a < 5 is a >= 5)."""
+    left, op_node, right = node.children
+    op = NEGATED.get(op_node.value)
+    if op is None:
+        # not a comparison operator: left to execution to report
+        factor = ParseNode("Factor", "NOT")
+        factor.add(node)
+        return factor
+    negated = ParseNode("Comparison")
+    negated.add(left)
+    negated.add(ParseNode(op_node.name, op, op_node.token))
+    negated.add(right)
+    return negated
+
+
+def range_bounds(op, value):
+    """(low, low_inclusive, high, high_inclusive) of column <op> value."""
+    if op == "=":
+        return (value, True, value, True)
+    if op == "<" or op == "<=":
+        return (None, True, value, op == "<=")
+    return (value, op == ">=", None, True)
+
+
+def intersect_bounds(bounds, other):
+    """The range both bounds allow."""
+    low, low_inclusive, high, high_inclusive = bounds
+    other_low, other_low_inclusive, other_high, other_high_inclusive = other
+    if other_low is not None:
+        if low is None or other_low > low:
+            low, low_inclusive = other_low, other_low_inclusive
+        elif other_low == low:
+            low_inclusive = low_inclusive and other_low_inclusive
+    if other_high is not None:
+        if high is None or other_high < high:
+            high, high_inclusive = other_high, other_high_inclusive
+        elif other_high == high:
+            high_inclusive = high_inclusive and other_high_inclusive
+    return (low, low_inclusive, high, high_inclusive)
+
+
+class PlanError(Exception):
+    """A statement that cannot be planned for execution, e.g. one with unbound parameters."""
+
+    def __init__(self, message, node):
+        Exception.__init__(self, message)
+        self.node = node
+
+
+class Clause:
+    """
+    One conjunct of a condition in CNF: condition nodes ORed together,
+    Comparisons unless an OR too large to distribute was kept whole.
+    atoms has, per node, (ordinal, op, value) for a column compared with a
+    known literal, column first, and None for any other node.
+    """
+
+    def __init__(self, nodes, atoms):
+        self.nodes = nodes
+        self.atoms = atoms
+        self.selectivity = 1.0
+        self.cost = 1
+
+    def text(self):
+        text = " OR ".join(condition_text(node) for node in self.nodes)
+        return f"({text})" if len(self.nodes) > 1 else text
+
+    def condition(self):
+        """The clause as one condition node."""
+        if len(self.nodes) == 1:
+            return self.nodes[0]
+        node = ParseNode("Condition", "OR")
+        for child in self.nodes:
+            node.add(child)
+        return node
+
+
+class ColumnStatistics:
+    """
+    Number of distinct values, minimum and maximum of a column's live
+    values, estimated from a sample of them; rows is the number of values.
+    """
+
+    def __init__(self, sample, rows):
+        counts = Counter(sample)
+        distinct = len(counts)
+        taken = len(sample)
+        if distinct and taken < rows:
+            # Duj1: n*d / (n - f1 + f1*n/N), f1 the values seen once
+            once = sum(1 for count in counts.values() if count == 1)
+            estimate = taken * distinct / (taken - once + once * taken / rows)
+            distinct = min(rows, max(distinct, round(estimate)))
+        self.distinct = distinct
+        self.low = min(counts) if counts else None
+        self.high = max(counts) if counts else None
+        self.numeric = isinstance(self.low, (int, float))
+
+
+class TableStatistics:
+    """
+    Statistics of one executor table, as of its `changes` count; a
+    column is analyzed when first asked for.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.changes = table.changes
+        self.rows = len(table)
+        self.columns = {}  # ordinal -> ColumnStatistics
+
+    def column(self, ordinal):
+        stats = self.columns.get(ordinal)
+        if stats is None:
+            table = self.table
+            step = len(table.live) // SAMPLE_ROWS + 1
+            sample = table.columns[ordinal][::step]
+            if table.dead:
+                sample = list(compress(sample, table.live[::step]))
+            stats = self.columns[ordinal] = ColumnStatistics(sample, self.rows)
+        return stats
+
+    def stale(self):
+        return self.table.changes - self.changes > ANALYZE_MIN_CHANGES + ANALYZE_RATIO * self.rows
+
+
+# Operators
+
+class PlanNode:
+    """
+    One operator of a plan: `child` is its input (None for scans), `rows`
+    the estimated number of rows it yields.
+    """
+
+    ordered = False  # yields rows in ORDER BY order
+
+    def __init__(self, table, child=None, rows=0.0):
+        self.table = table
+        self.child = child
+        self.rows = rows
+
+    def describe(self):
+        return type(self).__name__
+
+    def explain(self):
+        """The plan as lines of text, one operator per line, inputs indented."""
+        lines = []
+        node = self
+        depth = 0
+        while node is not None:
+            prefix = " " * (4 * depth - 2) + "-> " if depth else ""
+            lines.append(f"{prefix}{node.describe()}  (rows={round(node.rows)})")
+            node = node.child
+            depth += 1
+        return lines
+
+    def _column_names(self, ordinals):
+        return ", ".join(self.table.column_names[ordinal] for ordinal in ordinals)
+
+
+class SeqScan(PlanNode):
+    """Every live row, in row order; `columns` are the ordinals read above."""
+
+    def __init__(self, table, rows, columns):
+        PlanNode.__init__(self, table, None, rows)
+        self.columns = columns
+
+    def describe(self):
+        text = f"Seq Scan on {self.table.name}"
+        if self.columns:
+            text += f" (reads {self._column_names(sorted(self.columns))})"
+        return text
+
+
+class IndexScan(PlanNode):
+    """
+    Rows found through indexes. probes are (index, bounds) pairs, bounds a
+    (low, low_inclusive, high, high_inclusive) range with low == high for
+    a lookup; their rows are unioned. `fetched` estimates the row ids read
+    from the indexes, `clauses` are the clauses answered. With ordered (one
+    probe of an OrderedIndex) rows come in index order, else in row order.
+    """
+
+    def __init__(self, table, probes, clauses, rows, fetched, columns, ordered=False, reverse=False):
+        PlanNode.__init__(self, table, None, rows)
+        self.probes = probes
+        self.clauses = clauses
+        self.fetched = fetched
+        self.columns = columns
+        self.ordered = ordered
+        self.reverse = reverse
+
+    def describe(self):
+        names = ", ".join(dict.fromkeys(index.name for index, _ in self.probes))
+        text = f"Index Scan {names} on {self.table.name}"
+        if self.clauses:
+            text += ": " + " AND ".join(clause.text() for clause in self.clauses)
+        if self.ordered:
+            text += " (in descending order)" if self.reverse else " (in order)"
+        if self.columns:
+            text += f" (reads {self._column_names(sorted(self.columns))})"
+        return text
+
+
+class Filter(PlanNode):
+    """Rows of the child for which every clause holds; condition is the node evaluated."""
+
+    def __init__(self, table, child, clauses, rows):
+        PlanNode.__init__(self, table, child, rows)
+        self.clauses = clauses
+        if len(clauses) == 1:
+            self.condition = clauses[0].condition()
+        else:
+            self.condition = ParseNode("Term", "AND")
+            for clause in clauses:
+                self.condition.add(clause.condition())
+
+    def describe(self):
+        return "Filter " + " AND ".join(clause.text() for clause in self.clauses)
+
+
+class Sort(PlanNode):
+    """The child's rows sorted by keys, (ordinal, descending) pairs."""
+
+    ordered = True
+
+    def __init__(self, table, child, keys, rows):
+        PlanNode.__init__(self, table, child, rows)
+        self.keys = keys
+
+    def describe(self):
+        return "Sort " + ", ".join(self.table.column_names[ordinal] + (" DESC" if descending else "")
+                                   for ordinal, descending in self.keys)
+
+
+class Project(PlanNode):
+    """The selected columns (ordinals) at the child's rows."""
+
+    def __init__(self, table, child, ordinals, rows):
+        PlanNode.__init__(self, table, child, rows)
+        self.ordinals = ordinals
+
+    def describe(self):
+        return f"Project {self._column_names(self.ordinals)}"
+
+
+class Update(PlanNode):
+    """Set column `ordinal` in the child's rows."""
+
+    def __init__(self, table, child, ordinal, rows):
+        PlanNode.__init__(self, table, child, rows)
+        self.ordinal = ordinal
+
+    def describe(self):
+        return f"Update {self.table.name} SET {self.table.column_names[self.ordinal]}"
+
+
+class Delete(PlanNode):
+    """Delete the child's rows."""
+
+    def describe(self):
+        return f"Delete from {self.table.name}"
+
+
+class EmptyResult(PlanNode):
+    """No rows: the WHERE clause can never hold."""
+
+    def describe(self):
+        return "Empty Result (WHERE is always false)"
+
+
+class Planner:
+    """
+    Plans statements on executor tables. vectorized tells the cost model
+    whether a sequential scan evaluates WHERE with NumPy masks.
+    """
+
+    def __init__(self, vectorized=False):
+        self.scan_row_cost = SCAN_ROW_COST if vectorized else COMPILED_ROW_COST
+        self.statistics = {}  # table name -> TableStatistics
+
+    def table_statistics(self, table):
+        stats = self.statistics.get(table.name)
+        if stats is None or stats.table is not table or stats.stale():
+            stats = self.statistics[table.name] = TableStatistics(table)
+        return stats
+
+    def plan(self, table, node):
+        """The plan for a checked SelectStmt, UpdateStmt or DeleteStmt node on table."""
+        children = node.children
+        if node.name == "SelectStmt":
+            keys = []
+            if children[-1].name == "OrderByClause":
+                for key in children[-1].children[2:]:
+                    descending = len(key.children) > 1 and key.children[1].value == "DESC"
+                    keys.append((table.ordinals[key.children[0].value], descending))
+                children = children[:-1]
+            from_index = next(k for k, child in enumerate(children) if child.value == "FROM")
+            selected = children[1:from_index]
+            if selected[0].value == "*":
+                ordinals = list(range(len(table.columns)))
+            else:
+                ordinals = [table.ordinals[column_node.value] for column_node in selected]
+            columns = set(ordinals)
+            columns.update(ordinal for ordinal, _ in keys)
+            access = self._access(table, children[-1], keys, columns)
+            return Project(table, access, ordinals, access.rows)
+        if node.name == "UpdateStmt":
+            ordinal = table.ordinals[children[3].value]
+            access = self._access(table, children[-1], (), {ordinal})
+            return Update(table, access, ordinal, access.rows)
+        access = self._access(table, children[-1], (), set())
+        return Delete(table, access, access.rows)
+
+    # Access paths
+
+    def _access(self, table, where_node, keys, columns):
+        """
+        The cheapest way to get the rows matching where_node (if it is a
+        WhereClause) in ORDER BY keys order: a scan, with a Filter for the
+        clauses the scan does not answer and a Sort unless it yields the
+        rows in order.
+        """
+        stats = self.table_statistics(table)
+        clauses = []
+        if where_node.name == "WhereClause":
+            clauses = self.clauses(table, where_node.children[1])
+            if clauses is None:
+                return EmptyResult(table)
+        for clause in clauses:
+            self._estimate_clause(table, stats, clause)
+            for node, atom in zip(clause.nodes, clause.atoms):
+                if atom is not None:
+                    columns.add(atom[0])
+                else:
+                    self._node_columns(table, node, columns)
+
+        best = None
+        for scan in [SeqScan(table, len(table), columns)] + self._index_paths(table, stats, clauses, keys, columns):
+            answered = scan.clauses if type(scan) is IndexScan else ()
+            residual = [clause for clause in clauses if clause not in answered]
+            rows = scan.rows
+            for clause in residual:
+                rows *= clause.selectivity
+            cost = self._scan_cost(scan, residual)
+            if keys and not scan.ordered:
+                cost += rows * math.log2(rows + 2) * SORT_ROW_COST
+            if best is None or cost < best[0]:
+                best = (cost, scan, residual, rows)
+
+        _, scan, residual, rows = best
+        plan = scan
+        if residual:
+            residual.sort(key=lambda clause: -(1 - clause.selectivity) / clause.cost)
+            plan = Filter(table, plan, residual, rows)
+        if keys and not scan.ordered:
+            plan = Sort(table, plan, keys, rows)
+        return plan
+
+    def _scan_cost(self, scan, residual):
+        if type(scan) is SeqScan:
+            return scan.rows * self.scan_row_cost if residual else 0
+        row_cost = ORDERED_ROW_COST if scan.ordered else INDEX_ROW_COST
+        cost = len(scan.probes) * INDEX_PROBE_COST + scan.fetched * row_cost
+        if residual:
+            cost += scan.rows * COMPILED_ROW_COST
+        return cost
+
+    def _index_paths(self, table, stats, clauses, keys, columns):
+        """IndexScans for the ways the table's indexes can answer some of the clauses."""
+        total = len(table)
+        paths = []
+        units = {}  # ordinal -> clauses that are one indexable comparison on it
+        for clause in clauses:
+            atoms = clause.atoms
+            if any(atom is None or atom[1] not in RANGE_OPERATORS for atom in atoms):
+                continue
+            if len(atoms) == 1:
+                units.setdefault(atoms[0][0], []).append(clause)
+                continue
+            # an OR of indexable comparisons (IN-style): one probe each
+            probes = []
+            fetched = 0.0
+            for ordinal, op, value in atoms:
+                index = table.index_on(ordinal, ordered=op != "=")
+                if index is None:
+                    break
+                probes.append((index, range_bounds(op, value)))
+                fetched += total * self._atom_selectivity(stats, ordinal, op, value)
+            else:
+                paths.append(IndexScan(table, probes, [clause], total * clause.selectivity,
+                                       fetched, columns))
+
+        sort_ordinal = keys[0][0] if len(keys) == 1 else None
+        for ordinal, unit in units.items():
+            index = table.index_on(ordinal)
+            equal = next((clause for clause in unit if clause.atoms[0][1] == "="), None)
+            if equal is not None and index is not None and index is not table.index_on(ordinal, ordered=True):
+                rows = total * equal.selectivity
+                value = equal.atoms[0][2]
+                paths.append(IndexScan(table, [(index, (value, True, value, True))], [equal], rows, rows, columns))
+            index = table.index_on(ordinal, ordered=True)
+            if index is None:
+                continue
+            bounds = UNBOUNDED
+            for clause in unit:
+                _, op, value = clause.atoms[0]
+                bounds = intersect_bounds(bounds, range_bounds(op, value))
+            rows = total * self._range_selectivity(stats.column(ordinal), bounds)
+            paths.append(IndexScan(table, [(index, bounds)], unit, rows, rows, columns))
+            if ordinal == sort_ordinal:
+                paths.append(IndexScan(table, [(index, bounds)], unit, rows, rows, columns,
+                                       ordered=True, reverse=keys[0][1]))
+
+        if sort_ordinal is not None and sort_ordinal not in units:
+            index = table.index_on(sort_ordinal, ordered=True)
+            if index is not None:
+                paths.append(IndexScan(table, [(index, UNBOUNDED)], [], total, total, columns,
+                                       ordered=True, reverse=keys[0][1]))
+        return paths
+
+    # CNF
+
+    def clauses(self, table, condition):
+        """
+        The condition as a simplified list of Clauses (CNF), in condition
+        order; None if it can never hold. Raises PlanError for a parameter.
+        """
+        clauses = []
+        seen = set()   # comparison keys of each kept clause, as frozensets
+        units = set()  # keys of the single-comparison clauses
+        for nodes in self._cnf(condition, False):
+            kept = []
+            atoms = []
+            keys = set()
+            holds = False
+            for node in nodes:
+                atom = self._atom(table, node)
+                if atom is not None:
+                    ordinal, op, value = atom
+                    key = (ordinal, "!=" if op == "<>" else op, (value,))
+                elif node.name == "Comparison":
+                    folded = self._fold(table, node)
+                    if folded is not None:
+                        if folded:
+                            holds = True
+                            break
+                        continue  # false, drops out of the OR
+                    key = self._comparison_key(table, node)
+                else:
+                    key = None
+                if key is not None:
+                    if key in keys:
+                        continue
+                    if (key[0], NEGATED[key[1]], key[2]) in keys:
+                        holds = True  # x OR NOT x
+                        break
+                    keys.add(key)
+                kept.append(node)
+                atoms.append(atom)
+            if holds:
+                continue
+            if not kept:
+                return None
+            if len(keys) == len(kept):
+                keys = frozenset(keys)
+                if keys in seen:
+                    continue
+                seen.add(keys)
+                if len(keys) == 1:
+                    units.update(keys)
+            else:
+                keys = None
+            clauses.append((Clause(kept, atoms), keys))
+        # absorption: a AND (a OR b) is a
+        return [clause for clause, keys in clauses
+                if keys is None or len(keys) == 1 or not keys & units]
+
+    def _cnf(self, node, negate):
+        """CNF of node (or of NOT node) as a list of clauses, lists of nodes."""
+        # post-order over an explicit stack of [node, negate, CNFs of its
+        # finished children]; a NOT only flips negate for its child
+        stack = [[node, negate, []]]
+        while True:
+            node, negate, parts = stack[-1]
+            name = node.name
+            if name == "Comparison":
+                for operand in (node.children[0], node.children[2]):
+                    if operand.kind == "PARAM":
+                        raise PlanError("Cannot execute a statement with unbound parameters", operand)
+                clauses = [[negated_comparison(node) if negate else node]]
+            elif name != "Factor" and name != "Term" and name != "Condition":
+                clauses = [[self._negated(node) if negate else node]]
+            elif len(parts) < len(node.children):
+                stack.append([node.children[len(parts)], negate != (name == "Factor"), []])
+                continue
+            elif name == "Factor":
+                clauses = parts[0]
+            elif (name == "Term") != negate:
+                clauses = [clause for part in parts for clause in part]
+            else:
+                # an OR: distribute it over the clauses of its operands
+                clauses = [[]]
+                for part in parts:
+                    if len(clauses) * len(part) > MAX_CLAUSES:
+                        clauses = [[self._negated(node) if negate else node]]
+                        break
+                    clauses = [clause + other for clause in clauses for other in part]
+            stack.pop()
+            if not stack:
+                return clauses
+            stack[-1][2].append(clauses)
+
+    def _negated(self, node):
+        factor = ParseNode("Factor", "NOT")
+        factor.add(node)
+        return factor
+
+    def _fold(self, table, node):
+        """True or False for a comparison of two known literals, else None."""
+        left, op_node, right = node.children
+        compare = COMPARISONS.get(op_node.value)
+        if compare is None or column_ordinal(table, left) is not None or column_ordinal(table, right) is not None:
+            return None
+        left_value = literal_value(left)
+        right_value = literal_value(right)
+        if left_value is None or right_value is None:
+            return None
+        try:
+            return compare(left_value, right_value)
+        except TypeError:
+            return None
+
+    def _comparison_key(self, table, node):
+        """
+        A hashable form of a comparison, column first, literals as 1-tuples;
+        None with a parameter. clauses() builds atoms' keys directly.
+        """
+        left, op_node, right = node.children
+        op = op_node.value
+        if op not in NEGATED:
+            return None
+        if op == "<>":
+            op = "!="
+        operands = []
+        for operand in (left, right):
+            ordinal = column_ordinal(table, operand)
+            if ordinal is not None:
+                operands.append(ordinal)
+            elif operand.kind == "PARAM":
+                return None
+            else:
+                operands.append((literal_value(operand),))
+        if type(operands[0]) is not int and type(operands[1]) is int:
+            operands.reverse()
+            op = MIRRORED[op]
+        return (operands[0], op, operands[1])
+
+    def _atom(self, table, node):
+        """(ordinal, op, value) for a column compared with a known literal, else None."""
+        if node.name != "Comparison":
+            return None
+        left, op_node, right = node.children
+        op = op_node.value
+        if op not in COMPARISONS:
+            return None
+        ordinal = column_ordinal(table, left)
+        if ordinal is None:
+            ordinal = column_ordinal(table, right)
+            if ordinal is None:
+                return None
+            op = MIRRORED[op]
+            right = left
+        elif column_ordinal(table, right) is not None:
+            return None
+        value = literal_value(right)
+        return None if value is None else (ordinal, op, value)
+
+    def _node_columns(self, table, node, columns):
+        """Add the ordinals of the columns a condition node reads."""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.name == "Comparison":
+                for operand in (node.children[0], node.children[2]):
+                    ordinal = column_ordinal(table, operand)
+                    if ordinal is not None:
+                        columns.add(ordinal)
+            else:
+                stack.extend(node.children)
+
+    # Selectivity
+
+    def _estimate_clause(self, table, stats, clause):
+        """Set a clause's selectivity and cost, and order its nodes likeliest first."""
+        if len(clause.nodes) == 1:
+            node, atom = clause.nodes[0], clause.atoms[0]
+            if atom is not None:
+                clause.selectivity = self._atom_selectivity(stats, *atom)
+                clause.cost = self._atom_cost(table, atom)
+            else:
+                clause.selectivity = self._estimate(table, stats, node)
+                clause.cost = self._node_cost(table, node)
+            return
+        estimates = []
+        for node, atom in zip(clause.nodes, clause.atoms):
+            if atom is not None:
+                estimates.append((self._atom_selectivity(stats, *atom), self._atom_cost(table, atom), node, atom))
+            else:
+                estimates.append((self._estimate(table, stats, node), self._node_cost(table, node), node, atom))
+        estimates.sort(key=lambda estimate: -estimate[0] / estimate[1])
+        unmatched = 1.0
+        for selectivity, _, _, _ in estimates:
+            unmatched *= 1 - selectivity
+        clause.selectivity = 1 - unmatched
+        clause.cost = sum(estimate[1] for estimate in estimates)
+        clause.nodes = [estimate[2] for estimate in estimates]
+        clause.atoms = [estimate[3] for estimate in estimates]
+
+    def _estimate(self, table, stats, node):
+        """Estimated fraction of rows for which a condition node holds."""
+        # post-order over an explicit stack of [node, estimates of its
+        # finished children]
+        stack = [[node, []]]
+        while True:
+            node, parts = stack[-1]
+            name = node.name
+            if name == "Comparison":
+                atom = self._atom(table, node)
+                if atom is not None:
+                    selectivity = self._atom_selectivity(stats, *atom)
+                else:
+                    selectivity = self._other_selectivity(table, stats, node)
+            elif name != "Factor" and name != "Term" and name != "Condition":
+                selectivity = DEFAULT_SELECTIVITY
+            elif len(parts) < len(node.children):
+                stack.append([node.children[len(parts)], []])
+                continue
+            elif name == "Factor":
+                selectivity = 1 - parts[0]
+            elif name == "Term":
+                selectivity = 1.0
+                for part in parts:
+                    selectivity *= part
+            else:
+                unmatched = 1.0
+                for part in parts:
+                    unmatched *= 1 - part
+                selectivity = 1 - unmatched
+            stack.pop()
+            if not stack:
+                return selectivity
+            stack[-1][1].append(selectivity)
+
+    def _other_selectivity(self, table, stats, node):
+        """Selectivity of a comparison of two columns, or with a parameter."""
+        left, op_node, right = node.children
+        op = op_node.value
+        ordinals = [ordinal for ordinal in (column_ordinal(table, left), column_ordinal(table, right))
+                    if ordinal is not None]
+        if not ordinals or op not in NEGATED:
+            return DEFAULT_SELECTIVITY
+        equal = 1 / max([stats.column(ordinal).distinct for ordinal in ordinals] + [1])
+        if op == "=":
+            return equal
+        if op == "!=" or op == "<>":
+            return 1 - equal
+        return DEFAULT_SELECTIVITY
+
+    def _atom_selectivity(self, stats, ordinal, op, value):
+        column = stats.column(ordinal)
+        if op == "=":
+            return self._equal(column, value)
+        if op == "!=" or op == "<>":
+            return 1 - self._equal(column, value)
+        if op == "<":
+            return self._below(column, value, False)
+        if op == "<=":
+            return self._below(column, value, True)
+        if op == ">":
+            return 1 - self._below(column, value, True)
+        return 1 - self._below(column, value, False)
+
+    def _range_selectivity(self, column, bounds):
+        low, low_inclusive, high, high_inclusive = bounds
+        above = 0.0 if low is None else self._below(column, low, not low_inclusive)
+        below = 1.0 if high is None else self._below(column, high, high_inclusive)
+        return max(0.0, below - above)
+
+    def _equal(self, column, value):
+        """Estimated fraction of a column's values equal to value."""
+        if not column.distinct:
+            return 0.0
+        try:
+            if value < column.low or value > column.high:
+                return 0.0
+        except TypeError:
+            pass
+        return 1 / column.distinct
+
+    def _below(self, column, value, inclusive):
+        """Estimated fraction of a column's values below value (or equal, if inclusive)."""
+        if not column.distinct:
+            return 0.0
+        equal = self._equal(column, value)
+        try:
+            if value < column.low:
+                return 0.0
+            if value > column.high:
+                return 1.0
+            if column.numeric and isinstance(value, (int, float)) and column.high > column.low:
+                # values taken as spread evenly between the minimum and maximum
+                less = (value - column.low) / (column.high - column.low) * (1 - equal)
+            else:
+                less = 0.0 if value == column.low else (1 - equal) / 2
+        except TypeError:
+            return DEFAULT_SELECTIVITY
+        return min(1.0, less + equal if inclusive else less)
+
+    def _atom_cost(self, table, atom):
+        return TEXT_COMPARE_COST if table.column_types[atom[0]] == "TEXT" else 1
+
+    def _node_cost(self, table, node):
+        """Relative cost of evaluating a condition node for one row: the sum over its comparisons."""
+        cost = 0
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.name != "Comparison":
+                if node.children:
+                    stack.extend(node.children)
+                else:
+                    cost += 1
+                continue
+            for operand in (node.children[0], node.children[2]):
+                ordinal = column_ordinal(table, operand)
+                if ordinal is not None and table.column_types[ordinal] == "TEXT":
+                    cost += TEXT_COMPARE_COST
+                    break
+            else:
+                cost += 1
+        return cost
@@ -0,0 +1,227 @@
+# predicates.py
+# WHERE conditions compiled to Python functions over columnar tables.
+#
+# CompiledPredicate walks a checked condition tree once. Column operands are
+# resolved through the symbol table to their ordinals; every other operand
+# becomes a numbered literal slot. The whole condition is then written out
+# as one Python expression inside generated source and passed through
+# compile(). For  WHERE salary > 50000 AND NOT dept = 3  on a table whose
+# salary and dept columns have ordinals 2 and 3, the source is:
+#
+#     def bind(columns, literals):
+#         c2 = columns[2]
+#         c3 = columns[3]
+#         v0, v1 = literals
+#         def select(rows):
+#             if type(rows) is range:
+#                 return [i for i, x2, x3 in zip(rows, c2, c3) if (x2 > v0 and not x3 == v1)]
+#             return [i for i in rows if (c2[i] > v0 and not c3[i] == v1)]
+#         return select
+#
+# select(rows) returns the row ids in rows for which the condition holds,
+# without walking the tree or looking at a node name per row.
+#
+# Literal values are arguments of bind(), so conditions that differ only in
+# their literals share one compiled function. PredicateCache keeps compiled
+# predicates by fingerprint: the table, its schema version and the shape of
+# the condition with literals reduced to their kind (as
+# statement_cache.fingerprint does for tokens). A condition nested deeper
+# than MAX_COMPILED_DEPTH is not compiled: CPython's parser rejects deeply
+# nested expressions, so the cache records None and the executor evaluates
+# that condition without generated code.
+
+import operator
+from collections import OrderedDict
+
+DEFAULT_CAPACITY = 256
+
+# Deepest condition tree (in Term/Condition/Factor levels) that is compiled;
+# each level is a parenthesis or a `not` in the generated expression
+MAX_COMPILED_DEPTH = 100
+
+# Python spelling of each comparison operator
+PYTHON_OPERATORS = {"=": "==", "!=": "!=", "<>": "!=", "<": "<", ">": ">", "<=": "<=", ">=": ">="}
+
+COMPARISONS = {
+    "=": operator.eq, "!=": operator.ne, "<>": operator.ne,
+    "<": operator.lt, ">": operator.gt, "<=": operator.le, ">=": operator.ge,
+}
+
+# The operator with its operands swapped: 5 < a is a > 5
+MIRRORED = {"=": "=", "!=": "!=", "<>": "<>", "<": ">", ">": "<", "<=": ">=", ">=": "<="}
+
+# The operator of the negated comparison: NOT a < 5 is a >= 5
+NEGATED = {"=": "!=", "!=": "=", "<>": "=", "<": ">=", ">=": "<", ">": "<=", "<=": ">"}
+
+
+class PredicateError(Exception):
+    """A condition that cannot be compiled, e.g. one using a non-comparison operator."""
+
+    def __init__(self, message, node):
+        Exception.__init__(self, message)
+        self.node = node
+
+
+def condition_fingerprint(table_name, node, symbol_table):
+    """
+    (key, operands) for a condition node: the cache key, and the operand
+    nodes of its comparisons in preorder (what literal slots index into).
+    """
+    shape = []
+    operands = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        name = node.name
+        if name == "Comparison":
+            left, op_node, right = node.children
+            shape.append(op_node.value)
+            for operand in (left, right):
+                operands.append(operand)
+                shape.append(operand.kind)
+                if operand.kind == "IDENTIFIER":
+                    shape.append(operand.value)
+        else:
+            shape.append((name, len(node.children)))
+            stack.extend(reversed(node.children))
+    return (table_name, symbol_table.schema_version(table_name), tuple(shape)), operands
+
+
+def condition_depth(node):
+    """Nesting depth of a condition tree (a single comparison is depth 0)."""
+    deepest = 0
+    stack = [(node, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if node.name != "Comparison":
+            depth += 1
+            deepest = max(deepest, depth)
+            stack.extend((child, depth) for child in node.children)
+    return deepest
+
+
+class CompiledPredicate:
+    """
+    A condition on one table compiled to Python. bind(columns, literals)
+    gives the select(rows) function for a table's columns and the values
+    of the literal slots; rows is a list of row ids, or a range over every
+    row slot.
+    """
+
+    def __init__(self, node, table_name, symbol_table):
+        self.table_name = table_name
+        self.literal_slots = []  # index into the operands, per literal slot
+        self.ordinals = set()
+        self._operand_count = 0
+        indexed, zipped = self._expression(node, symbol_table)
+
+        lines = ["def bind(columns, literals):"]
+        ordinals = sorted(self.ordinals)
+        lines.extend(f"    c{k} = columns[{k}]" for k in ordinals)
+        if self.literal_slots:
+            slots = ", ".join(f"v{k}" for k in range(len(self.literal_slots)))
+            lines.append(f"    {slots}{',' if len(self.literal_slots) == 1 else ''} = literals")
+        lines.append("    def select(rows):")
+        if ordinals:
+            names = "".join(f", x{k}" for k in ordinals)
+            columns = "".join(f", c{k}" for k in ordinals)
+            lines.append("        if type(rows) is range:")
+            lines.append(f"            return [i for i{names} in zip(rows{columns}) if {zipped}]")
+        lines.append(f"        return [i for i in rows if {indexed}]")
+        lines.append("    return select")
+        self.source = "\n".join(lines) + "\n"
+
+        namespace = {}
+        exec(compile(self.source, f"<where {table_name}>", "exec"), namespace)
+        self.bind = namespace["bind"]
+
+    def _expression(self, node, symbol_table):
+        """(indexed, zipped) Python expressions for a condition node."""
+        # Post-order over an explicit stack of [node, finished child parts];
+        # children are entered left to right, so operands are numbered in
+        # preorder as in condition_fingerprint()
+        stack = [[node, []]]
+        while True:
+            node, parts = stack[-1]
+            name = node.name
+            if name == "Comparison":
+                left, op_node, right = node.children
+                op = PYTHON_OPERATORS.get(op_node.value)
+                if op is None:
+                    raise PredicateError(f"'{op_node.value}' is not a comparison operator", op_node)
+                left_indexed, left_zipped = self._operand(left, symbol_table)
+                right_indexed, right_zipped = self._operand(right, symbol_table)
+                done = f"{left_indexed} {op} {right_indexed}", f"{left_zipped} {op} {right_zipped}"
+            elif name == "Factor" or name == "Term" or name == "Condition":
+                if len(parts) < len(node.children):
+                    stack.append([node.children[len(parts)], []])
+                    continue
+                if name == "Factor":
+                    indexed, zipped = parts[0]
+                    done = f"not {indexed}", f"not {zipped}"
+                else:
+                    joiner = " and " if name == "Term" else " or "
+                    done = ("(" + joiner.join(indexed for indexed, _ in parts) + ")",
+                            "(" + joiner.join(zipped for _, zipped in parts) + ")")
+            else:
+                raise PredicateError(f"Cannot evaluate '{name}' in a WHERE clause", node)
+            stack.pop()
+            if not stack:
+                return done
+            stack[-1][1].append(done)
+
+    def _operand(self, node, symbol_table):
+        index = self._operand_count
+        self._operand_count += 1
+        if node.kind == "IDENTIFIER":
+            column = symbol_table.resolve_column(self.table_name, node.value)
+            if column is not None:
+                self.ordinals.add(column.ordinal)
+                return f"c{column.ordinal}[i]", f"x{column.ordinal}"
+        slot = f"v{len(self.literal_slots)}"
+        self.literal_slots.append(index)
+        return slot, slot
+
+
+class PredicateCache:
+    """
+    Bounded LRU cache of CompiledPredicates by condition fingerprint. A
+    schema change gives a table a new version, so stale entries are never
+    hit and age out. Conditions too deep to compile are cached as None.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.entries = OrderedDict()  # fingerprint -> CompiledPredicate
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, table_name, node, symbol_table):
+        """
+        (CompiledPredicate, operand nodes) for a condition node on
+        table_name; the predicate is None if the condition is nested deeper
+        than MAX_COMPILED_DEPTH.
+        """
+        key, operands = condition_fingerprint(table_name, node, symbol_table)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key], operands
+
+        self.misses += 1
+        predicate = None
+        if condition_depth(node) <= MAX_COMPILED_DEPTH:
+            predicate = CompiledPredicate(node, table_name, symbol_table)
+        self.entries[key] = predicate
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return predicate, operands
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries),
+                "evictions": self.evictions}
@@ -0,0 +1,125 @@
+# prepared.py
+# Prepared statements: compile once, then bind parameter values per use.
+#
+# prepare() lexes, parses and semantically checks a statement containing ?
+# or :name parameters a single time. Semantic analysis gives every parameter
+# the type of the column it is compared with or assigned to, so bind() only
+# has to check the Python types of the values it is given.
+
+from lexer import tokenize
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+
+# Python value types accepted for each column type (bool is excluded on
+# purpose: it is an int subclass, but not an SQL number here)
+ACCEPTED_TYPES = {
+    "INT": (int, float),
+    "FLOAT": (int, float),
+    "TEXT": (str,),
+    None: (int, float, str),
+}
+
+VALUE_TYPE_NAMES = {int: "INT", float: "FLOAT", str: "TEXT"}
+
+
+class Parameter:
+    """One ? or :name occurrence in a prepared statement."""
+
+    def __init__(self, node, index):
+        self.node = node
+        self.index = index            # 0-based position among the parameters
+        self.name = node.value        # '?' or ':name'
+        self.expected_type = node.data_type
+        self.accepted = ACCEPTED_TYPES[node.data_type]
+
+    def describe(self):
+        return f"Parameter {self.index + 1} ({self.name}) at line {self.node.line}, position {self.node.col}"
+
+
+class PreparedStatement:
+    """
+    A statement compiled once. errors holds the lexical, syntax and
+    semantic errors found by prepare(); bind() refuses to run if there
+    were any.
+    """
+
+    def __init__(self, sql, statement, parameters, errors):
+        self.sql = sql
+        self.statement = statement
+        self.parameters = parameters
+        self.errors = errors
+        self.named = bool(parameters) and parameters[0].name != "?"
+        if self.named:
+            self.names = list(dict.fromkeys(p.name[1:] for p in parameters))
+
+    def bind(self, params=()):
+        """
+        Check a tuple of values (for ?) or a mapping name -> value (for
+        :name) against the parameter types. Returns a list of errors;
+        empty means the values can be bound.
+        """
+        if self.errors:
+            return ["Bind Error: Statement was not prepared successfully"]
+
+        if self.named:
+            missing = [name for name in self.names if name not in params]
+            if missing:
+                return [f"Bind Error: Missing value for parameter ':{name}'" for name in missing]
+            values = [params[p.name[1:]] for p in self.parameters]
+        else:
+            values = params
+            if len(values) != len(self.parameters):
+                return [f"Bind Error: Expected {len(self.parameters)} parameters, got {len(values)}"]
+
+        errors = None
+        for value, parameter in zip(values, self.parameters):
+            if type(value) not in parameter.accepted:
+                if errors is None:
+                    errors = []
+                errors.append(self._type_error(parameter, value))
+        return errors or []
+
+    def _type_error(self, parameter, value):
+        value_type = VALUE_TYPE_NAMES.get(type(value))
+        if value_type is None:
+            return f"Bind Error: {parameter.describe()} has an unsupported value {value!r}"
+        return (f"Bind Error: Type mismatch. {parameter.describe()} expects {parameter.expected_type}, "
+                f"but a {value_type} value was provided")
+
+
+def prepare(sql, analyzer=None):
+    """
+    Compile one statement that may contain ? or :name parameters.
+    `analyzer` supplies the symbol table (a fresh SemanticAnalyzer if not
+    given). Returns a PreparedStatement; check its errors before binding.
+    """
+    if analyzer is None:
+        analyzer = SemanticAnalyzer()
+
+    tokens, errors = tokenize(sql)
+    parser = Parser(tokens)
+    statements = list(parser.iter_statements())
+    errors += parser.errors
+    if not errors and len(statements) != 1:
+        errors.append(f"Prepare Error: Expected exactly one statement, found {len(statements)}")
+    for statement in statements:
+        errors += analyzer.analyze_statement(statement)
+
+    statement = statements[0] if len(statements) == 1 else None
+    nodes = []
+    if statement is not None:
+        stack = [statement]
+        while stack:
+            node = stack.pop()
+            if node.kind == "PARAM":
+                nodes.append(node)
+            elif node.name == "ValueRows":
+                nodes.extend(node.parameters())
+            stack.extend(node.children)
+    nodes.sort(key=lambda node: (node.line, node.col))
+    parameters = [Parameter(node, k) for k, node in enumerate(nodes)]
+
+    if len({p.name == "?" for p in parameters}) > 1:
+        errors.append("Prepare Error: Cannot mix ? and :name parameters in one statement")
+
+    return PreparedStatement(sql, statement, parameters, errors)
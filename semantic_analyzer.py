@@ -1,62 +1,215 @@
 # Phase 03: Semantic Analyzer for Mini SQL Compiler
+import itertools
+from array import array
+from collections import namedtuple
+
+from tokens import INTEGER, FLOAT, STRING, PARAM, KIND_NAMES
+
+# Schema versions are drawn from one global counter, so a version number
+# identifies one table definition in one symbol table
+_schema_versions = itertools.count(1)
+
+# Literal token kinds each column type accepts in a multi-row INSERT
+# (parameters are typed at bind time)
+ACCEPTED_KINDS = {
+    "INT": frozenset((INTEGER, FLOAT, PARAM)),
+    "FLOAT": frozenset((INTEGER, FLOAT, PARAM)),
+    "TEXT": frozenset((STRING, PARAM)),
+}
+KIND_TYPES = {INTEGER: "INT", FLOAT: "FLOAT", STRING: "TEXT"}
+# The same by node.kind (token type name). An identifier that is not a
+# column of the table is compared as TEXT.
+LITERAL_TYPES = {KIND_NAMES[kind]: data_type for kind, data_type in KIND_TYPES.items()}
+LITERAL_TYPES["IDENTIFIER"] = "TEXT"
+
+# Statements that change the schema; checked in script order before the
+# others by reanalyze() and the parallel checker
+DDL_STATEMENTS = ("CreateStmt", "CreateIndexStmt")
+
+# CREATE INDEX ... USING <method>; HASH when no method is given
+INDEX_METHODS = ("BTREE", "HASH")
+
+
+class Column(namedtuple("Column", "table name ordinal data_type")):
+    """
+    Immutable descriptor of one table column; `ordinal` is its 0-based
+    position in the table (and in an INSERT row).
+    """
+    __slots__ = ()
+
 
 class SymbolTable:
     """
     Hierarchical symbol table to store metadata about tables and columns.
     Each table entry contains:
     - Table name
-    - Columns: list of (column_name, data_type) tuples
+    - Columns: tuple of (column_name, data_type) tuples
+    - Index: column_name -> Column descriptor, for O(1) lookups
     - Line and column where defined
+    Indexes are kept by name, each on one column of one table.
+    With a Catalog attached, tables missing from `tables` are loaded from
+    it the first time they are looked up.
     """
     
-    def __init__(self):
-        self.tables = {}  # table_name -> {'columns': [(name, type)], 'line': int, 'col': int}
+    def __init__(self, catalog=None):
+        self.tables = {}  # table_name -> {'columns': ((name, type), ...), 'index': {name: Column}, 'line': int, 'col': int}
+        self.versions = {}  # table_name -> schema version, changes whenever the table does
+        self.indexes = {}  # index_name -> {'table': str, 'column': str, 'method': str, 'line': int, 'col': int}
+        self.catalog = catalog
+        self.created = []  # tables added by add_table (not loaded from the catalog)
+        # While a dict, every lookup is recorded in it as key -> observed
+        # result (see observe()); used to track what a statement depends on
+        self.trace = None
+        # Set by SemanticAnalyzer.reanalyze(): index of the statement being
+        # checked. Tables defined by that statement or later ones are hidden.
+        self.position = None
+        self.positions = {}  # table_name -> index of its defining statement
     
     def add_table(self, table_name, columns, line, col):
         """Register a new table with its column definitions."""
-        if table_name in self.tables:
+        if self._lookup(table_name) is not None:
             return False  # Table already exists
         
+        self._register(table_name, columns, line, col)
+        self.created.append(table_name)
+        if self.position is not None:
+            self.positions[table_name] = self.position
+        return True
+    
+    def add_index(self, index_name, table_name, column_name, method, line, col):
+        """Register an index on table_name(column_name); method is BTREE or HASH."""
+        if index_name in self.indexes:
+            return False  # Index already exists
+        self.indexes[index_name] = {'table': table_name, 'column': column_name, 'method': method,
+                                    'line': line, 'col': col}
+        return True
+    
+    def get_index(self, index_name):
+        """Retrieve index metadata, or None."""
+        index = self.indexes.get(index_name)
+        if self.trace is not None:
+            self.trace[("index", index_name)] = self.observe(("index", index_name))
+        return index
+    
+    def _register(self, table_name, columns, line, col):
+        index = {}
+        for ordinal, (col_name, col_type) in enumerate(columns):
+            # a repeated column name resolves to its first definition
+            index.setdefault(col_name, Column(table_name, col_name, ordinal, col_type))
         self.tables[table_name] = {
-            'columns': columns,  # List of (column_name, data_type) tuples
+            'columns': tuple(columns),  # (column_name, data_type) tuples
+            'index': index,
             'line': line,
             'col': col
         }
-        return True
+        self.versions[table_name] = next(_schema_versions)
+    
+    def _lookup(self, table_name):
+        """Table entry, loading it from the catalog on first use; None if unknown."""
+        table = self.tables.get(table_name)
+        if table is not None:
+            if self.position is not None and self.positions.get(table_name, -1) >= self.position:
+                return None  # defined further down the script
+        elif self.catalog is not None:
+            found = self.catalog.load_table(table_name)
+            if found is not None:
+                columns, line, col = found
+                self._register(table_name, columns, line, col)
+                table = self.tables[table_name]
+        return table
+    
+    def load_catalog(self):
+        """
+        Load every catalog table not loaded yet (for listings and saving).
+        Catalog tables are then listed first, in catalog order, whatever
+        order the script happened to look them up in.
+        """
+        if self.catalog is not None:
+            names = self.catalog.names()
+            for table_name in names:
+                self._lookup(table_name)
+            tables = {name: self.tables[name] for name in names if name in self.tables}
+            tables.update(self.tables)
+            self.tables = tables
+    
+    def close_catalog(self):
+        if self.catalog is not None:
+            self.catalog.close()
+            self.catalog = None
+    
+    def schema_version(self, table_name):
+        """Current schema version of a table (0 if it does not exist)."""
+        self._lookup(table_name)
+        return self.versions.get(table_name, 0)
     
     def table_exists(self, table_name):
         """Check if a table has been declared."""
-        return table_name in self.tables
+        exists = self._lookup(table_name) is not None
+        if self.trace is not None:
+            self.trace[("exists", table_name)] = exists
+        return exists
     
     def get_table(self, table_name):
         """Retrieve table metadata."""
-        return self.tables.get(table_name, None)
+        table = self._lookup(table_name)
+        if self.trace is not None:
+            self.trace[("table", table_name)] = self.observe(("table", table_name))
+        return table
+    
+    def get_columns(self, table_name):
+        """The (column_name, data_type) tuples of a table, or None."""
+        table = self._lookup(table_name)
+        if self.trace is not None:
+            self.trace[("columns", table_name)] = table['columns'] if table else None
+        return table['columns'] if table else None
+    
+    def resolve_column(self, table_name, column_name):
+        """Column descriptor (table, name, ordinal, data_type), or None if either is unknown."""
+        # plain dict hit first; _lookup handles the catalog and reanalyze()
+        table = self.tables.get(table_name) if self.position is None else None
+        if table is None:
+            table = self._lookup(table_name)
+        column = table['index'].get(column_name) if table else None
+        if self.trace is not None:
+            self.trace[("column", table_name, column_name)] = column
+        return column
+    
+    def observe(self, key):
+        """
+        Current result of a recorded lookup, comparable with the value in
+        `trace`: ("exists", table), ("table", table) -> (columns, line, col),
+        ("columns", table), ("column", table, column) or ("index", index).
+        """
+        kind = key[0]
+        if kind == "index":
+            index = self.indexes.get(key[1])
+            return (index['table'], index['column'], index['method'], index['line'], index['col']) if index else None
+        table = self._lookup(key[1])
+        if kind == "exists":
+            return table is not None
+        if table is None:
+            return None
+        if kind == "table":
+            return (table['columns'], table['line'], table['col'])
+        if kind == "columns":
+            return table['columns']
+        return table['index'].get(key[2])
     
     def get_column_type(self, table_name, column_name):
         """Get the data type of a specific column in a table."""
-        if table_name not in self.tables:
-            return None
-        
-        for col_name, col_type in self.tables[table_name]['columns']:
-            if col_name == column_name:
-                return col_type
-        return None
+        column = self.resolve_column(table_name, column_name)
+        return column.data_type if column else None
     
     def column_exists(self, table_name, column_name):
         """Verify that a column exists within a table."""
-        if table_name not in self.tables:
-            return False
-        
-        for col_name, _ in self.tables[table_name]['columns']:
-            if col_name == column_name:
-                return True
-        return False
+        return self.resolve_column(table_name, column_name) is not None
     
     def get_column_count(self, table_name):
         """Get the number of columns in a table."""
-        if table_name not in self.tables:
+        table = self._lookup(table_name)
+        if table is None:
             return 0
-        return len(self.tables[table_name]['columns'])
+        return len(table['columns'])
     
     def dump(self):
         """Pretty-print the symbol table contents."""
@@ -65,6 +218,7 @@ class SymbolTable:
         output.append("SYMBOL TABLE DUMP")
         output.append("_"*60)
         
+        self.load_catalog()
         if not self.tables:
             output.append("No tables defined.")
         else:
@@ -74,60 +228,282 @@ class SymbolTable:
                 output.append("  Columns:")
                 for col_name, col_type in table_info['columns']:
                     output.append(f"    - {col_name}: {col_type}")
+                indexes = [(name, index['column'], index['method']) for name, index in self.indexes.items()
+                           if index['table'] == table_name]
+                if indexes:
+                    output.append("  Indexes:")
+                    for index_name, col_name, method in indexes:
+                        output.append(f"    - {index_name} ({col_name}) USING {method}")
         
         output.append("_"*60)
         return "\n".join(output)
 
 
+def _first_line(node):
+    """Line of the first token under node."""
+    while node.children:
+        node = node.children[0]
+    return node.line
+
+
+def _clear_annotations(root):
+    """Remove the semantic annotations from every node under root."""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node.data_type = None
+        node.symbol_ref = None
+        if node.name == "ValueRows":
+            node.columns = None
+            node.column_types = None
+        stack.extend(node.children)
+
+
+class StatementRecord:
+    """
+    What checking one Statement node depended on and produced, for
+    SemanticAnalyzer.reanalyze():
+    reads   - symbol table lookups made, key -> observed result
+    creates - name of the table (index) a CREATE TABLE (INDEX) statement
+              declares, or None
+    defines - (table name node, columns) if it registered the table, or
+              (index name node, table, column, method) if it registered
+              the index
+    errors  - the diagnostics it reported
+    line    - its first line when checked (the errors embed positions)
+    """
+
+    __slots__ = ('node', 'reads', 'creates', 'defines', 'errors', 'line')
+
+    def __init__(self, node, reads, creates, defines, errors):
+        self.node = node
+        self.reads = reads
+        self.creates = creates
+        self.defines = defines
+        self.errors = errors
+        self.line = _first_line(node)
+
+    def tables(self):
+        """Names of the tables the statement looked up."""
+        return {key[1] for key in self.reads}
+
+    def moved(self):
+        """True if the statement's errors cite lines it is no longer on."""
+        return bool(self.errors) and _first_line(self.node) != self.line
+
+    def still_valid(self, symbol_table):
+        """True if checking the statement again would give the same result."""
+        if self.moved():
+            return False
+        observe = symbol_table.observe
+        for key, value in self.reads.items():
+            if observe(key) != value:
+                return False
+        return True
+
+    def replay(self, symbol_table):
+        """Apply the statement's effect on the symbol table without re-checking it."""
+        if self.defines:
+            name_node = self.defines[0]
+            if self.node.children[0].name == "CreateIndexStmt":
+                _, table_name, column_name, method = self.defines
+                symbol_table.add_index(name_node.value, table_name, column_name, method,
+                                       name_node.line, name_node.col)
+            else:
+                symbol_table.add_table(name_node.value, self.defines[1], name_node.line, name_node.col)
+
+
 class SemanticAnalyzer:
     """
     Semantic Analyzer that consumes the parse tree from Phase 02
     and performs semantic checks including:
     - Identifier verification (table/column existence, redeclaration)
     - Type checking (valid types, INSERT consistency, WHERE compatibility)
+    
+    Statements are dispatched through STATEMENT_HANDLERS by node name, and
+    each handler reads its children by their fixed positions in the
+    grammar, so every statement subtree is visited once.
     """
     
-    def __init__(self, parse_tree):
+    # statement node name -> handler method
+    STATEMENT_HANDLERS = {
+        "CreateStmt": "_analyze_create_table",
+        "CreateIndexStmt": "_analyze_create_index",
+        "InsertStmt": "_analyze_insert",
+        "SelectStmt": "_analyze_select",
+        "UpdateStmt": "_analyze_update",
+        "DeleteStmt": "_analyze_delete",
+        "ExplainStmt": "_analyze_explain",
+    }
+    
+    # nodes under a WHERE clause that only group comparisons
+    CONDITION_NODES = frozenset(("Condition", "Term", "Factor", "WhereClause"))
+    
+    def __init__(self, parse_tree=None, catalog=None):
         self.parse_tree = parse_tree
-        self.symbol_table = SymbolTable()
+        self.symbol_table = SymbolTable(catalog)
         self.errors = []
         self.current_table = None  # Track current table context
+        # reanalyze() state, keyed by id(Statement node)
+        self._records = {}   # -> StatementRecord
+        self._readers = {}   # table name -> ids of statements that looked it up
+        self._errored = set()
+        self._creates = []   # ids of CREATE TABLE / INDEX statements, in script order
+        self._handlers = {name: getattr(self, method) for name, method in self.STATEMENT_HANDLERS.items()}
     
     def analyze(self):
         """Main entry point for semantic analysis."""
         self._traverse_tree(self.parse_tree)
         return len(self.errors) == 0
     
+    def analyze_statement(self, node):
+        """
+        Check a single Statement node against the symbol table built so far,
+        updating it for CREATE TABLE. Lets statements be checked as they are
+        parsed instead of after the whole tree exists.
+        Returns the list of errors this statement produced.
+        """
+        first = len(self.errors)
+        self._analyze_statement(node)
+        return self.errors[first:]
+    
+    def reanalyze(self, statements):
+        """
+        Check a list of Statement nodes (the whole script) incrementally.
+        The first call checks everything, recording for each statement the
+        symbol table lookups it made. Later calls re-check only:
+        - statements that are new nodes since the previous call
+        - statements that looked up a table (or index) whose CREATE
+          statements were added or removed, and whose lookups now give
+          other answers
+        - statements whose errors cite lines they have moved away from
+        Everything else keeps its diagnostics and annotations. Returns the
+        number of statements checked.
+        """
+        previous = self._records
+        positions = dict(zip(map(id, statements), range(len(statements))))
+        checked = 0
+        
+        # Tables and indexes whose CREATE statements changed
+        dirty = set()
+        for key in previous.keys() - positions.keys():
+            record = previous.pop(key)
+            self._forget(key, record)
+            if record.creates:
+                dirty.add(record.creates)
+        new = [statements[positions[key]] for key in positions.keys() - previous.keys()]
+        for node in new:
+            if node.children and node.children[0].name in DDL_STATEMENTS:
+                dirty.add(node.children[0].children[2].value)
+        
+        # The schema: CREATE TABLE / INDEX statements in script order
+        symbol_table = self.symbol_table = SymbolTable(self.symbol_table.catalog)
+        creates = [key for key in self._creates if key in positions]
+        creates += [id(node) for node in new if node.children and node.children[0].name in DDL_STATEMENTS]
+        creates.sort(key=positions.__getitem__)
+        for key in creates:
+            symbol_table.position = positions[key]
+            record = previous.get(key)
+            # an index also depends on its table, so it is always re-validated
+            if record is not None and not record.moved() and (
+                    record.creates not in dirty and record.node.children[0].name == "CreateStmt"
+                    or record.still_valid(symbol_table)):
+                record.replay(symbol_table)
+            else:
+                self._check_at(statements[symbol_table.position], symbol_table.position)
+                checked += 1
+        self._creates = creates
+        
+        # Other statements affected by the change
+        candidates = {id(node) for node in new}
+        for table in dirty:
+            candidates.update(self._readers.get(table, ()))
+        candidates.update(key for key in self._errored if previous[key].moved())
+        for key in sorted(candidates - set(creates), key=positions.__getitem__):
+            position = positions[key]
+            record = previous.get(key)
+            symbol_table.position = position
+            if record is None or not record.still_valid(symbol_table):
+                self._check_at(statements[position], position)
+                checked += 1
+        symbol_table.position = None
+        
+        records = self._records
+        self.errors = [error for key in sorted(self._errored, key=positions.__getitem__)
+                       for error in records[key].errors]
+        return checked
+    
+    def _check_at(self, node, position):
+        """Check one statement of reanalyze() with its lookups recorded."""
+        key = id(node)
+        old = self._records.get(key)
+        if old is not None:
+            # checked before under another schema: start from a bare tree
+            self._forget(key, old)
+            _clear_annotations(node)
+        
+        symbol_table = self.symbol_table
+        created = len(symbol_table.created)
+        indexed = len(symbol_table.indexes)
+        symbol_table.trace = {}
+        self.errors = []
+        try:
+            self._analyze_statement(node)
+        finally:
+            reads = symbol_table.trace
+            symbol_table.trace = None
+        
+        creates = defines = None
+        if node.children and node.children[0].name == "CreateStmt":
+            name_node = node.children[0].children[2]
+            creates = name_node.value
+            if len(symbol_table.created) > created:
+                defines = (name_node, symbol_table.tables[creates]['columns'])
+        elif node.children and node.children[0].name == "CreateIndexStmt":
+            name_node = node.children[0].children[2]
+            creates = name_node.value
+            if len(symbol_table.indexes) > indexed:
+                index = symbol_table.indexes[creates]
+                defines = (name_node, index['table'], index['column'], index['method'])
+        record = StatementRecord(node, reads, creates, defines, self.errors)
+        self._records[key] = record
+        for table in record.tables():
+            self._readers.setdefault(table, set()).add(key)
+        if record.errors:
+            self._errored.add(key)
+    
+    def _forget(self, key, record):
+        """Drop a record from the reader and error indexes."""
+        for table in record.tables():
+            readers = self._readers.get(table)
+            if readers is not None:
+                readers.discard(key)
+        self._errored.discard(key)
+    
     def _traverse_tree(self, node):
-        """Recursively traverse the parse tree and analyze statements."""
+        """Traverse the parse tree (with an explicit stack) and analyze statements."""
         if not node:
             return
         
-        # Route to appropriate handler based on node type
-        if node.name == "Statement":
-            self._analyze_statement(node)
-        
-        # Continue traversing children
-        for child in node.children:
-            self._traverse_tree(child)
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            # A statement's subtree belongs to its handler; only look for
+            # statements elsewhere, in source order
+            if node.name == "Statement":
+                self._analyze_statement(node)
+            else:
+                stack.extend(reversed(node.children))
     
     def _analyze_statement(self, node):
         """Route statement to appropriate semantic check handler."""
         if not node.children:
             return
         
-        stmt_type = node.children[0].name
-        
-        if stmt_type == "CreateStmt":
-            self._analyze_create_table(node.children[0])
-        elif stmt_type == "InsertStmt":
-            self._analyze_insert(node.children[0])
-        elif stmt_type == "SelectStmt":
-            self._analyze_select(node.children[0])
-        elif stmt_type == "UpdateStmt":
-            self._analyze_update(node.children[0])
-        elif stmt_type == "DeleteStmt":
-            self._analyze_delete(node.children[0])
+        stmt = node.children[0]
+        handler = self._handlers.get(stmt.name)
+        if handler:
+            handler(stmt)
     
     def _analyze_create_table(self, node):
         """
@@ -179,6 +555,65 @@ class SemanticAnalyzer:
             self.symbol_table.add_table(table_name, columns, line, col)
             table_name_node.symbol_ref = table_name
     
+    def _analyze_create_index(self, node):
+        """
+        Analyze CREATE INDEX statement:
+        - Check for index redeclaration
+        - Verify the table and the indexed column exist
+        - Validate the index method (BTREE or HASH)
+        - Record the index in the symbol table
+        """
+        # Pattern: CREATE INDEX [name] ON [table] ( [column] ) [USING method]
+        index_name_node = node.children[2]
+        table_name_node = node.children[4]
+        column_node = node.children[6]
+        index_name = index_name_node.value
+        table_name = table_name_node.value
+        
+        # Check for redeclaration
+        existing = self.symbol_table.get_index(index_name)
+        if existing is not None:
+            self._report_error(
+                f"Semantic Error: Index '{index_name}' already declared at line {existing['line']}",
+                self._get_line(index_name_node), self._get_col(index_name_node)
+            )
+            return
+        
+        # Check table existence
+        if not self.symbol_table.table_exists(table_name):
+            self._report_error(
+                f"Semantic Error: Table '{table_name}' not found",
+                self._get_line(table_name_node), self._get_col(table_name_node)
+            )
+            return
+        table_name_node.symbol_ref = table_name
+        
+        col_name = column_node.value
+        column = self.symbol_table.resolve_column(table_name, col_name)
+        if column is None:
+            self._report_error(
+                f"Semantic Error: Column '{col_name}' does not exist in table '{table_name}'",
+                self._get_line(column_node), self._get_col(column_node)
+            )
+            return
+        column_node.data_type = column.data_type
+        column_node.symbol_ref = f"{table_name}.{col_name}"
+        
+        method = "HASH"
+        if len(node.children) > 9:
+            method_node = node.children[9]
+            method = method_node.value
+            if method not in INDEX_METHODS:
+                self._report_error(
+                    f"Semantic Error: Invalid index method '{method}'. Expected BTREE or HASH",
+                    self._get_line(method_node), self._get_col(method_node)
+                )
+                return
+        
+        self.symbol_table.add_index(index_name, table_name, col_name, method,
+                                    self._get_line(index_name_node), self._get_col(index_name_node))
+        index_name_node.symbol_ref = index_name
+    
     def _analyze_insert(self, node):
         """
         Analyze INSERT INTO statement:
@@ -201,14 +636,15 @@ class SemanticAnalyzer:
             return
         
         # Get table metadata
-        table_info = self.symbol_table.get_table(table_name)
-        expected_columns = table_info['columns']
+        expected_columns = self.symbol_table.get_columns(table_name)
         
-        # Extract values from INSERT statement
-        values = []
-        for child in node.children:
-            if child.name == "Value":
-                values.append(child)
+        if node.children[-1].name == "ValueRows":
+            self._analyze_value_rows(node.children[-1], table_name, expected_columns)
+            table_name_node.symbol_ref = table_name
+            return
+        
+        # Values sit between the parentheses: INSERT INTO t VALUES ( ... )
+        values = node.children[5:-1]
         
         # Check value count
         if len(values) != len(expected_columns):
@@ -220,6 +656,10 @@ class SemanticAnalyzer:
         
         # Type checking for each value
         for i, (value_node, (col_name, col_type)) in enumerate(zip(values, expected_columns)):
+            if self._is_parameter(value_node):
+                # Parameters take the column's type; values are checked at bind time
+                value_node.data_type = col_type
+                continue
             value_type = self._infer_type(value_node)
             
             if not self._types_compatible(col_type, value_type):
@@ -235,25 +675,80 @@ class SemanticAnalyzer:
         # Annotate table reference
         table_name_node.symbol_ref = table_name
     
+    def _analyze_value_rows(self, rows, table_name, expected_columns):
+        """
+        Check the rows of a multi-row INSERT column by column:
+        - Every row must have one value per column
+        - One pass per column over its literal kinds; rows are only looked
+          at one by one when a column holds a mismatch
+        Fills rows.columns with the typed values of each column.
+        """
+        width = len(expected_columns)
+        if rows.uniform_width() != width:
+            for r in range(rows.row_count):
+                provided = rows.row_width(r)
+                if provided != width:
+                    self._report_error(
+                        f"Semantic Error: Column count mismatch in row {r + 1}. Table '{table_name}' has {width} columns, but {provided} values provided",
+                        rows.row_lines[r], rows.row_cols[r]
+                    )
+            return
+        
+        columns = []
+        for c, (col_name, col_type) in enumerate(expected_columns):
+            kinds = rows.cell_kinds[c::width]
+            present = set(kinds)
+            accepted = ACCEPTED_KINDS[col_type]
+            if not present <= accepted:
+                for r, kind in enumerate(kinds):
+                    if kind not in accepted:
+                        k = r * width + c
+                        line, col = rows.cell_lines[k], rows.cell_cols[k]
+                        self._report_error(
+                            f"Semantic Error: Type mismatch in row {r + 1} at line {line}, position {col}. "
+                            f"Column '{col_name}' is defined as {col_type}, but a {KIND_TYPES[kind]} literal was provided for insertion",
+                            line, col
+                        )
+                columns.append(None)
+            elif PARAM in present:
+                columns.append(None)
+            else:
+                columns.append(self._typed_column(col_type, present, rows.cell_values[c::width]))
+        
+        rows.columns = columns
+        rows.column_types = [col_type for _, col_type in expected_columns]
+    
+    def _typed_column(self, col_type, kinds, values):
+        """
+        Pack one column of literal values (already converted) into a typed
+        array; values out of the array's range stay a plain list.
+        """
+        if col_type == "TEXT":
+            return values
+        try:
+            if col_type == "INT" and FLOAT not in kinds:
+                return array('q', values)
+            return array('d', values)
+        except OverflowError:
+            return values
+    
     def _analyze_select(self, node):
         """
         Analyze SELECT statement:
         - Verify table exists
         - Verify columns exist (if not SELECT *)
         - Check WHERE clause for type compatibility
+        - Verify ORDER BY columns exist
         """
         # Find table name (after FROM keyword)
-        table_name_node = None
-        from_found = False
-        for child in node.children:
-            if child.name == "KEYWORD" and child.value == "FROM":
-                from_found = True
-            elif from_found and child.name == "IDENTIFIER":
-                table_name_node = child
-                break
-        
-        if not table_name_node:
-            return
+        # Pattern: SELECT [columns or *] FROM [table] [WhereClause] [OrderByClause]
+        children = node.children
+        order_node = children[-1] if children[-1].name == "OrderByClause" else None
+        if order_node:
+            children = children[:-1]
+        where_node = children[-1] if children[-1].name == "WhereClause" else None
+        from_index = len(children) - (3 if where_node else 2)
+        table_name_node = children[from_index + 1]
         
         table_name = table_name_node.value
         line = self._get_line(table_name_node)
@@ -271,30 +766,39 @@ class SemanticAnalyzer:
         self.current_table = table_name
         table_name_node.symbol_ref = table_name
         
-        # Check selected columns (only BEFORE FROM keyword, skip if SELECT *)
-        select_found = False
-        for child in node.children:
-            if child.name == "KEYWORD" and child.value == "SELECT":
-                select_found = True
-            elif child.name == "KEYWORD" and child.value == "FROM":
-                # Stop checking columns once we hit FROM
-                break
-            elif select_found and child.name == "IDENTIFIER":
+        # Check selected columns (between SELECT and FROM, skip if SELECT *)
+        for child in children[1:from_index]:
+            if child.name == "IDENTIFIER":
                 col_name = child.value
-                if not self.symbol_table.column_exists(table_name, col_name):
+                column = self.symbol_table.resolve_column(table_name, col_name)
+                if column is None:
                     self._report_error(
                         f"Semantic Error: Column '{col_name}' does not exist in table '{table_name}'",
                         self._get_line(child), self._get_col(child)
                     )
                 else:
                     # Annotate with column type
-                    child.data_type = self.symbol_table.get_column_type(table_name, col_name)
+                    child.data_type = column.data_type
                     child.symbol_ref = f"{table_name}.{col_name}"
         
         # Analyze WHERE clause if present
-        for child in node.children:
-            if child.name == "WhereClause":
-                self._analyze_where_clause(child, table_name)
+        if where_node:
+            self._analyze_where_clause(where_node, table_name)
+        
+        # Check the ORDER BY columns
+        if order_node:
+            for key in order_node.children[2:]:
+                key_node = key.children[0]
+                col_name = key_node.value
+                column = self.symbol_table.resolve_column(table_name, col_name)
+                if column is None:
+                    self._report_error(
+                        f"Semantic Error: Column '{col_name}' does not exist in table '{table_name}'",
+                        self._get_line(key_node), self._get_col(key_node)
+                    )
+                else:
+                    key_node.data_type = column.data_type
+                    key_node.symbol_ref = f"{table_name}.{col_name}"
     
     def _analyze_update(self, node):
         """
@@ -321,37 +825,32 @@ class SemanticAnalyzer:
         self.current_table = table_name
         table_name_node.symbol_ref = table_name
         
-        # Find column being updated and its new value
-        # Pattern: UPDATE table SET [column] = [value]
-        set_found = False
-        column_node = None
-        value_node = None
-        
-        for i, child in enumerate(node.children):
-            if child.name == "KEYWORD" and child.value == "SET":
-                set_found = True
-            elif set_found and child.name == "IDENTIFIER" and column_node is None:
-                column_node = child
-            elif set_found and child.name == "Value":
-                value_node = child
-                break
-            elif child.name == "WhereClause":
-                self._analyze_where_clause(child, table_name)
+        # Pattern: UPDATE table SET [column] = [value] [WhereClause]
+        children = node.children
+        column_node = children[3]
+        value_node = children[5]
+        
+        # The WHERE clause is reported on before the assignment
+        if len(children) > 6:
+            self._analyze_where_clause(children[6], table_name)
         
         if column_node:
             col_name = column_node.value
-            if not self.symbol_table.column_exists(table_name, col_name):
+            column = self.symbol_table.resolve_column(table_name, col_name)
+            if column is None:
                 self._report_error(
                     f"Semantic Error: Column '{col_name}' does not exist in table '{table_name}'",
                     self._get_line(column_node), self._get_col(column_node)
                 )
             else:
-                col_type = self.symbol_table.get_column_type(table_name, col_name)
+                col_type = column.data_type
                 column_node.data_type = col_type
                 column_node.symbol_ref = f"{table_name}.{col_name}"
                 
                 # Check type compatibility of new value
-                if value_node:
+                if value_node and self._is_parameter(value_node):
+                    value_node.data_type = col_type
+                elif value_node:
                     value_type = self._infer_type(value_node)
                     if not self._types_compatible(col_type, value_type):
                         self._report_error(
@@ -367,18 +866,8 @@ class SemanticAnalyzer:
         - Verify table exists
         - Analyze WHERE clause
         """
-        # Find table name (after FROM keyword)
-        table_name_node = None
-        from_found = False
-        for child in node.children:
-            if child.name == "KEYWORD" and child.value == "FROM":
-                from_found = True
-            elif from_found and child.name == "IDENTIFIER":
-                table_name_node = child
-                break
-        
-        if not table_name_node:
-            return
+        # Pattern: DELETE FROM [table] [WhereClause]
+        table_name_node = node.children[2]
         
         table_name = table_name_node.value
         line = self._get_line(table_name_node)
@@ -396,9 +885,14 @@ class SemanticAnalyzer:
         table_name_node.symbol_ref = table_name
         
         # Analyze WHERE clause if present
-        for child in node.children:
-            if child.name == "WhereClause":
-                self._analyze_where_clause(child, table_name)
+        if len(node.children) > 3:
+            self._analyze_where_clause(node.children[3], table_name)
+    
+    def _analyze_explain(self, node):
+        """Analyze EXPLAIN: the explained statement is checked as if run."""
+        # Pattern: EXPLAIN [SelectStmt | UpdateStmt | DeleteStmt]
+        stmt = node.children[1]
+        self._handlers[stmt.name](stmt)
     
     def _analyze_where_clause(self, node, table_name):
         """
@@ -409,12 +903,18 @@ class SemanticAnalyzer:
         self._analyze_condition(node, table_name)
     
     def _analyze_condition(self, node, table_name):
-        """Recursively analyze conditions in WHERE clause."""
-        for child in node.children:
+        """
+        Analyze every comparison under a WHERE clause or condition, left to
+        right. Uses an explicit stack, so nesting depth is not limited by
+        the recursion limit.
+        """
+        stack = list(reversed(node.children))
+        while stack:
+            child = stack.pop()
             if child.name == "Comparison":
                 self._analyze_comparison(child, table_name)
-            elif child.name in ["Condition", "Term", "Factor", "WhereClause"]:
-                self._analyze_condition(child, table_name)
+            elif child.name in self.CONDITION_NODES:
+                stack.extend(reversed(child.children))
     
     def _analyze_comparison(self, node, table_name):
         """
@@ -422,38 +922,57 @@ class SemanticAnalyzer:
         - Verify column exists
         - Check type compatibility between column and literal
         """
-        operands = [child for child in node.children if child.name == "Operand"]
-        
-        if len(operands) < 2:
+        # Pattern: [Operand] OPERATOR [Operand]
+        if len(node.children) < 3:
             return
         
-        left_operand = operands[0]
-        right_operand = operands[1]
+        left_operand = node.children[0]
+        right_operand = node.children[2]
         
         # Determine types of both operands
         left_type = None
         right_type = None
+        left_param = self._is_parameter(left_operand)
+        right_param = self._is_parameter(right_operand)
+        # One index lookup per identifier operand: the column descriptor, or
+        # None; literals are never looked up
+        resolve = self.symbol_table.resolve_column
+        left_column = resolve(table_name, left_operand.value) if left_operand.kind == "IDENTIFIER" else None
+        right_column = resolve(table_name, right_operand.value) if right_operand.kind == "IDENTIFIER" else None
         
         # Check if left operand is a column identifier
-        if left_operand.value and self.symbol_table.column_exists(table_name, left_operand.value):
-            left_type = self.symbol_table.get_column_type(table_name, left_operand.value)
+        if left_param:
+            pass
+        elif left_column:
+            left_type = left_column.data_type
             left_operand.data_type = left_type
             left_operand.symbol_ref = f"{table_name}.{left_operand.value}"
-        elif left_operand.value:
+        else:
             # It's a literal
-            left_type = self._infer_type_from_value(left_operand.value)
+            left_type = self._infer_type(left_operand)
             left_operand.data_type = left_type
         
         # Check if right operand is a column identifier
-        if right_operand.value and self.symbol_table.column_exists(table_name, right_operand.value):
-            right_type = self.symbol_table.get_column_type(table_name, right_operand.value)
+        if right_param:
+            pass
+        elif right_column:
+            right_type = right_column.data_type
             right_operand.data_type = right_type
             right_operand.symbol_ref = f"{table_name}.{right_operand.value}"
-        elif right_operand.value:
+        else:
             # It's a literal
-            right_type = self._infer_type_from_value(right_operand.value)
+            right_type = self._infer_type(right_operand)
             right_operand.data_type = right_type
         
+        # A parameter takes the type of the other side (None if that is a
+        # parameter too); its value is checked at bind time
+        if left_param or right_param:
+            if left_param:
+                left_operand.data_type = right_type
+            if right_param:
+                right_operand.data_type = left_type
+            return
+        
         # Type compatibility check
         if left_type and right_type:
             if not self._types_compatible(left_type, right_type):
@@ -462,52 +981,13 @@ class SemanticAnalyzer:
                     self._get_line(right_operand), self._get_col(right_operand)
                 )
     
-    def _infer_type(self, node):
-        """Infer the semantic type from a parse tree node."""
-        if not node or not node.value:
-            return "UNKNOWN"
-        
-        # Check if it's a string literal (surrounded by quotes)
-        value = str(node.value)
-        if value.startswith("'") and value.endswith("'"):
-            return "TEXT"
-        
-        # Try to parse as number
-        try:
-            if '.' in value:
-                float(value)
-                return "FLOAT"
-            else:
-                int(value)
-                return "INT"
-        except ValueError:
-            pass
-        
-        return "TEXT"
+    def _is_parameter(self, node):
+        """True for a ? or :name parameter node."""
+        return node.kind == "PARAM"
     
-    def _infer_type_from_value(self, value):
-        """Infer type from a raw value string."""
-        if not value:
-            return "UNKNOWN"
-        
-        value_str = str(value)
-        
-        # Check if string literal
-        if value_str.startswith("'") and value_str.endswith("'"):
-            return "TEXT"
-        
-        # Try numeric types
-        try:
-            if '.' in value_str:
-                float(value_str)
-                return "FLOAT"
-            else:
-                int(value_str)
-                return "INT"
-        except ValueError:
-            pass
-        
-        return "TEXT"
+    def _infer_type(self, node):
+        """Semantic type of a literal node, from the token kind the lexer gave it."""
+        return LITERAL_TYPES.get(node.kind, "UNKNOWN")
     
     def _types_compatible(self, expected_type, actual_type):
         """
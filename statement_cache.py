@@ -0,0 +1,174 @@
+# statement_cache.py
+# LRU cache of parsed and type-checked statements, keyed by fingerprint.
+#
+# A fingerprint is the statement's token sequence with INTEGER, FLOAT and
+# STRING literals reduced to their kind. Statements with the same fingerprint
+# parse to the same tree shape and type-check the same way (literal types
+# come from the token kind), so the checked tree is kept as a template and a
+# hit only copies it and rebinds the literals and positions from the new
+# tokens.
+#
+# Only clean DML statements are cached: CREATE TABLE changes the symbol
+# table, and error messages embed positions. Multi-row INSERTs are not
+# cached either; their fingerprint grows with the row count, so they
+# rarely repeat. Each entry remembers the schema
+# versions of the tables it references and is dropped as soon as one of
+# them changes.
+
+from collections import OrderedDict
+
+from parser import Parser, ParseNode
+from tokens import INTEGER, FLOAT, STRING, KEYWORD
+
+DEFAULT_CAPACITY = 1024
+
+CACHED_STATEMENTS = ("InsertStmt", "SelectStmt", "UpdateStmt", "DeleteStmt", "ExplainStmt")
+
+
+def fingerprint(tokens):
+    """
+    Normalized key for a statement's TokenStream: token kinds and keyword
+    ids, plus the text of every token that is not a literal or keyword.
+    """
+    kinds = tokens.kinds
+    lexemes = tuple(
+        tokens.lexeme(i) for i in range(len(kinds))
+        if kinds[i] != KEYWORD and kinds[i] != INTEGER and kinds[i] != FLOAT and kinds[i] != STRING
+    )
+    return kinds.tobytes(), tokens.subkinds.tobytes(), lexemes
+
+
+class CachedStatement:
+    """A checked statement tree plus what is needed to reuse it."""
+
+    def __init__(self, statement, tokens, tables):
+        self.tables = tables  # [(table_name, schema_version)]
+        # Preorder rows of (name, value, data_type, symbol_ref, kind,
+        # token index or -1, parent row or -1, has children)
+        positions = {(tokens.lines[i], tokens.cols[i]): i for i in range(len(tokens))}
+        self.nodes = []
+        stack = [(statement, -1)]
+        while stack:
+            node, parent = stack.pop()
+            index = positions[(node.line, node.col)] if node.kind else -1
+            row = len(self.nodes)
+            self.nodes.append((node.name, node.value, node.data_type, node.symbol_ref,
+                               node.kind, index, parent, bool(node.children)))
+            stack.extend((child, row) for child in reversed(node.children))
+
+    def instantiate(self, tokens):
+        """A fresh copy of the tree with values and positions from tokens."""
+        lexeme = tokens.lexeme
+        lines = tokens.lines
+        cols = tokens.cols
+        literal = tokens.literal
+        new = ParseNode.__new__
+        built = []
+        append = built.append
+        # Slots are filled directly; ParseNode.__init__ would unpack a token tuple
+        for name, value, data_type, symbol_ref, kind, index, parent, has_children in self.nodes:
+            node = new(ParseNode)
+            node.name = name
+            node.data_type = data_type
+            node.symbol_ref = symbol_ref
+            node.kind = kind
+            node.children = [] if has_children else ()
+            if index >= 0:
+                node.value = lexeme(index)
+                node.line = lines[index]
+                node.col = cols[index]
+                node.literal = literal(index)
+            else:
+                node.value = value
+                node.line = 0
+                node.col = 0
+                node.literal = None
+            if parent >= 0:
+                built[parent].children.append(node)
+            append(node)
+        return built[0]
+
+
+class StatementCache:
+    """
+    Bounded LRU cache in front of Parser + SemanticAnalyzer for single
+    statements. compile() has the same result as parsing and analyzing
+    the tokens directly.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.entries = OrderedDict()  # fingerprint -> CachedStatement
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def compile(self, tokens, analyzer):
+        """
+        Parse and check one statement's TokenStream against analyzer's
+        symbol table. Returns (statement or None, syntax_errors,
+        semantic_errors).
+        """
+        key = fingerprint(tokens)
+        entry = self.entries.get(key)
+        if entry is not None:
+            version = analyzer.symbol_table.schema_version
+            if all(version(table) == expected for table, expected in entry.tables):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry.instantiate(tokens), [], []
+            # a referenced table changed since the entry was made
+            del self.entries[key]
+            self.invalidations += 1
+
+        self.misses += 1
+        parser = Parser(tokens)
+        statement = None
+        semantic_errors = []
+        count = 0
+        for statement in parser.iter_statements():
+            semantic_errors.extend(analyzer.analyze_statement(statement))
+            count += 1
+
+        if (count == 1 and not parser.diagnostics and not semantic_errors
+                and statement.children[0].name in CACHED_STATEMENTS
+                and statement.children[0].children[-1].name != "ValueRows"):
+            self._store(key, statement, tokens, analyzer.symbol_table)
+        return statement, parser.errors, semantic_errors
+
+    def _store(self, key, statement, tokens, symbol_table):
+        tables = set()
+        stack = [statement]
+        while stack:
+            node = stack.pop()
+            if node.symbol_ref:
+                tables.add(node.symbol_ref.split(".")[0])
+            stack.extend(node.children)
+        versions = [(table, symbol_table.schema_version(table)) for table in sorted(tables)]
+
+        # the template copies the node fields, so the caller keeps `statement`
+        self.entries[key] = CachedStatement(statement, tokens, versions)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, table_name=None):
+        """Drop entries that reference table_name (all entries if None)."""
+        if table_name is None:
+            dropped = list(self.entries)
+        else:
+            dropped = [key for key, entry in self.entries.items()
+                       if any(table == table_name for table, _ in entry.tables)]
+        for key in dropped:
+            del self.entries[key]
+        self.invalidations += len(dropped)
+
+    def stats(self):
+        return {
+            "hits": self.hits, "misses": self.misses, "entries": len(self.entries),
+            "invalidations": self.invalidations, "evictions": self.evictions,
+        }
@@ -0,0 +1,178 @@
+# tokens.py
+# Compact token representation shared by the lexer and the parser.
+
+from array import array
+from enum import IntEnum
+
+from dfa_definitions import keywords, delimiters, parentheses
+
+
+class Kind(IntEnum):
+    """Token kinds. 0 is reserved for 'no token' (end of input)."""
+    KEYWORD = 1
+    IDENTIFIER = 2
+    INTEGER = 3
+    FLOAT = 4
+    STRING = 5
+    OPERATOR = 6
+    COMMA = 7
+    SEMICOLON = 8
+    LPAREN = 9
+    RPAREN = 10
+    LBRACE = 11
+    RBRACE = 12
+    LBRACKET = 13
+    RBRACKET = 14
+    PARAM = 15      # statement parameter: ? or :name
+
+
+# Keyword ids, stored in TokenStream.subkinds (0 for non-keywords)
+Kw = IntEnum('Kw', sorted(keywords))
+
+# Plain-int aliases for the hot paths (module globals are much cheaper to
+# load than enum attributes)
+KEYWORD = int(Kind.KEYWORD)
+IDENTIFIER = int(Kind.IDENTIFIER)
+INTEGER = int(Kind.INTEGER)
+FLOAT = int(Kind.FLOAT)
+STRING = int(Kind.STRING)
+OPERATOR = int(Kind.OPERATOR)
+COMMA = int(Kind.COMMA)
+SEMICOLON = int(Kind.SEMICOLON)
+LPAREN = int(Kind.LPAREN)
+RPAREN = int(Kind.RPAREN)
+PARAM = int(Kind.PARAM)
+
+# kind -> type name used in the tuple view, e.g. "KEYWORD"
+KIND_NAMES = [None] + [kind.name for kind in Kind]
+KIND_BY_NAME = {kind.name: int(kind) for kind in Kind}
+
+# keyword lexeme -> id, and id -> the (interned) keyword string
+KEYWORD_IDS = {kw.name: int(kw) for kw in Kw}
+KEYWORD_NAMES = [None] + [kw.name for kw in Kw]
+
+# single-character tokens -> kind
+SINGLE_CHAR_KINDS = {ch: KIND_BY_NAME[name] for ch, name in delimiters.items()}
+SINGLE_CHAR_KINDS.update({ch: KIND_BY_NAME[name] for ch, name in parentheses.items()})
+
+
+LITERAL_KINDS = frozenset((INTEGER, FLOAT, STRING))
+
+
+def literal_value(kind, lexeme):
+    """Python value of a literal token's lexeme (None if kind is not a literal)."""
+    if kind == INTEGER:
+        return int(lexeme)
+    if kind == FLOAT:
+        return float(lexeme)
+    if kind == STRING:
+        return lexeme[1:-1]
+    return None
+
+
+class TokenStream:
+    """
+    Struct-of-arrays token storage: one typed array per field instead of one
+    tuple per token. Lexemes are not stored; they are sliced from the source
+    on demand (keywords come back as the shared keyword strings).
+
+    Indexing and iteration still give the classic (type, lexeme, line, col)
+    tuples, so code written against the old token lists keeps working.
+
+    Literal values are not stored either; literal(i) converts the lexeme
+    when a later phase asks for it: an int for INTEGER, a float for FLOAT,
+    the text without quotes for STRING and None for every other kind.
+    """
+
+    def __init__(self, source=""):
+        self.source = source
+        self.kinds = array('B')
+        self.subkinds = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.lines = array('I')
+        self.cols = array('I')
+
+    @classmethod
+    def from_tuples(cls, tokens):
+        """Build a stream from (type, lexeme, line, col) tuples."""
+        stream = cls()
+        parts = []
+        offset = 0
+        for ttype, lexeme, line, col in tokens:
+            kind = KIND_BY_NAME[ttype]
+            stream.append(kind, KEYWORD_IDS.get(lexeme, 0) if kind == KEYWORD else 0,
+                          offset, offset + len(lexeme), line, col)
+            parts.append(lexeme)
+            offset += len(lexeme)
+        stream.source = "".join(parts)
+        return stream
+
+    def append(self, kind, subkind, start, end, line, col):
+        self.kinds.append(kind)
+        self.subkinds.append(subkind)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+        self.cols.append(col)
+
+    def extract(self, lo, hi, start, stop):
+        """
+        Tokens lo..hi-1 as a new stream over source[start:stop], with offsets
+        made relative to `start`.
+        """
+        part = TokenStream(self.source[start:stop])
+        part.kinds = self.kinds[lo:hi]
+        part.subkinds = self.subkinds[lo:hi]
+        part.starts = array('q', [s - start for s in self.starts[lo:hi]])
+        part.ends = array('q', [e - start for e in self.ends[lo:hi]])
+        part.lines = self.lines[lo:hi]
+        part.cols = self.cols[lo:hi]
+        return part
+
+    def extend(self, other, offset=0):
+        """Append all tokens of other, shifting its offsets by `offset`."""
+        self.kinds.extend(other.kinds)
+        self.subkinds.extend(other.subkinds)
+        if offset:
+            self.starts.extend([s + offset for s in other.starts])
+            self.ends.extend([e + offset for e in other.ends])
+        else:
+            self.starts.extend(other.starts)
+            self.ends.extend(other.ends)
+        self.lines.extend(other.lines)
+        self.cols.extend(other.cols)
+
+    def literal(self, i):
+        """Python value of token i if it is a literal, else None."""
+        kind = self.kinds[i]
+        if kind in LITERAL_KINDS:
+            return literal_value(kind, self.source[self.starts[i]:self.ends[i]])
+        return None
+
+    def lexeme(self, i):
+        """Materialize the text of token i."""
+        subkind = self.subkinds[i]
+        if subkind:
+            return KEYWORD_NAMES[subkind]
+        return self.source[self.starts[i]:self.ends[i]]
+
+    def type_name(self, i):
+        return KIND_NAMES[self.kinds[i]]
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return (KIND_NAMES[self.kinds[i]], self.lexeme(i), self.lines[i], self.cols[i])
+
+    def __iter__(self):
+        for i in range(len(self.kinds)):
+            yield self[i]
+
+    def __eq__(self, other):
+        return list(self) == list(other)